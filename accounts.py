@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+from metrics import failure_reason
+from page_pool import PagePool, VIEWPORT
+
+ACTIVE = "active"
+COOLDOWN = "cooldown"
+DISABLED = "disabled"
+
+# 碰到这些失败原因时账号暂停使用：登录墙说明登录态失效，需要重新登录；其余冷却一段时间后恢复
+DISABLE_REASONS = ("login_wall",)
+COOLDOWN_REASONS = ("rate_limit", "captcha")
+
+
+@dataclass
+class Account:
+    platform: str
+    name: str
+    state_path: str
+    status: str = ACTIVE
+    cooldown_until: float = 0
+    strikes: int = 0
+    uses: int = 0
+    failures: int = 0
+    last_reason: str = None
+
+    def available(self, now):
+        if self.status == COOLDOWN and now >= self.cooldown_until:
+            self.status = ACTIVE
+        return self.status == ACTIVE
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "status": self.status,
+            "cooldownSeconds": max(0, round(self.cooldown_until - time.time())) if self.status == COOLDOWN else 0,
+            "uses": self.uses,
+            "failures": self.failures,
+            "lastReason": self.last_reason,
+        }
+
+
+# 每个平台一组账号：登录后保存 storage state 快照，抓取时在一个普通（非持久化）浏览器里
+# 按快照给每个账号建一个轻量上下文，请求在可用账号间轮换，被限流或掉登录的账号移出轮换
+class AccountPool:
+    def __init__(self, launcher, directory="accounts", pool_size=2, page_setup=None, context_setup=None, cooldown=300,
+                 max_cooldown=3600, throttle=None):
+        self._launcher = launcher
+        self.throttle = throttle
+        self._page_setup = page_setup
+        self._context_setup = context_setup
+        self.directory = directory
+        self.pool_size = pool_size
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.accounts: dict[str, list[Account]] = {}
+        self.playwright = None
+        self.browser: Browser = None
+        self._contexts: dict[tuple, BrowserContext] = {}
+        self._pools: dict[tuple, PagePool] = {}
+        self._next: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._pool_lock = asyncio.Lock()
+
+    def state_path(self, platform, name):
+        return os.path.join(self.directory, platform, f"{name}.json")
+
+    def load(self):
+        self.accounts.clear()
+        if not os.path.isdir(self.directory):
+            return
+        for platform in sorted(os.listdir(self.directory)):
+            platform_dir = os.path.join(self.directory, platform)
+            if not os.path.isdir(platform_dir):
+                continue
+            names = sorted(name[:-5] for name in os.listdir(platform_dir) if name.endswith(".json"))
+            self.accounts[platform] = [Account(platform, name, self.state_path(platform, name)) for name in names]
+        logging.info(f"load accounts: { {platform: len(items) for platform, items in self.accounts.items()} }")
+
+    def has(self, platform):
+        return bool(self.accounts.get(platform))
+
+    def available(self, platform):
+        now = time.time()
+        return any(account.available(now) for account in self.accounts.get(platform, []))
+
+    async def save(self, platform, name, context: BrowserContext):
+        # 登录成功后保存该账号的 cookie 和 localStorage
+        path = self.state_path(platform, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        await context.storage_state(path=path)
+        await self._drop(platform, name)
+        account = self._find(platform, name)
+        if account:
+            account.status, account.strikes, account.last_reason = ACTIVE, 0, None
+        else:
+            self.accounts.setdefault(platform, []).append(Account(platform, name, path))
+        logging.info(f"[{platform}] account [{name}] storage state saved to {path}")
+
+    @contextlib.asynccontextmanager
+    async def login_context(self):
+        # 登录新账号用不带任何登录态的临时上下文，保存下来的 storage state 只属于这个账号，
+        # 也不会换掉持久化用户目录里的登录账号
+        browser = await self._ensure_browser()
+        context = await browser.new_context(viewport=VIEWPORT, locale='en-SG')
+        try:
+            yield context
+        finally:
+            with contextlib.suppress(Exception):
+                await context.close()
+
+    def _find(self, platform, name):
+        return next((account for account in self.accounts.get(platform, []) if account.name == name), None)
+
+    def pick(self, platform):
+        accounts = self.accounts.get(platform) or []
+        now = time.time()
+        start = self._next.get(platform, 0)
+        candidates = [(start + offset) % len(accounts) for offset in range(len(accounts))]
+        candidates = [index for index in candidates if accounts[index].available(now)]
+        if not candidates:
+            return None
+        # 优先选限流许可立即可用的账号，都在等就按轮换顺序排队
+        index = next((index for index in candidates if self._ready(accounts[index])), candidates[0])
+        self._next[platform] = (index + 1) % len(accounts)
+        return accounts[index]
+
+    def _ready(self, account: Account):
+        return not self.throttle or self.throttle.ready(f"{account.platform}:{account.name}")
+
+    def enable(self, platform, name):
+        account = self._find(platform, name)
+        if account:
+            account.status, account.strikes = ACTIVE, 0
+        return account
+
+    def report(self, account: Account, reason):
+        if reason is None:
+            account.strikes = 0
+            return
+        account.failures += 1
+        account.last_reason = reason
+        if reason in DISABLE_REASONS:
+            account.status = DISABLED
+            logging.warning(f"[{account.platform}] account [{account.name}] hit {reason}, removed from rotation")
+        elif reason in COOLDOWN_REASONS:
+            # 连续被限流时冷却时间翻倍
+            account.strikes += 1
+            seconds = min(self.cooldown * 2 ** (account.strikes - 1), self.max_cooldown)
+            account.status = COOLDOWN
+            account.cooldown_until = time.time() + seconds
+            logging.warning(f"[{account.platform}] account [{account.name}] hit {reason}, cool down {seconds}s")
+
+    async def _ensure_browser(self):
+        async with self._lock:
+            if self.browser and self.browser.is_connected():
+                return self.browser
+            await self._close_browser()
+            self.playwright = await async_playwright().start()
+            self.browser = await self._launcher(self.playwright)
+            return self.browser
+
+    async def _pool(self, account: Account):
+        key = (account.platform, account.name)
+        async with self._pool_lock:
+            if key not in self._pools:
+                browser = await self._ensure_browser()
+                context = await browser.new_context(storage_state=account.state_path, viewport=VIEWPORT,
+                                                    locale='en-SG')
+                if self._context_setup:
+                    await self._context_setup(context)
+                self._contexts[key] = context
+                self._pools[key] = PagePool(context, account.platform, self.pool_size, self._page_setup)
+            return self._pools[key]
+
+    async def _drop(self, platform, name):
+        key = (platform, name)
+        pool = self._pools.pop(key, None)
+        context = self._contexts.pop(key, None)
+        if pool:
+            await pool.close()
+        if context:
+            with contextlib.suppress(Exception):
+                await context.close()
+
+    @contextlib.asynccontextmanager
+    async def page(self, platform, throttled=True):
+        account = self.pick(platform)
+        if not account:
+            raise RuntimeError(f"no available {platform} account")
+        if self.browser and not self.browser.is_connected():
+            # 浏览器挂了，旧的上下文全部作废
+            for platform_, name in list(self._pools):
+                await self._drop(platform_, name)
+        pool = await self._pool(account)
+        async with self._slot(account) if throttled else contextlib.nullcontext():
+            page = await pool.acquire()
+            account.uses += 1
+            broken = False
+            try:
+                yield page
+            except Exception as e:
+                broken = True
+                self.report(account, failure_reason(e))
+                raise
+            else:
+                self.report(account, None)
+            finally:
+                await pool.release(page, broken)
+
+    def _slot(self, account: Account):
+        if not self.throttle:
+            return contextlib.nullcontext()
+        return self.throttle.slot(f"{account.platform}:{account.name}")
+
+    async def _close_browser(self):
+        for platform, name in list(self._pools):
+            await self._drop(platform, name)
+        if self.browser:
+            with contextlib.suppress(Exception):
+                await self.browser.close()
+        if self.playwright:
+            with contextlib.suppress(Exception):
+                await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
+
+    async def stop(self):
+        async with self._lock:
+            await self._close_browser()
+
+    def stats(self):
+        return {platform: [account.to_dict() for account in items] for platform, items in self.accounts.items()}
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import logging
+import re
+from datetime import datetime, timezone
+
+from playwright.async_api import Page, Response
+
+# 页面渲染之前，帖子数据已经通过 XHR / GraphQL 或者 HTML 里的 hydration JSON 下发，
+# 直接从这些响应里组装结果，拿不到时再回退到 DOM 解析
+
+TIKTOK_REHYDRATION_RE = re.compile(
+    r'<script[^>]+id="__UNIVERSAL_DATA_FOR_REHYDRATION__"[^>]*>(.*?)</script>', re.S)
+INSTAGRAM_SJS_RE = re.compile(r'<script type="application/json"[^>]*data-sjs[^>]*>(.*?)</script>', re.S)
+HASHTAG_RE = re.compile(r"#(\w+)", re.U)
+
+
+def find_value(obj, predicate):
+    # 深度优先找第一个满足条件的 dict，接口结构经常调整，不依赖固定路径
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if predicate(current):
+                return current
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+    return None
+
+
+def find_all(obj, predicate):
+    # 同 find_value，返回全部满足条件的 dict，命中的 dict 不再往下找
+    found = []
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if predicate(current):
+                found.append(current)
+                continue
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+    return found
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def x_tweet_to_result(tweet, link):
+    if tweet.get("__typename") == "TweetWithVisibilityResults":
+        tweet = tweet.get("tweet", {})
+    legacy = tweet.get("legacy") or {}
+    user = ((tweet.get("core") or {}).get("user_results") or {}).get("result") or {}
+    user_core = user.get("core") or {}
+    user_legacy = user.get("legacy") or {}
+    screen_name = user_core.get("screen_name") or user_legacy.get("screen_name") or ""
+    profile_url = f"https://x.com/{screen_name}"
+    push_time = legacy.get("created_at")
+    if push_time:
+        push_time = datetime.strptime(push_time, "%a %b %d %H:%M:%S %z %Y").strftime("%Y-%m-%d %H:%M:%S")
+    note = (((tweet.get("note_tweet") or {}).get("note_tweet_results") or {}).get("result") or {}).get("text")
+    hashtags = (legacy.get("entities") or {}).get("hashtags") or []
+    return {
+        "username": user_core.get("name") or user_legacy.get("name"),
+        "profileId": f"@{screen_name}",
+        "profileUrl": profile_url,
+        "postLink": link,
+        "postId": tweet.get("rest_id") or legacy.get("id_str"),
+        "tags": list({f"#{tag['text']}" for tag in hashtags if tag.get("text")}),
+        "profileImage": f"{profile_url}/photo",
+        "pushTime": push_time,
+        "content": note or legacy.get("full_text") or "",
+        "retweets": to_int(legacy.get("retweet_count")),
+        "likes": to_int(legacy.get("favorite_count")),
+        "lovers": to_int(legacy.get("bookmark_count")),
+        "comments": to_int(legacy.get("reply_count")),
+        "views": to_int((tweet.get("views") or {}).get("count")),
+    }
+
+
+def x_from_graphql(body, link):
+    match = re.search(r"/status/(\d+)", link)
+    if not match:
+        return None
+    post_id = match.group(1)
+    tweet = find_value(json.loads(body), lambda d: d.get("rest_id") == post_id and "legacy" in d)
+    if not tweet:
+        return None
+    return x_tweet_to_result(tweet, link)
+
+
+def tiktok_item_to_result(item, link):
+    author = item.get("author") or {}
+    stats = item.get("stats") or {}
+    username = author.get("uniqueId") or ""
+    create_time = to_int(item.get("createTime"))
+    tags = [f"#{extra['hashtagName']}" for extra in item.get("textExtra") or [] if extra.get("hashtagName")]
+    return {
+        "username": username,
+        "profileId": username,
+        "profileUrl": f"https://www.tiktok.com/@{username}",
+        "postLink": link,
+        "postId": item.get("id") or "",
+        "tags": tags,
+        "profileImage": author.get("avatarThumb") or "",
+        "pushTime": datetime.fromtimestamp(create_time).strftime("%Y-%m-%d %H:%M:%S") if create_time else None,
+        "content": item.get("desc") or "",
+        # 与 DOM 解析保持一致：share-count 对应 lovers，undefined-count（收藏）对应 retweets
+        "retweets": to_int(stats.get("collectCount")),
+        "likes": to_int(stats.get("diggCount")),
+        "lovers": to_int(stats.get("shareCount")),
+        "comments": to_int(stats.get("commentCount")),
+    }
+
+
+def tiktok_from_html(html, link):
+    match = TIKTOK_REHYDRATION_RE.search(html)
+    if not match:
+        return None
+    data = json.loads(match.group(1))
+    detail = (data.get("__DEFAULT_SCOPE__") or {}).get("webapp.video-detail") or {}
+    item = (detail.get("itemInfo") or {}).get("itemStruct")
+    if not item or not item.get("id"):
+        return None
+    return tiktok_item_to_result(item, link)
+
+
+def instagram_media_to_result(media, link):
+    user = media.get("user") or media.get("owner") or {}
+    username = user.get("username") or ""
+    caption = media.get("caption")
+    edges = (media.get("edge_media_to_caption") or {}).get("edges") or []
+    if isinstance(caption, dict):
+        content = caption.get("text") or ""
+    else:
+        content = edges[0]["node"]["text"] if edges else ""
+    taken_at = to_int(media.get("taken_at") or media.get("taken_at_timestamp"))
+    likes = media.get("like_count")
+    if likes is None:
+        likes = (media.get("edge_media_preview_like") or {}).get("count")
+    comments = media.get("comment_count")
+    if comments is None:
+        comments = (media.get("edge_media_to_comment") or {}).get("count")
+    return {
+        "username": username,
+        "profileId": username,
+        "profileUrl": f"https://www.instagram.com/{username}/" if username else "",
+        "postLink": link,
+        "postId": media.get("code") or media.get("shortcode"),
+        "tags": list({f"#{tag}" for tag in HASHTAG_RE.findall(content)}),
+        "profileImage": user.get("profile_pic_url"),
+        "pushTime": datetime.fromtimestamp(taken_at, timezone.utc).strftime(
+            "%Y-%m-%d %H:%M:%S") if taken_at else None,
+        "content": content,
+        "retweets": 0,
+        "likes": to_int(likes),
+        "comments": to_int(comments),
+    }
+
+
+def instagram_from_json(data, link):
+    match = re.search(r"/(?:p|reel)/([^/?]+)", link)
+    if not match:
+        return None
+    code = match.group(1)
+    media = find_value(data, lambda d: (d.get("code") == code or d.get("shortcode") == code) and (
+            "taken_at" in d or "taken_at_timestamp" in d))
+    if not media:
+        return None
+    return instagram_media_to_result(media, link)
+
+
+def instagram_from_html(html, link):
+    for match in INSTAGRAM_SJS_RE.finditer(html):
+        blob = match.group(1)
+        if "taken_at" not in blob:
+            continue
+        result = instagram_from_json(json.loads(blob), link)
+        if result:
+            return result
+    return None
+
+
+def is_document(response: Response):
+    return response.request.resource_type == "document"
+
+
+def is_x_tweet_api(response: Response):
+    return "/graphql/" in response.url and ("TweetDetail" in response.url or "TweetResultByRestId" in response.url)
+
+
+def is_instagram_api(response: Response):
+    return is_document(response) or "/graphql/query" in response.url or "/api/v1/media/" in response.url
+
+
+def parse_x(response: Response, body, link):
+    return x_from_graphql(body, link)
+
+
+def parse_tiktok(response: Response, body, link):
+    return tiktok_from_html(body, link)
+
+
+def parse_instagram(response: Response, body, link):
+    if is_document(response):
+        return instagram_from_html(body, link)
+    return instagram_from_json(json.loads(body), link)
+
+
+# 平台 -> (响应筛选, 响应体解析)
+API_EXTRACTORS = {
+    "twitter": (is_x_tweet_api, parse_x),
+    "tiktok": (is_document, parse_tiktok),
+    "instagram": (is_instagram_api, parse_instagram),
+}
+
+
+class ApiCapture:
+    def __init__(self, page: Page, platform, link):
+        self.page = page
+        self.platform = platform
+        self.link = link
+        self.future = asyncio.get_running_loop().create_future()
+        self._matcher, self._parser = API_EXTRACTORS[platform]
+        page.on("response", self._on_response)
+
+    async def _on_response(self, response: Response):
+        if self.future.done() or not self._matcher(response):
+            return
+        try:
+            result = self._parser(response, await response.text(), self.link)
+        except Exception as e:
+            logging.debug(f"[{self.platform}] api payload parse failed: {e}")
+            return
+        if result and not self.future.done():
+            self.future.set_result(result)
+
+    async def race(self, dom_ready):
+        # 接口数据和 DOM 就绪谁先到用谁：返回接口结果，DOM 先就绪时返回 None 走 DOM 解析
+        dom_task = asyncio.ensure_future(dom_ready)
+        try:
+            await asyncio.wait([self.future, dom_task], return_when=asyncio.FIRST_COMPLETED)
+            if self.future.done():
+                return self.future.result()
+            dom_task.result()
+            return None
+        finally:
+            if not dom_task.done():
+                dom_task.cancel()
+            elif not dom_task.cancelled():
+                # 取走异常，避免 "exception was never retrieved"
+                dom_task.exception()
+
+    def close(self):
+        self.page.remove_listener("response", self._on_response)
+        if not self.future.done():
+            self.future.cancel()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+# 快速通道基准：起本地替身服务返回录制的帖子页面，用 FastPath 逐个解析，
+# 和录制时浏览器解析出的结果逐字段对比，再统计各并发下的延迟和吞吐
+#
+#   python bench/bench_fast_path.py --runs 50 --concurrency 1,8,32
+#   python bench/bench_fast_path.py --platform tiktok --delay 0.2
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fast_path import FAST_PATH_EXTRACTORS, FastPath
+from fixture_server import FIXTURES_DIR, FixtureServer, load_pages
+from replay import load_fixtures
+
+
+def compare(expected, actual):
+    # 只比两边都有的字段，tags 不计顺序
+    diffs = []
+    for key in sorted(set(expected) & set(actual)):
+        left, right = expected[key], actual[key]
+        if key == "tags":
+            left, right = sorted(left or []), sorted(right or [])
+        if left != right:
+            diffs.append(f"{key}: {left!r} != {right!r}")
+    return diffs
+
+
+async def check(fast_path, fixtures):
+    hits = 0
+    for fixture in fixtures:
+        data = await fast_path.fetch(fixture.platform, fixture.link)
+        if not data:
+            print(f"  miss  {fixture.name}")
+            continue
+        hits += 1
+        expected = (fixture.expected or {}).get("data")
+        diffs = compare(expected, data) if expected else ["no recorded result"]
+        print(f"  hit   {fixture.name}" + "".join(f"\n          {diff}" for diff in diffs))
+    print(f"fast path hits {hits}/{len(fixtures)}")
+
+
+async def measure(fast_path, fixtures, runs, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(fixture):
+        async with semaphore:
+            started = time.perf_counter()
+            await fast_path.fetch(fixture.platform, fixture.link)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(fixtures[i % len(fixtures)]) for i in range(runs)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"concurrency {concurrency:>3}: p50 {statistics.median(latencies):7.1f} ms  p95 {p95:7.1f} ms  "
+          f"{runs / elapsed:7.1f} posts/s")
+
+
+async def run(args):
+    fixtures = [fixture for fixture in load_fixtures(args.fixtures, args.platform)
+                if fixture.platform in FAST_PATH_EXTRACTORS]
+    pages = load_pages(fixtures)
+    if not pages:
+        print(f"no {'/'.join(FAST_PATH_EXTRACTORS)} fixtures in {args.fixtures}, record some with bench_replay.py")
+        return
+    server = FixtureServer(pages, delay=args.delay).start()
+    fast_path = FastPath(FAST_PATH_EXTRACTORS, origin=server.origin, max_connections=max(args.concurrency))
+    try:
+        await check(fast_path, fixtures)
+        for concurrency in args.concurrency:
+            await measure(fast_path, fixtures, args.runs, concurrency)
+        print(f"counters: {fast_path.stats()}")
+    finally:
+        await fast_path.close()
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--platform", action="append")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--concurrency", type=lambda value: [int(item) for item in value.split(',')], default=[1, 8])
+    parser.add_argument("--delay", type=float, default=0, help="Seconds the fixture server adds to every response.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
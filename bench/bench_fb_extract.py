@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+# 对比 fb_parse 旧的逐字段 evaluate 与新的单次 evaluate：CDP 往返次数和耗时
+#
+#   python bench/bench_fb_extract.py saved_post.html --url https://www.facebook.com/xxx/posts/123 --runs 20
+#
+# html 用 page.content() 从真实页面保存；--url 决定 page.url，包含 /reel/ 时走 Reel 页面布局
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright, ElementHandle, JSHandle
+
+from extract_scripts import FB_EXTRACT_JS
+
+
+# 包一层 page / handle，每次 await 调用计一次往返，返回的 handle 继续包装
+class RoundTripCounter:
+    def __init__(self, target, counter):
+        self._target = target
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            self._counter[0] += 1
+            result = await attr(*args, **kwargs)
+            if isinstance(result, (ElementHandle, JSHandle)):
+                return RoundTripCounter(result, self._counter)
+            if isinstance(result, list):
+                return [RoundTripCounter(item, self._counter) if isinstance(item, JSHandle) else item for item in result]
+            return result
+
+        return call
+
+
+# 改造前 fb_parse 的取数路径，只保留浏览器交互部分
+async def legacy_extract(page, reel_page):
+    if reel_page:
+        post = await page.query_selector('div[data-pagelet="Reels"]')
+        if post:
+            post = await post.evaluate_handle("(element) => element.parentElement")
+    else:
+        post = await page.query_selector('xpath=//div[@aria-posinset="1"]')
+        if not post:
+            post = await page.query_selector('xpath=//div[@aria-posinset="2"]')
+    if not post:
+        return None
+    record = {}
+    is_reels = await post.evaluate("(element) => element.querySelector('[data-pagelet=\"Reels\"]') !== null")
+    if is_reels:
+        record["avatarUrl"] = await post.evaluate("""(element) => {
+            const image = element.querySelector('svg[aria-label="头像"][data-visualcompletion="ignore-dynamic"] image');
+            return image ? image.getAttribute('xlink:href') : null;
+        }""")
+        if reel_page:
+            record["username"] = await post.evaluate("""(element) => {
+                const elements = element.querySelectorAll('a[aria-label="查看所有者个人主页"]');
+                return elements.length > 1 ? elements[1].textContent.trim() : '';
+            }""")
+        else:
+            record["username"] = await post.evaluate("""(element) => {
+                const span = Array.from(element.querySelectorAll('span')).find(span => span.textContent.includes('短视频') || span.textContent.includes('Reels'));
+                const object = span ? span.querySelector('object[type="nested/pressable"]') : null;
+                const a = object ? object.querySelector('a') : null;
+                return a ? a.textContent.trim() : '';
+            }""")
+        record["postId"] = await post.evaluate("""(element) => {
+            const video = element.querySelector('div[data-video-id]');
+            return video ? video.getAttribute('data-video-id') : null;
+        }""")
+        record["profileHref"] = await post.evaluate("""(element) => {
+            const link = element.querySelector('a[aria-label="查看所有者个人主页"]');
+            return link ? link.getAttribute('href') : null;
+        }""")
+        timestamp = await page.query_selector(
+            'xpath=//span[contains(text(), "分钟") or contains(text(), "小时") or contains(text(), "天") or contains(text(), "月") or contains(text(), "年")]')
+        record["timestamp"] = await timestamp.text_content() if timestamp else None
+        record["content"] = await post.evaluate("""(element) => {
+            const reels = element.querySelector('div[data-pagelet="Reels"]');
+            const next = reels ? reels.nextElementSibling : null;
+            return next ? next.textContent.trim() : '';
+        }""")
+        record["hashtags"] = await post.evaluate("""(element) => {
+            const results = [];
+            element.querySelectorAll('a[href*="hashtag"]').forEach(a => {
+                if (a.textContent.startsWith('#')) results.push(a.textContent.trim());
+            });
+            return [...new Set(results)];
+        }""")
+    else:
+        record["profileHref"] = await post.evaluate("""(element) => {
+            const link = element.querySelector('[data-ad-rendering-role="profile_name"] a');
+            return link ? link.href : null;
+        }""")
+        record["username"] = await post.evaluate("""(element) => {
+            const name = element.querySelector('[data-ad-rendering-role="profile_name"] span a span');
+            return name ? name.innerText : null;
+        }""")
+        record["avatarUrl"] = await post.evaluate("""(element) => {
+            const image = element.querySelector('svg[data-visualcompletion="ignore-dynamic"] image');
+            return image ? image.getAttribute('xlink:href') : null;
+        }""")
+        record["postLink"] = await post.evaluate("""(element) => {
+            const a = element.querySelector('a[role="link"][href*="/posts/"]');
+            return a ? a.href : null;
+        }""")
+        timestamp = await post.query_selector_all(
+            'xpath=//a[contains(@aria-label, "小时") or contains(@aria-label, "分钟") or contains(@aria-label, "天") or contains(@aria-label, "月") or contains(@aria-label, "年")]')
+        record["timestamp"] = await timestamp[0].get_attribute('aria-label') if timestamp else None
+        record["content"] = await post.evaluate("""(element) => {
+            const content = element.querySelector('div[data-ad-rendering-role="story_message"]');
+            return content ? content.innerText : null;
+        }""")
+        record["hashtags"] = await post.evaluate("""(element) => {
+            const content = element.querySelector('div[data-ad-rendering-role="story_message"]');
+            if (!content) return [];
+            return Array.from(content.querySelectorAll('a')).filter(a => a.href && a.href.includes('hashtag')).map(a => a.innerText);
+        }""")
+    if reel_page:
+        divs = await page.query_selector_all(
+            'xpath=//div[@class="x9f619 x1n2onr6 x1ja2u2z x78zum5 xdt5ytf x2lah0s x193iq5w x1xmf6yo x1e56ztr xzboxd6 x14l7nz5"][position() >= 3 and position() <= 5]')
+        for div in divs:
+            for label, key in (("赞", "likes"), ("评论", "comments"), ("分享", "shares")):
+                if await div.query_selector(f'div[aria-label="{label}"]'):
+                    record[key] = await div.text_content()
+    else:
+        record["likes"] = await post.evaluate("""(element) => {
+            for (let button of element.querySelectorAll('div[role="button"]')) {
+                if (button.textContent.includes('所有心情：')) {
+                    const span = button.querySelector('span span');
+                    if (span && span.textContent.trim() !== '') return span.textContent.trim();
+                }
+            }
+            const target = element.querySelector('span[aria-hidden="true"] span.x1e558r4');
+            return target ? target.textContent.trim() : 0;
+        }""")
+        for key, keywords in (("comments", "['条评论', 'comments']"), ("shares", "['次分享', 'share']")):
+            record[key] = await post.evaluate("""(element) => {
+                for (let span of element.querySelectorAll('span')) {
+                    for (let keyword of %s) {
+                        const match = span.textContent.match(new RegExp('(.*?)' + keyword));
+                        if (match) return match[1];
+                    }
+                }
+                return 0;
+            }""" % keywords)
+    return record
+
+
+async def single_extract(page, reel_page):
+    return await page.evaluate(FB_EXTRACT_JS, reel_page)
+
+
+async def measure(page, extract, reel_page, runs):
+    counter = [0]
+    wrapped = RoundTripCounter(page, counter)
+    timings = []
+    record = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        record = await extract(wrapped, reel_page)
+        timings.append((time.perf_counter() - start) * 1000)
+    return record, counter[0] // runs, timings
+
+
+async def run(args):
+    with open(args.html, encoding="utf-8") as f:
+        html = f.read()
+    reel_page = '/reel/' in args.url
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(executable_path=args.exe, headless=True, slow_mo=args.slow_mo)
+        page = await browser.new_page()
+        await page.route("**/*", lambda route: route.fulfill(body=html, content_type="text/html")
+                         if route.request.url == args.url else route.abort())
+        await page.goto(args.url)
+
+        for name, extract in (("legacy", legacy_extract), ("single", single_extract)):
+            record, round_trips, timings = await measure(page, extract, reel_page, args.runs)
+            print(f"{name:<8} round trips {round_trips:>3}  "
+                  f"median {statistics.median(timings):8.2f} ms  "
+                  f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:8.2f} ms")
+            if args.verbose:
+                print(f"         {record}")
+        await browser.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(usage="bench_fb_extract.py html --url url [option] ...")
+    parser.add_argument("html", help="Saved facebook page html.")
+    parser.add_argument("--url", required=True, help="Url the html was saved from.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--slow-mo", type=int, default=10, help="Same slow_mo as the scraper browser.")
+    parser.add_argument("--exe", type=str, help="Chrome exe Path.")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(run(parse_args()))
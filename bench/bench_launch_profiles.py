@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# 对运行中的 scraper 服务，用每种启动配置跑同一批链接，按平台统计成功率和耗时
+#
+#   python bench/bench_launch_profiles.py links.jsonl --server http://127.0.0.1:8000 --concurrency 4
+#
+# links.jsonl 每行一个 {"link": ..., "type": ...}；请求带 "profile" 和 "cache": false，
+# 每种配置先用第一条链接预热一次（包含浏览器启动），预热不计入统计
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from launch_profiles import LAUNCH_PROFILES
+
+
+def scrape(server, item, profile, timeout):
+    body = json.dumps({**item, "profile": profile, "cache": False}).encode("utf-8")
+    request = urllib.request.Request(f"{server}/scrape", data=body, method="GET",
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            result = json.loads(response.read())
+        ok = result.get("code") == 200
+    except Exception:
+        ok = False
+    return item["type"], ok, (time.perf_counter() - start) * 1000
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run_profile(args, items, profile):
+    scrape(args.server, items[0], profile, args.timeout)
+    stats = defaultdict(lambda: {"ok": 0, "total": 0, "latency": []})
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        futures = [executor.submit(scrape, args.server, item, profile, args.timeout)
+                   for _ in range(args.rounds) for item in items]
+        for future in futures:
+            platform, ok, latency = future.result()
+            stats[platform]["total"] += 1
+            stats[platform]["ok"] += ok
+            if ok:
+                stats[platform]["latency"].append(latency)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="bench_launch_profiles.py links.jsonl [option] ...")
+    parser.add_argument("links", help="Json lines of {link, type}.")
+    parser.add_argument("--server", default="http://127.0.0.1:8000")
+    parser.add_argument("--profiles", default=",".join(LAUNCH_PROFILES), help="Comma separated launch profiles.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--timeout", type=int, default=60)
+    args = parser.parse_args()
+
+    with open(args.links, encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+
+    print(f"{'profile':<16}{'platform':<11}{'success':>9}{'median ms':>11}{'p95 ms':>10}")
+    for profile in args.profiles.split(','):
+        for platform, stat in sorted(run_profile(args, items, profile).items()):
+            latency = stat["latency"]
+            print(f"{profile:<16}{platform:<11}{stat['ok'] / stat['total']:>8.0%} "
+                  f"{statistics.median(latency) if latency else 0:>10.0f}"
+                  f"{percentile(latency, 0.95) if latency else 0:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
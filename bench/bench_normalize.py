@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+
+# normalize 模块与改造前 main.py 里各个归一化函数的对照：
+#   1. 等价性：旧函数能处理的输入，新旧结果必须一致（已知修正的差异单独列出）
+#   2. 性质检查：随机生成数量、日期，检查新函数的结果范围和格式
+#   3. 微基准：单条调用和批量调用的耗时
+#
+#   python bench/bench_normalize.py --samples 20000 --number 20
+
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import normalize
+
+NOW = datetime(2026, 10, 17, 15, 30, 0)
+
+
+# ---- 改造前的实现，datetime.now() 换成固定的 NOW 以便对比 ----
+
+def legacy_parse_number(number_text):
+    if isinstance(number_text, (int, float)):
+        return number_text
+
+    number_text = re.sub(r"(likes?|次赞)", "", number_text.strip(), flags=re.IGNORECASE)
+    if not number_text or not number_text.strip():
+        return 0
+
+    number_text = number_text.replace(",", "").replace(" ", "").strip()
+
+    match = re.match(r"(\d+(\.\d+)?)\s?万", number_text)
+    if match:
+        return int(float(match.group(1)) * 10000)
+
+    match_k = re.match(r"(\d+(\.\d+)?)\s?K", number_text, re.IGNORECASE)
+    if match_k:
+        return int(float(match_k.group(1)) * 1000)
+
+    match_m = re.match(r"(\d+(\.\d+)?)\s?M", number_text, re.IGNORECASE)
+    if match_m:
+        return int(float(match_m.group(1)) * 1000000)
+
+    try:
+        return int(number_text)
+    except ValueError:
+        return 0
+
+
+def legacy_adjust_tiktok_date(push_time):
+    current_year = NOW.year
+    if re.match(r"\d{4}-\d{2}-\d{2}", push_time):
+        return datetime.strptime(push_time, "%Y-%m-%d").strftime("%Y-%m-%d 00:00:00")
+    elif re.match(r"\d{1,2}-\d{1,2}", push_time):
+        return datetime.strptime(f"{current_year}-{push_time}", "%Y-%m-%d").strftime("%Y-%m-%d 00:00:00")
+    elif re.match(r"\d{1,2}d ago", push_time):
+        days_ago = int(re.match(r"(\d{1,2})d ago", push_time).group(1))
+        return (NOW - timedelta(days=days_ago)).strftime("%Y-%m-%d 00:00:00")
+    elif re.match(r"\d{1,2}h ago", push_time):
+        hours_ago = int(re.match(r"(\d{1,2})h ago", push_time).group(1))
+        return (NOW - timedelta(hours=hours_ago)).strftime("%Y-%m-%d %H:%M:%S")
+    elif re.match(r"\d{1,2}w ago", push_time):
+        weeks_ago = int(re.match(r"(\d{1,2})w ago", push_time).group(1))
+        return (NOW - timedelta(weeks=weeks_ago)).strftime("%Y-%m-%d 00:00:00")
+    return push_time
+
+
+def legacy_parse_relative_time(relative_str):
+    now = NOW
+    time_units = {'分钟': 'minutes', '小时': 'hours', '天': 'days'}
+    match = re.match(r'(\d+)(分钟|小时|天)', relative_str)
+    if match:
+        value, unit = match.groups()
+        value = int(value)
+        if unit in time_units:
+            delta = timedelta(**{time_units[unit]: value})
+            return (now - delta).strftime('%Y-%m-%d %H:%M:%S')
+    match = re.match(r'(\d{4})年(\d{1,2})月(\d{1,2})日(\d{1,2}):(\d{2})', relative_str)
+    if match:
+        year, month, day, hour, minute = map(int, match.groups())
+        try:
+            return datetime(year, month, day, hour, minute).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    match = re.match(r'(\d{1,2})月(\d{1,2})日', relative_str)
+    if match:
+        month, day = map(int, match.groups())
+        year = now.year
+        if now.month < month or (now.month == month and now.day < day):
+            year -= 1
+        try:
+            return datetime(year, month, day, 0, 0).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    return now.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def legacy_extract_facebook_url(profile_url):
+    if '/user/' in profile_url:
+        if profile_url.startswith("/groups/"):
+            return f"https://www.facebook.com{profile_url.split('/?')[0]}"
+        return profile_url.split('/?')[0]
+    if profile_url.startswith("/profile.php?id="):
+        if profile_url.startswith("/profile.php?id="):
+            return f"https://www.facebook.com{profile_url.split('&')[0]}"
+    if profile_url.startswith("https://l.facebook.com/l.php?u"):
+        return profile_url
+    if profile_url.startswith("https://www.facebook.com/profile.php?id="):
+        match = re.match(r'(https://www.facebook.com/profile.php\?id=\d+)', profile_url)
+        if match:
+            return match.group(1)
+    match = re.match(r"^https://www\.facebook\.com/([A-Za-z0-9_.-]+)\?__cft__\[\d+\]=.*", profile_url)
+    if match:
+        parsed_url = urlparse(profile_url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
+    return profile_url
+
+
+def legacy_extract_facebook_id(profile_url):
+    if profile_url.startswith("https://www.facebook.com/profile.php?id="):
+        match = re.search(r'id=(\d+)', profile_url)
+        if match:
+            return match.group(1)
+    if '/user/' in profile_url:
+        return profile_url.split('/user/')[1]
+    match = re.match(r"^https://www\.facebook\.com/([A-Za-z0-9_.-]+)$", profile_url)
+    if match:
+        return match.group(1)
+    return profile_url
+
+
+def legacy_instagram_extract_post_id(url):
+    match = re.search(r"/(?:p|reel)/([^/]+)/", url)
+    if match:
+        return match.group(1)
+    return None
+
+
+def legacy_x_counts(count_element):
+    counts = {"comments": 0, "retweets": 0, "likes": 0, "lovers": 0, "views": 0}
+    for item in count_element.split(','):
+        match = re.search(r'(\d+)', item)
+        if match:
+            value = match.group(1)
+            if '回复' in item or 'replies' in item:
+                counts["comments"] = value
+            elif '转帖' in item or 'reposts' in item:
+                counts["retweets"] = value
+            elif '喜欢' in item or 'likes' in item:
+                counts["likes"] = value
+            elif '书签' in item or 'bookmarks' in item:
+                counts["lovers"] = value
+            elif '观看' in item or 'views' in item:
+                counts["views"] = value
+    return counts
+
+
+# ---- 输入生成 ----
+
+def random_count(rng):
+    number = str(rng.randint(0, 999)) if rng.random() < 0.5 else f"{rng.randint(0, 999)}.{rng.randint(0, 9)}"
+    unit = rng.choice(["", "", "万", "K", "k", "M", "m"])
+    if not unit and "." in number:
+        number = number.split(".")[0]
+    if not unit and rng.random() < 0.3:
+        number = f"{int(number):,}"
+    return f"{number}{rng.choice(['', ' '])}{unit}{rng.choice(['', ' likes', ' Likes', ' 次赞', 'like'])}"
+
+
+def random_tiktok_date(rng):
+    kind = rng.randrange(4)
+    if kind == 0:
+        day = NOW - timedelta(days=rng.randint(0, 3000))
+        return day.strftime("%Y-%m-%d")
+    if kind == 1:
+        # 旧实现不做跨年回退，只取今天及以前的日期做对比
+        day = NOW - timedelta(days=rng.randint(0, NOW.timetuple().tm_yday - 1))
+        return f"{day.month}-{day.day}"
+    return f"{rng.randint(1, 99)}{rng.choice(['d', 'h', 'w'])} ago"
+
+
+def random_fb_time(rng):
+    kind = rng.randrange(3)
+    if kind == 0:
+        return f"{rng.randint(1, 999)}{rng.choice(['分钟', '小时', '天'])}"
+    day = NOW - timedelta(days=rng.randint(0, 3000), minutes=rng.randint(0, 1440))
+    if kind == 1:
+        return f"{day.year}年{day.month}月{day.day}日{day.hour}:{day.minute:02d}"
+    return f"{day.month}月{day.day}日"
+
+
+def random_fb_url(rng):
+    name = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789._-") for _ in range(rng.randint(3, 15)))
+    number = rng.randint(10 ** 8, 10 ** 15)
+    return rng.choice([
+        f"https://www.facebook.com/{name}?__cft__[0]=AZ{number}&__tn__=-]C",
+        f"https://www.facebook.com/{name}",
+        f"/profile.php?id={number}&__cft__[0]=x",
+        f"https://www.facebook.com/profile.php?id={number}&__cft__[0]=x",
+        f"/groups/{number}/user/{number}/?__cft__[0]=x",
+        f"https://www.facebook.com/groups/{number}/user/{number}/?__cft__[0]=x",
+        f"https://l.facebook.com/l.php?u=https%3A%2F%2F{name}",
+    ])
+
+
+def random_x_label(rng):
+    parts = [(rng.randint(0, 999), word) for word in ["replies", "reposts", "likes", "bookmarks", "views"]]
+    if rng.random() < 0.5:
+        parts = [(number, zh) for (number, _), zh in zip(parts, ["回复", "次转帖", "喜欢", "书签", "次观看"])]
+        return ", ".join(f"{number} {word}" for number, word in parts)
+    return ", ".join(f"{number} {word}" for number, word in parts)
+
+
+# ---- 检查 ----
+
+def check_equivalence(name, legacy, current, inputs, allowed=None):
+    mismatches = []
+    for value in inputs:
+        old, new = legacy(value), current(value)
+        if old != new and not (allowed and allowed(value, old, new)):
+            mismatches.append((value, old, new))
+    print(f"{name:<28} {len(inputs):>6} inputs, {len(mismatches)} mismatches")
+    for value, old, new in mismatches[:5]:
+        print(f"    {value!r}: legacy {old!r}, new {new!r}")
+    return not mismatches
+
+
+def float_truncation(value, old, new):
+    # 旧实现 int(2.3 * 10000) 得到 22999，新实现四舍五入
+    return isinstance(old, int) and isinstance(new, int) and abs(old - new) <= 1
+
+
+def check_properties(rng, samples):
+    ok = True
+    for _ in range(samples):
+        number = rng.randint(0, 10 ** 9)
+        for text, expected in [(f"{number:,}", number), (f"{number} views", number),
+                               (f"{number / 1000:.1f}K", round(number / 1000, 1) * 1000),
+                               (f"{number / 10 ** 9:.2f}B", round(number / 10 ** 9, 2) * 10 ** 9)]:
+            result = normalize.parse_number(text)
+            if not isinstance(result, int) or abs(result - expected) > 1:
+                print(f"    parse_number({text!r}) = {result!r}, expected {expected}")
+                ok = False
+    for _ in range(samples):
+        delta = timedelta(minutes=rng.randint(0, 60 * 24 * 400))
+        at = NOW - delta
+        for text in [f"{delta.days} days ago" if delta.days else f"{delta.seconds // 3600} hours ago",
+                     at.strftime("%b %d, %Y"), at.strftime("%d %B %Y"), at.strftime("%Y-%m-%d %H:%M:%S")]:
+            result = normalize.parse_date(text, NOW)
+            if not result or not NOW - timedelta(days=401) <= datetime.strptime(result, "%Y-%m-%d %H:%M:%S") <= NOW:
+                print(f"    parse_date({text!r}) = {result!r} out of range")
+                ok = False
+        # 没有年份的日期绝不会晚于当前时间
+        result = normalize.parse_date(at.strftime("%b %d"), NOW)
+        if datetime.strptime(result, "%Y-%m-%d %H:%M:%S") > NOW:
+            print(f"    parse_date({at.strftime('%b %d')!r}) = {result!r} is in the future")
+            ok = False
+    for _ in range(samples):
+        # 中文界面的转帖写作"次转贴"，和计数栏选择器里匹配的词一致
+        values = [rng.randint(0, 10 ** 6) for _ in range(5)]
+        label = "、".join(f"{value} {word}" for value, word in zip(values, ["回复", "次转贴", "喜欢", "书签", "次观看"]))
+        expected = dict(zip(["comments", "retweets", "likes", "lovers", "views"], values))
+        result = normalize.parse_count_label(label)
+        if result != expected:
+            print(f"    parse_count_label({label!r}) = {result!r}, expected {expected}")
+            ok = False
+    print(f"{'properties':<28} {samples:>6} samples, {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def bench(name, fn, inputs, number, batch=False):
+    run = (lambda: fn(inputs)) if batch else (lambda: [fn(value) for value in inputs])
+    per_item = timeit.timeit(run, number=number) / number / len(inputs)
+    print(f"{name:<40} {per_item * 1e6:8.3f}us/item")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    counts = [random_count(rng) for _ in range(args.samples)]
+    tiktok_dates = [random_tiktok_date(rng) for _ in range(args.samples)]
+    fb_times = [random_fb_time(rng) for _ in range(args.samples)]
+    fb_urls = [random_fb_url(rng) for _ in range(args.samples)]
+    x_labels = [random_x_label(rng) for _ in range(args.samples)]
+    ig_links = [f"https://www.instagram.com/{rng.choice(['p', 'reel'])}/{rng.randint(1, 10 ** 9)}/" for _ in range(1000)]
+
+    results = [
+        check_equivalence("parse_number", legacy_parse_number, normalize.parse_number, counts, float_truncation),
+        check_equivalence("adjust_tiktok_date", legacy_adjust_tiktok_date,
+                          lambda value: normalize.adjust_tiktok_date(value, NOW), tiktok_dates),
+        check_equivalence("parse_relative_time", legacy_parse_relative_time,
+                          lambda value: normalize.parse_relative_time(value, NOW), fb_times),
+        check_equivalence("extract_facebook_url", legacy_extract_facebook_url, normalize.extract_facebook_url, fb_urls),
+        check_equivalence("extract_facebook_id", legacy_extract_facebook_id, normalize.extract_facebook_id,
+                          [normalize.extract_facebook_url(url) for url in fb_urls]),
+        check_equivalence("instagram_extract_post_id", legacy_instagram_extract_post_id,
+                          normalize.instagram_extract_post_id, ig_links),
+        # 旧实现把数量保留为字符串，新实现转成整数
+        check_equivalence("x count label", lambda value: {k: int(v) for k, v in legacy_x_counts(value).items()},
+                          normalize.parse_count_label, x_labels),
+        check_properties(rng, min(args.samples, 2000)),
+    ]
+
+    print()
+    bench("legacy parse_number", legacy_parse_number, counts, args.number)
+    bench("normalize.parse_number", normalize.parse_number, counts, args.number)
+    bench("normalize.parse_numbers (batch)", normalize.parse_numbers, counts, args.number, batch=True)
+    bench("legacy adjust_tiktok_date", legacy_adjust_tiktok_date, tiktok_dates, args.number)
+    bench("normalize.adjust_tiktok_date", normalize.adjust_tiktok_date, tiktok_dates, args.number)
+    bench("legacy parse_relative_time", legacy_parse_relative_time, fb_times, args.number)
+    bench("normalize.parse_relative_time", normalize.parse_relative_time, fb_times, args.number)
+    bench("normalize.parse_dates (batch)", normalize.parse_dates, fb_times, args.number, batch=True)
+    bench("legacy extract_facebook_url", legacy_extract_facebook_url, fb_urls, args.number)
+    bench("normalize.extract_facebook_url", normalize.extract_facebook_url, fb_urls, args.number)
+    bench("legacy x count label", legacy_x_counts, x_labels, args.number)
+    bench("normalize.parse_count_label", normalize.parse_count_label, x_labels, args.number)
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+# 离线回放基准：先用真实登录态录制帖子（HAR + DOM 快照），之后在没有网络的情况下
+# 反复跑 x/tiktok/fb/instagram 的页面解析，统计各并发下的延迟、CDP 往返次数和吞吐
+#
+#   python bench/bench_replay.py record --user-data-dir ./chrome-cache --platform twitter --link https://x.com/a/status/1
+#   python bench/bench_replay.py replay --runs 20 --concurrency 1,4,8
+#   python bench/bench_replay.py replay --mode snapshot --extract-mode dom
+#
+# 录制结果放在 bench/fixtures/<名称>/ 下，replay 默认读取该目录下全部录制
+
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright
+
+import main
+from bench_fb_extract import RoundTripCounter
+from launch_profiles import LAUNCH_PROFILES
+from replay import load_fixtures, record_fixture, replay_context
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_name(platform, link):
+    return f"{platform}-{re.sub(r'[^A-Za-z0-9]+', '-', link.split('://')[-1]).strip('-')[:80]}"
+
+
+async def record(args):
+    async with async_playwright() as playwright:
+        # 从已登录的用户目录导出 cookie 和 localStorage，录制时带上
+        context = await playwright.chromium.launch_persistent_context(args.user_data_dir, headless=True,
+                                                                      executable_path=args.exe)
+        storage_state = await context.storage_state()
+        await context.close()
+        options = LAUNCH_PROFILES[args.launch_profile]
+        browser = await playwright.chromium.launch(headless=options["headless"], args=options["args"],
+                                                   executable_path=args.exe)
+        try:
+            directory = os.path.join(args.fixtures, args.name or fixture_name(args.platform, args.link))
+            result = await record_fixture(browser, storage_state, args.platform, args.link, directory,
+                                          main.PAGE_PARSERS[args.platform], main.setup_page)
+            print(main.result_dict(result))
+        finally:
+            await browser.close()
+
+
+async def replay_once(browser, fixture, mode):
+    context = await replay_context(browser, fixture, mode)
+    try:
+        page = await context.new_page()
+        await main.setup_page(page, fixture.platform)
+        counter = [0]
+        started = time.perf_counter()
+        result = main.result_dict(await main.PAGE_PARSERS[fixture.platform](RoundTripCounter(page, counter), fixture.link))
+        return time.perf_counter() - started, counter[0], result.get("code") == 200
+    except Exception as e:
+        print(f"[{fixture.name}] replay failed: {e}")
+        return None, 0, False
+    finally:
+        await context.close()
+
+
+async def bench_level(browser, fixture, mode, runs, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            return await replay_once(browser, fixture, mode)
+
+    started = time.perf_counter()
+    samples = await asyncio.gather(*(one() for _ in range(runs)))
+    wall = time.perf_counter() - started
+    latencies = sorted(elapsed * 1000 for elapsed, _, ok in samples if ok)
+    round_trips = [count for _, count, ok in samples if ok]
+    if not latencies:
+        return f"{concurrency:>4}  all {runs} runs failed"
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return (f"{concurrency:>4}  ok {len(latencies):>3}/{runs:<3}  p50 {statistics.median(latencies):8.1f}ms  "
+            f"p95 {p95:8.1f}ms  round trips {statistics.mean(round_trips):5.1f}  throughput {runs / wall:6.2f}/s")
+
+
+async def replay(args):
+    main.extract_mode = args.extract_mode
+    fixtures = load_fixtures(args.fixtures, args.platform)
+    if not fixtures:
+        print(f"no fixtures in {args.fixtures}, record some first")
+        return
+    levels = [int(level) for level in args.concurrency.split(",")]
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True, executable_path=args.exe)
+        try:
+            for fixture in fixtures:
+                # 先跑一次预热，顺便确认录制还能解析出结果
+                _, _, ok = await replay_once(browser, fixture, args.mode)
+                print(f"{fixture.name} [{fixture.platform}] mode {args.mode}, extract {args.extract_mode}, warmup ok {ok}")
+                for level in levels:
+                    print(await bench_level(browser, fixture, args.mode, args.runs, level))
+        finally:
+            await browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["record", "replay"])
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--exe", default=None, help="Chrome executable, bundled chromium when omitted.")
+    parser.add_argument("--platform", action="append", help="Platform to record, or platforms to replay.")
+    parser.add_argument("--link")
+    parser.add_argument("--name", help="Fixture directory name, derived from the link when omitted.")
+    parser.add_argument("--user-data-dir", help="Logged in browser profile used for recording.")
+    parser.add_argument("--launch-profile", default="headless-new", choices=list(LAUNCH_PROFILES))
+    parser.add_argument("--mode", default="har", choices=["har", "snapshot"])
+    parser.add_argument("--extract-mode", default="api", choices=["api", "dom"])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    args = parser.parse_args()
+    if args.command == "record":
+        if not args.link or not args.platform or not args.user_data_dir:
+            parser.error("record needs --platform, --link and --user-data-dir")
+        args.platform = args.platform[0]
+        asyncio.run(record(args))
+    else:
+        asyncio.run(replay(args))
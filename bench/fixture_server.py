@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# 本地替身服务：把录制的帖子页面按原链接的路径返回，快速通道对着它跑，不访问真实平台
+#
+#   python bench/fixture_server.py --port 8765
+#   python main.py --exe ... --cache ... --fast-path tiktok,instagram --fast-path-origin http://127.0.0.1:8765
+#
+# 主文档优先取 HAR 里录到的服务端原始响应，没有 HAR 时用 snapshot.html（也可以手工保存页面放进去）
+
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import Fixture, load_fixtures
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def url_path(url):
+    parts = urlsplit(url)
+    return f"{parts.path}{'?' + parts.query if parts.query else ''}"
+
+
+def document_from_har(fixture: Fixture):
+    if not os.path.isfile(fixture.har):
+        return None
+    with open(fixture.har, encoding="utf-8") as f:
+        entries = json.load(f)["log"]["entries"]
+    urls = {fixture.link, fixture.final_url}
+    for entry in entries:
+        response = entry["response"]
+        content = response.get("content") or {}
+        if entry["request"]["url"] not in urls or response["status"] != 200 or "text" not in content:
+            continue
+        if content.get("encoding") == "base64":
+            return base64.b64decode(content["text"]).decode("utf-8", "replace")
+        return content["text"]
+    return None
+
+
+def load_pages(fixtures):
+    pages = {}
+    for fixture in fixtures:
+        body = document_from_har(fixture)
+        if body is None and os.path.isfile(fixture.snapshot):
+            with open(fixture.snapshot, encoding="utf-8") as f:
+                body = f.read()
+        if body is None:
+            continue
+        pages[url_path(fixture.link)] = body.encode("utf-8")
+    return pages
+
+
+class FixtureServer:
+    def __init__(self, pages, host="127.0.0.1", port=0, delay=0):
+        self.pages = pages
+        self.delay = delay
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = server.pages.get(self.path)
+                if server.delay:
+                    threading.Event().wait(server.delay)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def origin(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--platform", action="append")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0, help="Seconds added to every response.")
+    args = parser.parse_args()
+    pages = load_pages(load_fixtures(args.fixtures, args.platform))
+    server = FixtureServer(pages, args.host, args.port, args.delay)
+    print(f"serving {len(pages)} pages on {server.origin}")
+    for path in sorted(pages):
+        print(f"  {path}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import logging
+from collections import Counter
+
+from playwright.async_api import async_playwright, BrowserContext, Error as PlaywrightError, \
+    TimeoutError as PlaywrightTimeoutError
+
+from page_pool import PagePool
+
+# 这些报错说明连接或整个浏览器已经不可用，需要再探测一次上下文确认
+BROWSER_ERROR_MARKERS = (
+    "browser has been closed",
+    "browser closed",
+    "context or browser has been closed",
+    "connection closed",
+    "target closed",
+    "browser has disconnected",
+)
+
+
+# 管理唯一的浏览器上下文：页面级错误只丢弃出错的标签页，浏览器级错误排空后重启一次
+class BrowserSupervisor:
+    def __init__(self, launcher, platforms, pool_size, page_setup=None, drain_timeout=10, name="browser"):
+        self.name = name
+        self._launcher = launcher
+        self._page_setup = page_setup
+        self.platforms = platforms
+        self.pool_size = pool_size
+        self.drain_timeout = drain_timeout
+        self.playwright = None
+        self.context: BrowserContext = None
+        self.pools: dict[str, PagePool] = {}
+        self.counters = Counter()
+        self._lock = asyncio.Lock()
+        self._restarting = False
+        self._generation = 0
+        self._inflight = 0
+        self.load = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._restart_task = None
+
+    async def start(self):
+        async with self._lock:
+            if not self.context:
+                await self._launch()
+
+    async def _launch(self):
+        logging.info(f"[{self.name}] create playwright browser")
+        self.playwright = await async_playwright().start()
+        # 页面池都建好预热完再一起挂上，预热期间进来的请求看到的 context 仍为空，会排队等 start()
+        pools = {}
+        try:
+            context = await self._launcher(self.playwright)
+            for platform in self.platforms:
+                pools[platform] = PagePool(context, platform, self.pool_size, self._page_setup)
+                await pools[platform].warm()
+        except Exception:
+            self.counters["launch_failed"] += 1
+            self.pools.update(pools)
+            await self._shutdown()
+            raise
+        self.context, self.pools = context, pools
+        self._generation += 1
+        logging.info(f"[{self.name}] Browser launched successfully, generation {self._generation}.")
+
+    async def _shutdown(self):
+        for pool in self.pools.values():
+            try:
+                await pool.close()
+            except Exception as e:
+                logging.error(f"Error closing page pool: {e}")
+        self.pools.clear()
+        if self.playwright:
+            try:
+                await self.playwright.stop()
+            except Exception as e:
+                logging.error(f"Error stopping Playwright: {e}")
+        self.playwright = None
+        self.context = None
+
+    async def stop(self):
+        async with self._lock:
+            await self._shutdown()
+
+    async def get_context(self) -> BrowserContext:
+        if self._restarting:
+            # 重启期间新的请求排队等待，而不是直接失败
+            await asyncio.shield(self._restart_task)
+        if not self.context:
+            await self.start()
+        return self.context
+
+    @contextlib.asynccontextmanager
+    async def page(self, platform):
+        # load 包含还在排队等页面的请求，供多 worker 调度时比较忙闲
+        self.load += 1
+        try:
+            await self.get_context()
+            pool = self.pools[platform]
+            generation = self._generation
+            page = await pool.acquire()
+        except Exception:
+            self.load -= 1
+            raise
+        self._inflight += 1
+        self._drained.clear()
+        broken = False
+        try:
+            yield page
+        except Exception as e:
+            broken = True
+            await self._on_error(e, generation)
+            raise
+        finally:
+            self._inflight -= 1
+            self.load -= 1
+            if self._inflight == 0:
+                self._drained.set()
+            await pool.release(page, broken)
+
+    @property
+    def waiting(self):
+        # 已进入 page() 但还没拿到标签页的请求
+        return self.load - self._inflight
+
+    async def report(self, e, generation=None):
+        await self._on_error(e, self._generation if generation is None else generation)
+
+    async def _on_error(self, e, generation):
+        if await self._is_browser_error(e):
+            self.counters["browser_error"] += 1
+            logging.error(f"[{self.name}] browser level error, restart browser: {e}")
+            self._schedule_restart(generation)
+        else:
+            self.counters["page_error"] += 1
+
+    async def _is_browser_error(self, e):
+        if isinstance(e, PlaywrightTimeoutError) or not isinstance(e, PlaywrightError):
+            return False
+        if not self.context:
+            return True
+        if not any(marker in str(e).lower() for marker in BROWSER_ERROR_MARKERS):
+            return False
+        # 单个标签页被关掉也会报 closed，探测一下上下文本身是否还活着
+        try:
+            await asyncio.wait_for(self.context.cookies(), timeout=3)
+            return False
+        except Exception:
+            return True
+
+    def _schedule_restart(self, generation):
+        # 同一代浏览器只重启一次，后续同代的报错直接忽略
+        if self._restarting or generation != self._generation:
+            return
+        self._restarting = True
+        self._restart_task = asyncio.create_task(self._restart())
+
+    async def _restart(self):
+        try:
+            async with self._lock:
+                self.counters["restarts"] += 1
+                try:
+                    await asyncio.wait_for(self._drained.wait(), timeout=self.drain_timeout)
+                except asyncio.TimeoutError:
+                    logging.warning(f"drain timeout, {self._inflight} pages still in use")
+                await self._shutdown()
+                try:
+                    await self._launch()
+                except Exception as e:
+                    # 启动失败时保持空上下文，下一个请求会再尝试启动
+                    logging.error(f"relaunch browser failed: {e}")
+        finally:
+            self._restarting = False
+
+    def stats(self):
+        return {
+            "load": self.load,
+            "generation": self._generation,
+            "restarting": self._restarting,
+            "inflight": self._inflight,
+            "errors": dict(self.counters),
+            "pools": {platform: pool.stats() for platform, pool in self.pools.items()},
+        }
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import logging
+import os
+import shutil
+
+from browser_supervisor import BrowserSupervisor
+
+# 复制基础用户目录时跳过锁文件和各种缓存，只保留登录态等必要数据
+PROFILE_IGNORE = shutil.ignore_patterns(
+    "Singleton*", "*.lock", "lockfile", "Crashpad", "Cache", "Code Cache", "GPUCache", "DawnCache",
+    "GrShaderCache", "ShaderCache", "CacheStorage", "ScriptCache",
+)
+
+
+def clone_profile(base_profile, target):
+    if os.path.isdir(target):
+        return
+    if base_profile and os.path.isdir(base_profile):
+        shutil.copytree(base_profile, target, ignore=PROFILE_IGNORE)
+    else:
+        os.makedirs(target, exist_ok=True)
+    logging.info(f"clone browser profile {base_profile} -> {target}")
+
+
+# N 个独立的浏览器进程，每个一套用户目录；请求优先发给平台绑定的 worker，
+# 它比最空闲的 worker 忙太多时再改发给最空闲的
+class BrowserWorkerPool:
+    def __init__(self, launcher, platforms, page_setup=None):
+        self._launcher = launcher
+        self._page_setup = page_setup
+        self.platforms = platforms
+        self.count = 1
+        self.pool_size = 2
+        self.base_profile = None
+        self.profiles_dir = None
+        self.affinity_slack = 1
+        self.name = "worker"
+        self.share_base = True
+        self.workers: list[BrowserSupervisor] = []
+
+    def setup(self, count, pool_size, base_profile, profiles_dir=None, name="worker", share_base=True):
+        self.count = count if count > 0 else os.cpu_count() or 1
+        self.pool_size = pool_size
+        self.base_profile = base_profile
+        self.profiles_dir = profiles_dir or (f"{base_profile.rstrip(os.sep)}-workers" if base_profile else None)
+        self.name = name
+        # share_base=False 时所有 worker 都用复制出来的目录，可以和另一组浏览器同时运行
+        self.share_base = share_base
+        self.workers = []
+
+    @property
+    def capacity(self):
+        return self.count * self.pool_size
+
+    def profile_dir(self, index):
+        # 0 号 worker 直接用基础用户目录，登录等操作都在它上面做
+        if (index == 0 and self.share_base) or not self.profiles_dir:
+            return self.base_profile
+        return os.path.join(self.profiles_dir, f"{self.name}-{index}")
+
+    def _ensure_workers(self):
+        if self.workers:
+            return self.workers
+        for index in range(self.count):
+            profile = self.profile_dir(index)
+
+            async def launcher(playwright, profile=profile):
+                if profile != self.base_profile:
+                    await asyncio.to_thread(clone_profile, self.base_profile, profile)
+                return await self._launcher(playwright, profile)
+
+            self.workers.append(BrowserSupervisor(launcher, self.platforms, self.pool_size, self._page_setup,
+                                                  name=f"{self.name}-{index}"))
+        return self.workers
+
+    def pick(self, platform):
+        workers = self._ensure_workers()
+        if len(workers) == 1:
+            return workers[0]
+        home = workers[self.platforms.index(platform) % len(workers)] if platform in self.platforms else workers[0]
+        least = min(workers, key=lambda worker: worker.load)
+        if home.load <= least.load + self.affinity_slack:
+            return home
+        return least
+
+    @contextlib.asynccontextmanager
+    async def page(self, platform):
+        async with self.pick(platform).page(platform) as page:
+            yield page
+
+    async def get_context(self):
+        return await self._ensure_workers()[0].get_context()
+
+    async def report(self, e):
+        await self._ensure_workers()[0].report(e)
+
+    async def stop(self):
+        for worker in self.workers:
+            await worker.stop()
+
+    def stats(self):
+        return {worker.name: worker.stats() for worker in self.workers}
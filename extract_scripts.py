@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+
+# 页面内一次 evaluate 取完整条记录的脚本，Python 侧只做归一化，避免每个字段一次 CDP 往返
+
+JS_HELPERS = """
+    const xpathAll = (xpath, root) => {
+        const snapshot = document.evaluate(xpath, root || document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < snapshot.snapshotLength; i++) {
+            nodes.push(snapshot.snapshotItem(i));
+        }
+        return nodes;
+    };
+    const xpathFirst = (xpath, root) => {
+        return document.evaluate(xpath, root || document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    };
+    const attr = (element, name) => element ? element.getAttribute(name) : null;
+"""
+
+# 短视频（Reels）两种布局共用的字段
+FB_REELS_COMMON_JS = """
+    (post) => {
+        const avatarImage = post.querySelector('svg[aria-label="头像"][data-visualcompletion="ignore-dynamic"] image');
+        const videoElement = post.querySelector('div[data-video-id]');
+        const timestamp = xpathFirst('//span[contains(text(), "分钟") or contains(text(), "小时") or contains(text(), "天") or contains(text(), "月") or contains(text(), "年")]');
+        const reelsDiv = post.querySelector('div[data-pagelet="Reels"]');
+        const contentDiv = reelsDiv ? reelsDiv.nextElementSibling : null;
+        const hashtags = [];
+        post.querySelectorAll('a[href*="hashtag"]').forEach(aTag => {
+            if (aTag.textContent.startsWith('#')) {
+                hashtags.push(aTag.textContent.trim());
+            }
+        });
+        return {
+            avatarUrl: attr(avatarImage, 'xlink:href'),
+            postId: attr(videoElement, 'data-video-id'),
+            profileHref: attr(post.querySelector('a[aria-label="查看所有者个人主页"]'), 'href'),
+            timestamp: timestamp ? timestamp.textContent.trim() : null,
+            content: contentDiv ? contentDiv.textContent.trim() : '',
+            hashtags: [...new Set(hashtags)],
+        };
+    }
+"""
+
+# 帖子卡片上的点赞、评论、分享数
+FB_POST_COUNTERS_JS = """
+    (post) => {
+        const matchSpan = (keywords) => {
+            for (let span of post.querySelectorAll('span')) {
+                for (let keyword of keywords) {
+                    if (span.textContent.includes(keyword)) {
+                        const match = span.textContent.match(new RegExp('(.*?)' + keyword));
+                        if (match) {
+                            return match[1];
+                        }
+                    }
+                }
+            }
+            return 0;
+        };
+        let likes = null;
+        for (let button of post.querySelectorAll('div[role="button"]')) {
+            if (button.textContent.includes('所有心情：')) {
+                const siblingSpan = button.querySelector('span span');
+                if (siblingSpan && siblingSpan.textContent.trim() !== '') {
+                    likes = siblingSpan.textContent.trim();
+                    break;
+                }
+            }
+        }
+        if (likes === null) {
+            const targetSpan = post.querySelector('span[aria-hidden="true"] span.x1e558r4');
+            likes = targetSpan ? targetSpan.textContent.trim() : 0;
+        }
+        return {likes: likes, comments: matchSpan(['条评论', 'comments']), shares: matchSpan(['次分享', 'share'])};
+    }
+"""
+
+# 单独打开的 Reel 页面上的点赞、评论、分享数
+FB_REEL_COUNTERS_JS = """
+    (post) => {
+        const counters = {likes: 0, comments: 0, shares: 0};
+        // 获取 class 为指定值的第 3、4、5 个 div 元素
+        const divs = xpathAll('//div[@class="x9f619 x1n2onr6 x1ja2u2z x78zum5 xdt5ytf x2lah0s x193iq5w x1xmf6yo x1e56ztr xzboxd6 x14l7nz5"][position() >= 3 and position() <= 5]');
+        for (let div of divs) {
+            const value = div.textContent.trim() || 0;
+            if (div.querySelector('div[aria-label="赞"]')) {
+                counters.likes = value;
+            }
+            if (div.querySelector('div[aria-label="评论"]')) {
+                counters.comments = value;
+            }
+            if (div.querySelector('div[aria-label="分享"]')) {
+                counters.shares = value;
+            }
+        }
+        return counters;
+    }
+"""
+
+# 单独打开的 Reel 页面
+FB_REEL_PAGE_JS = """
+    (post) => {
+        const owners = post.querySelectorAll('a[aria-label="查看所有者个人主页"]');
+        return {
+            ...reelsCommon(post),
+            username: owners.length > 1 ? owners[1].textContent.trim() : '',
+            ...reelCounters(post),
+        };
+    }
+"""
+
+# 信息流里嵌着的 Reels
+FB_REELS_FEED_JS = """
+    (post) => {
+        let username = '';
+        const divElement = Array.from(post.querySelectorAll('span')).find(span => span.textContent.includes('短视频') || span.textContent.includes('Reels'));
+        const objectElement = divElement ? divElement.querySelector('object[type="nested/pressable"]') : null;
+        const aElement = objectElement ? objectElement.querySelector('a') : null;
+        if (aElement) {
+            username = aElement.textContent.trim();
+        }
+        return {...reelsCommon(post), username: username, ...postCounters(post)};
+    }
+"""
+
+# 普通帖子
+FB_POST_JS = """
+    (post) => {
+        const profileLink = post.querySelector('[data-ad-rendering-role="profile_name"] a');
+        const profileName = post.querySelector('[data-ad-rendering-role="profile_name"] span a span');
+        const postLink = post.querySelector('a[role="link"][href*="/posts/"]');
+        const timestamp = xpathFirst('.//a[contains(@aria-label, "小时") or contains(@aria-label, "分钟") or contains(@aria-label, "天") or contains(@aria-label, "月") or contains(@aria-label, "年")]', post);
+        const contentDiv = post.querySelector('div[data-ad-rendering-role="story_message"]');
+        const hashtags = [];
+        if (contentDiv) {
+            contentDiv.querySelectorAll('a').forEach(tag => {
+                if (tag.href && tag.href.includes('hashtag')) {
+                    hashtags.push(tag.innerText);
+                }
+            });
+        }
+        return {
+            avatarUrl: attr(post.querySelector('svg[data-visualcompletion="ignore-dynamic"] image'), 'xlink:href'),
+            username: profileName ? profileName.innerText : null,
+            profileHref: profileLink ? profileLink.href : null,
+            postLink: postLink ? postLink.href : null,
+            timestamp: attr(timestamp, 'aria-label'),
+            content: contentDiv ? contentDiv.innerText : null,
+            hashtags: hashtags,
+            ...postCounters(post),
+        };
+    }
+"""
+
+# 帖子页上的主帖：Reel 页面取 Reels 容器，普通帖子取信息流里的第一条
+FB_FIND_POST_JS = """
+    (() => {
+        if (reelPage) {
+            const reels = document.querySelector('div[data-pagelet="Reels"]');
+            return reels ? reels.parentElement : null;
+        }
+        return xpathFirst('//div[@aria-posinset="1"]') || xpathFirst('//div[@aria-posinset="2"]');
+    })()
+"""
+
+FB_EXTRACT_JS = """
+(reelPage) => {
+""" + JS_HELPERS + """
+    const reelsCommon = """ + FB_REELS_COMMON_JS + """;
+    const postCounters = """ + FB_POST_COUNTERS_JS + """;
+    const reelCounters = """ + FB_REEL_COUNTERS_JS + """;
+    const layouts = {
+        reelPage: """ + FB_REEL_PAGE_JS + """,
+        reelsFeed: """ + FB_REELS_FEED_JS + """,
+        post: """ + FB_POST_JS + """,
+    };
+    const post = """ + FB_FIND_POST_JS + """;
+    if (!post) {
+        return null;
+    }
+    let layout = 'post';
+    if (post.querySelector('[data-pagelet="Reels"]')) {
+        layout = reelPage ? 'reelPage' : 'reelsFeed';
+    }
+    return {layout: layout, ...layouts[layout](post)};
+}
+"""
+
+# 推文的计数栏，完整解析和刷新计数共用
+X_COUNT_GROUP_JS = """xpathFirst("//div[@role='group' and (contains(@aria-label, 'replies') or contains(@aria-label, 'reposts') or contains(@aria-label, 'likes') or contains(@aria-label, 'bookmarks') or contains(@aria-label, 'views') or contains(@aria-label, '回复') or contains(@aria-label, '次转贴') or contains(@aria-label, '喜欢') or contains(@aria-label, '书签') or contains(@aria-label, '次观看'))]")"""
+
+X_EXTRACT_JS = """
+() => {
+""" + JS_HELPERS + """
+    const userLink = document.querySelector('div[data-testid="User-Name"] a[href]');
+    const userName = document.querySelector('div[data-testid="User-Name"] a[href] span span');
+    const tweetText = document.querySelector('div[data-testid="tweetText"] span');
+    const countGroup = """ + X_COUNT_GROUP_JS + """;
+    return {
+        profileHref: attr(userLink, 'href'),
+        username: userName ? userName.textContent : null,
+        hashtagHrefs: Array.from(document.querySelectorAll('a[href*="/hashtag/"]'), a => a.getAttribute('href')),
+        content: tweetText ? tweetText.textContent : '',
+        datetime: attr(document.querySelector('time[datetime]'), 'datetime'),
+        countLabel: attr(countGroup, 'aria-label'),
+    };
+}
+"""
+
+TIKTOK_EXTRACT_JS = """
+() => {
+""" + JS_HELPERS + """
+    const text = (xpath) => {
+        const element = xpathFirst(xpath);
+        return element ? element.textContent : null;
+    };
+    return {
+        username: text('//span[@data-e2e="browse-username"]'),
+        pushTime: text('//span[@data-e2e="browser-nickname"]/span[3]'),
+        tagHrefs: xpathAll('//a[starts-with(@href, "/tag/")]').map(a => a.getAttribute('href')),
+        avatarUrl: attr(xpathFirst('//span[@shape="circle"]//img[@loading="lazy"]'), 'src'),
+        content: text('//h1[@data-e2e="browse-video-desc"]/span[1]'),
+        likes: text('//strong[@data-e2e="like-count"]'),
+        comments: text('//strong[@data-e2e="comment-count"]'),
+        loves: text('//strong[@data-e2e="share-count"]'),
+        shares: text('//strong[@data-e2e="undefined-count"]'),
+    };
+}
+"""
+
+INSTAGRAM_EXTRACT_JS = """
+() => {
+""" + JS_HELPERS + """
+    const times = document.querySelectorAll('time');
+    const likes = xpathFirst("(//a[span[contains(text(), 'likes') or contains(text(), 'like') or contains(text(), '次赞')]])")
+        || xpathFirst("(//a[span[contains(text(), 'likes') or contains(text(), 'like') or contains(text(), '次赞')]]/span/span)");
+    const avatar = xpathFirst("(//img[contains(@alt, 'profile picture')])[1]");
+    return {
+        datetime: times.length ? times[times.length - 1].getAttribute('datetime') : null,
+        likes: likes ? likes.textContent : 0,
+        avatarUrl: attr(avatar, 'src'),
+        avatarAlt: attr(avatar, 'alt'),
+        tagHrefs: xpathAll("//a[contains(@href, '/explore/tags/')]").map(a => a.getAttribute('href')),
+    };
+}
+"""
+
+# 主页信息流里的单条卡片，参数是卡片元素；拿不到帖子链接说明卡片还没渲染完，返回 null 下一轮再取
+X_FEED_CARD_JS = """
+    (card) => {
+        const time = card.querySelector('a[href*="/status/"] time[datetime]');
+        if (!time) {
+            return null;
+        }
+        const userLink = card.querySelector('div[data-testid="User-Name"] a[href]');
+        const userName = card.querySelector('div[data-testid="User-Name"] a[href] span span');
+        const tweetText = card.querySelector('div[data-testid="tweetText"]');
+        const countGroup = card.querySelector('div[role="group"][aria-label]');
+        return {
+            postLink: time.closest('a').href,
+            profileHref: attr(userLink, 'href'),
+            username: userName ? userName.textContent : null,
+            hashtagHrefs: Array.from(card.querySelectorAll('a[href*="/hashtag/"]'), a => a.getAttribute('href')),
+            content: tweetText ? tweetText.textContent : '',
+            pushTime: attr(time, 'datetime'),
+            countLabel: attr(countGroup, 'aria-label'),
+        };
+    }
+"""
+
+TIKTOK_FEED_CARD_JS = """
+    (card) => {
+        const link = card.querySelector('a[href*="/video/"], a[href*="/photo/"]');
+        if (!link) {
+            return null;
+        }
+        const views = card.querySelector('strong[data-e2e="video-views"]');
+        return {
+            postLink: link.href,
+            content: attr(card.querySelector('img[alt]'), 'alt') || '',
+            views: views ? views.textContent : 0,
+        };
+    }
+"""
+
+INSTAGRAM_FEED_CARD_JS = """
+    (card) => ({
+        postLink: card.href,
+        content: attr(card.querySelector('img[alt]'), 'alt') || '',
+    })
+"""
+
+FB_FEED_CARD_JS = """
+    (card) => {
+        const record = post(card);
+        return record.postLink ? record : null;
+    }
+"""
+
+# 一次 evaluate 取一批还没处理过的卡片，处理过的打标记；detach 时把卡片清空只留原高度，
+# 图片、视频和子树随之释放，页面滚动位置不变，长时间下拉内存不再增长
+FEED_BATCH_JS = """
+([selector, limit, detach]) => {
+""" + JS_HELPERS + """
+    const postCounters = """ + FB_POST_COUNTERS_JS + """;
+    const post = """ + FB_POST_JS + """;
+    const extractCard = %s;
+    const cards = Array.from(document.querySelectorAll(selector)).filter(card => !card.hasAttribute('data-feed-seen'));
+    const records = [];
+    let pending = 0;
+    for (const card of cards) {
+        if (records.length >= limit) {
+            pending++;
+            continue;
+        }
+        const record = extractCard(card);
+        if (!record) {
+            pending++;
+            continue;
+        }
+        card.setAttribute('data-feed-seen', '1');
+        records.push(record);
+        if (detach) {
+            card.style.minHeight = card.offsetHeight + 'px';
+            card.querySelectorAll('img, video, source').forEach(media => {
+                media.removeAttribute('srcset');
+                media.removeAttribute('src');
+            });
+            card.replaceChildren();
+        }
+    }
+    return {records: records, pending: pending};
+}
+"""
+
+FEED_CARD_SCRIPTS = {
+    "twitter": ('article[data-testid="tweet"]', FEED_BATCH_JS % X_FEED_CARD_JS),
+    "tiktok": ('div[data-e2e="user-post-item"]', FEED_BATCH_JS % TIKTOK_FEED_CARD_JS),
+    "instagram": ('main a[href*="/p/"], main a[href*="/reel/"]', FEED_BATCH_JS % INSTAGRAM_FEED_CARD_JS),
+    "facebook": ('div[aria-posinset]', FEED_BATCH_JS % FB_FEED_CARD_JS),
+}
+
+# 只取计数字段，刷新已知帖子时用，字段名和完整解析结果一致，Python 侧只做数字归一化
+X_COUNTERS_JS = """
+() => {
+""" + JS_HELPERS + """
+    const countGroup = """ + X_COUNT_GROUP_JS + """;
+    return {countLabel: attr(countGroup, 'aria-label')};
+}
+"""
+
+TIKTOK_COUNTERS_JS = """
+() => {
+    const text = (selector) => {
+        const element = document.querySelector(selector);
+        return element ? element.textContent : 0;
+    };
+    return {
+        likes: text('strong[data-e2e="like-count"]'),
+        comments: text('strong[data-e2e="comment-count"]'),
+        lovers: text('strong[data-e2e="share-count"]'),
+        retweets: text('strong[data-e2e="undefined-count"]'),
+    };
+}
+"""
+
+INSTAGRAM_COUNTERS_JS = """
+() => {
+""" + JS_HELPERS + """
+    const likes = xpathFirst("(//a[span[contains(text(), 'likes') or contains(text(), 'like') or contains(text(), '次赞')]])");
+    return {likes: likes ? likes.textContent : 0};
+}
+"""
+
+FB_COUNTERS_JS = """
+(reelPage) => {
+""" + JS_HELPERS + """
+    const postCounters = """ + FB_POST_COUNTERS_JS + """;
+    const reelCounters = """ + FB_REEL_COUNTERS_JS + """;
+    const post = """ + FB_FIND_POST_JS + """;
+    if (!post) {
+        return null;
+    }
+    const counters = reelPage ? reelCounters(post) : postCounters(post);
+    return {likes: counters.likes, comments: counters.comments, retweets: counters.shares};
+}
+"""
+
+COUNTER_SCRIPTS = {
+    "twitter": X_COUNTERS_JS,
+    "tiktok": TIKTOK_COUNTERS_JS,
+    "instagram": INSTAGRAM_COUNTERS_JS,
+    "facebook": FB_COUNTERS_JS,
+}
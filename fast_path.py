@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import html
+import logging
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+from api_extract import instagram_from_html, tiktok_from_html
+from navigation import NavigationError
+from normalize import extract_post_id, parse_date, parse_number
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/126.0.0.0 Safari/537.36")
+META_RE = re.compile(r"<meta\s[^>]*>", re.I)
+META_ATTR_RE = re.compile(r'(property|name|content)\s*=\s*"([^"]*)"', re.I)
+HASHTAG_RE = re.compile(r"#(\w+)", re.U)
+# "1,234 likes, 56 comments - someone on March 3, 2024: "caption""
+INSTAGRAM_OG_DESCRIPTION_RE = re.compile(
+    r"^\s*(?P<likes>[\d.,]+\s?[KMB]?) likes?, (?P<comments>[\d.,]+\s?[KMB]?) comments? - (?P<username>[\w.]+) "
+    r"on (?P<date>[A-Za-z]+ \d{1,2}, \d{4})\s*:\s*[\"“](?P<content>.*)[\"”]\.?\s*$", re.S | re.I)
+
+
+def og_tags(page_html):
+    tags = {}
+    for meta in META_RE.findall(page_html):
+        attrs = {key.lower(): value for key, value in META_ATTR_RE.findall(meta)}
+        key = attrs.get("property") or attrs.get("name")
+        if key and key.startswith("og:") and "content" in attrs:
+            tags.setdefault(key[3:], html.unescape(attrs["content"]))
+    return tags
+
+
+def instagram_from_og(page_html, link):
+    # 未登录时拿不到 data-sjs 里的帖子 JSON，公开帖子的 og:description 里仍有点赞数、评论数、作者、日期和正文
+    match = INSTAGRAM_OG_DESCRIPTION_RE.match(og_tags(page_html).get("description", ""))
+    if not match:
+        return None
+    username = match.group("username")
+    content = match.group("content")
+    return {
+        "username": username,
+        "profileId": username,
+        "profileUrl": f"https://www.instagram.com/{username}/",
+        "postLink": link,
+        "postId": extract_post_id("instagram", link),
+        "tags": list({f"#{tag}" for tag in HASHTAG_RE.findall(content)}),
+        "profileImage": None,
+        "pushTime": parse_date(match.group("date")),
+        "content": content,
+        "retweets": 0,
+        "likes": parse_number(match.group("likes")),
+        "comments": parse_number(match.group("comments")),
+    }
+
+
+def instagram_from_page(page_html, link):
+    return instagram_from_html(page_html, link) or instagram_from_og(page_html, link)
+
+
+# 平台 -> 从服务端返回的 HTML 里取帖子数据；X 和 Facebook 的帖子数据都靠页面脚本加载，没有快速通道
+FAST_PATH_EXTRACTORS = {
+    "tiktok": tiktok_from_html,
+    "instagram": instagram_from_page,
+}
+
+
+# 不开浏览器标签页，直接用连接池复用的 HTTP 客户端请求帖子页面，HTML 里带了帖子数据就直接返回；
+# 取不到时返回 None，由调用方回退到浏览器解析
+class FastPath:
+    def __init__(self, platforms=(), timeout=10, max_connections=20, origin=None):
+        self.platforms = set(platforms)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        # 指定后把帖子链接的协议和域名换成该地址，用于对着本地的录制页面服务测试
+        self.origin = origin
+        self.counters = Counter()
+        self._client = None
+
+    @property
+    def available(self):
+        return httpx is not None
+
+    def enabled(self, platform):
+        return self.available and platform in self.platforms and platform in FAST_PATH_EXTRACTORS
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"},
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections))
+        return self._client
+
+    def url(self, link):
+        if not self.origin:
+            return link
+        parts = urlsplit(link)
+        return f"{self.origin.rstrip('/')}{parts.path}{'?' + parts.query if parts.query else ''}"
+
+    async def fetch(self, platform, link):
+        response = await self._get_client().get(self.url(link))
+        if response.status_code == 429:
+            self.counters["rate_limit"] += 1
+            raise NavigationError("rate_limit", f"{platform} fast path rate limited: {link}")
+        if response.status_code != 200:
+            self.counters["miss"] += 1
+            logging.info(f"[{platform}] fast path got HTTP {response.status_code} for {link}")
+            return None
+        try:
+            data = FAST_PATH_EXTRACTORS[platform](response.text, link)
+        except ValueError as e:
+            # 页面里的 JSON 结构变了或被截断
+            logging.info(f"[{platform}] fast path payload parse failed for {link}: {e}")
+            data = None
+        self.counters["hit" if data else "miss"] += 1
+        return data
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self):
+        return {
+            "available": self.available,
+            "platforms": sorted(self.platforms),
+            **self.counters,
+        }
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import json
+import logging
+import re
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from playwright.async_api import Page, Response
+
+from api_extract import HASHTAG_RE, find_all, instagram_media_to_result, tiktok_item_to_result
+from extract_scripts import FEED_CARD_SCRIPTS
+from navigation import NAV_STRATEGIES, NavStrategy, navigate, wait_ready
+from normalize import extract_facebook_id, extract_facebook_post_id, extract_facebook_post_link, \
+    extract_facebook_url, extract_post_id, normalize_counts, parse_count_label, parse_dates
+
+PROFILE_URLS = {
+    "twitter": "https://x.com/{}",
+    "tiktok": "https://www.tiktok.com/@{}",
+    "instagram": "https://www.instagram.com/{}/",
+    "facebook": "https://www.facebook.com/{}",
+}
+TIKTOK_POST_ID_RE = re.compile(r"/(?:video|photo)/(\d+)")
+SCROLL_JS = "() => window.scrollTo(0, document.scrollingElement.scrollHeight)"
+
+STOP_LIMIT = "limit"
+STOP_SINCE = "since"
+STOP_END = "end"
+# 置顶帖可能比截止时间早，连续这么多条都早于截止时间才认为已经翻过了
+OLDER_STREAK = 3
+
+
+def profile_url(platform, profile):
+    if profile.startswith("http"):
+        return profile
+    return PROFILE_URLS[platform].format(profile.lstrip("@"))
+
+
+def profile_name(url):
+    return urlsplit(url).path.strip("/").lstrip("@").split("/")[0]
+
+
+def x_card(record, url):
+    profile_id = (record["profileHref"] or "").replace('/', '@')
+    profile = f"https://x.com/{profile_id.replace('@', '')}"
+    return {
+        "username": record["username"],
+        "profileId": profile_id,
+        "profileUrl": profile,
+        "postLink": record["postLink"],
+        "postId": extract_post_id("twitter", record["postLink"]),
+        "tags": list({f"#{href.split('/hashtag/')[1].split('?')[0]}" for href in record["hashtagHrefs"] if href}),
+        "profileImage": f"{profile}/photo",
+        "pushTime": record["pushTime"],
+        "content": record["content"],
+        **parse_count_label(record["countLabel"]),
+    }
+
+
+def tiktok_card(record, url):
+    username = profile_name(url)
+    match = TIKTOK_POST_ID_RE.search(record["postLink"])
+    post_id = match.group(1) if match else None
+    # 主页卡片上没有发布时间，TikTok 的帖子 ID 高 32 位就是发布时间戳
+    push_time = datetime.fromtimestamp(int(post_id) >> 32).strftime("%Y-%m-%d %H:%M:%S") if post_id else None
+    return {
+        "username": username,
+        "profileId": username,
+        "profileUrl": f"https://www.tiktok.com/@{username}",
+        "postLink": record["postLink"],
+        "postId": post_id,
+        "tags": [f"#{tag}" for tag in HASHTAG_RE.findall(record["content"])],
+        "pushTime": push_time,
+        "content": record["content"],
+        "views": record["views"],
+    }
+
+
+def instagram_card(record, url):
+    # 网格卡片上只有链接，点赞数和时间要悬停或打开帖子才有，接口数据先到时会用接口里的完整记录
+    username = profile_name(url)
+    return {
+        "username": username,
+        "profileId": username,
+        "profileUrl": f"https://www.instagram.com/{username}/",
+        "postLink": record["postLink"],
+        "postId": extract_post_id("instagram", record["postLink"]),
+    }
+
+
+def fb_card(record, url):
+    profile = record.get("profileHref")
+    profile_id = ""
+    if profile:
+        profile = extract_facebook_url(profile)
+        profile_id = extract_facebook_id(profile)
+    post_link = extract_facebook_post_link(record["postLink"])
+    return {
+        "profileImage": record.get("avatarUrl"),
+        "username": record.get("username"),
+        "profileId": profile_id,
+        "profileUrl": profile,
+        "pushTime": record.get("timestamp"),
+        "content": record.get("content"),
+        "postLink": post_link,
+        "postId": extract_facebook_post_id(post_link),
+        "tags": record.get("hashtags"),
+        "likes": record.get("likes"),
+        "comments": record.get("comments"),
+        "retweets": record.get("shares"),
+    }
+
+
+FEED_CARDS = {
+    "twitter": x_card,
+    "tiktok": tiktok_card,
+    "instagram": instagram_card,
+    "facebook": fb_card,
+}
+
+
+def is_tiktok_feed_api(response: Response):
+    return "/api/post/item_list" in response.url
+
+
+def tiktok_feed_items(body, url):
+    username = profile_name(url).lower()
+    items = json.loads(body).get("itemList") or []
+    return [tiktok_item_to_result(item, f"https://www.tiktok.com/@{author}/video/{item['id']}")
+            for item in items
+            if item.get("id") and (author := (item.get("author") or {}).get("uniqueId") or "").lower() == username]
+
+
+def is_instagram_feed_api(response: Response):
+    return "/api/v1/feed/user/" in response.url or "/graphql/query" in response.url
+
+
+def instagram_feed_items(body, url):
+    username = profile_name(url).lower()
+    medias = find_all(json.loads(body), lambda d: "code" in d and "taken_at" in d)
+    results = []
+    for media in medias:
+        result = instagram_media_to_result(media, f"https://www.instagram.com/p/{media['code']}/")
+        if result["username"].lower() == username:
+            results.append(result)
+    return results
+
+
+# 翻页时接口里带完整帖子数据的平台，卡片和接口谁先到用谁，按 postId 去重
+FEED_APIS = {
+    "tiktok": (is_tiktok_feed_api, tiktok_feed_items),
+    "instagram": (is_instagram_feed_api, instagram_feed_items),
+}
+
+
+def feed_strategy(platform):
+    # 主页就绪的标志是出现第一张卡片，错误标记沿用帖子页的
+    selector, _ = FEED_CARD_SCRIPTS[platform]
+    strategy = NAV_STRATEGIES[platform]
+    return NavStrategy(wait_until=strategy.wait_until, ready=[selector], errors=strategy.errors)
+
+
+# 打开主页一次，逐步下拉，每轮一次 evaluate 取出新渲染的卡片，处理过的卡片清空释放；
+# 结果边取边返回，到数量上限、早于截止时间或者连续几轮没有新帖子时停止
+class FeedScroll:
+    def __init__(self, page: Page, platform, url, limit=50, since=None, batch=20, detach=True, pause=1.0,
+                 idle_rounds=5, limiter=None):
+        self.page = page
+        # 每次访问平台（打开主页、一轮取卡片加下拉）前拿一次限流许可，为空时不限流
+        self.limiter = limiter or contextlib.nullcontext
+        self.platform = platform
+        self.url = url
+        self.limit = limit
+        self.since = since
+        self.batch = batch
+        self.detach = detach
+        self.pause = pause
+        self.idle_rounds = idle_rounds
+        self.count = 0
+        self.stop = None
+        self._seen = set()
+        self._api_records = []
+        self._listening = False
+
+    async def open(self):
+        if self.platform in FEED_APIS:
+            self.page.on("response", self._on_response)
+            self._listening = True
+        async with self.limiter():
+            await navigate(self.page, self.platform, self.url)
+            await wait_ready(self.page, self.platform, strategy=feed_strategy(self.platform))
+
+    async def _on_response(self, response: Response):
+        matcher, parser = FEED_APIS[self.platform]
+        if not matcher(response):
+            return
+        try:
+            self._api_records.extend(parser(await response.text(), self.url))
+        except Exception as e:
+            logging.debug(f"[{self.platform}] feed api payload parse failed: {e}")
+
+    def close(self):
+        if self._listening:
+            self.page.remove_listener("response", self._on_response)
+            self._listening = False
+
+    def _normalise(self, cards):
+        records = [FEED_CARDS[self.platform](card, self.url) for card in cards]
+        normalize_counts(records)
+        for record, push_time in zip(records, parse_dates([record.get("pushTime") for record in records])):
+            record["pushTime"] = push_time
+        return records
+
+    async def records(self):
+        selector, script = FEED_CARD_SCRIPTS[self.platform]
+        idle = older = 0
+        while True:
+            async with self.limiter():
+                result = await self.page.evaluate(script, [selector, self.batch, self.detach])
+            records, self._api_records = self._api_records, []
+            records.extend(self._normalise(result["records"]))
+            fresh = 0
+            for record in records:
+                post_id = record.get("postId")
+                if not post_id or post_id in self._seen:
+                    continue
+                self._seen.add(post_id)
+                fresh += 1
+                if self.since and record.get("pushTime") and record["pushTime"] < self.since:
+                    older += 1
+                    if older >= OLDER_STREAK:
+                        self.stop = STOP_SINCE
+                        return
+                    continue
+                older = 0
+                self.count += 1
+                yield record
+                if self.count >= self.limit:
+                    self.stop = STOP_LIMIT
+                    return
+            if len(result["records"]) >= self.batch and result["pending"]:
+                # 这一屏还有没取完的卡片，先取完再下拉
+                continue
+            idle = 0 if fresh else idle + 1
+            if idle >= self.idle_rounds:
+                self.stop = STOP_END
+                return
+            async with self.limiter():
+                await self.page.evaluate(SCROLL_JS)
+            await asyncio.sleep(self.pause)
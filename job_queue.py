@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    link TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_run_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_next_run ON jobs (status, next_run_at);
+"""
+
+
+# 基于 SQLite 的持久化任务队列：提交后立即返回任务 ID，后台 worker 按并发数消费，
+# 失败按指数退避重试，重启后把中断的 running 任务重新放回 pending
+class JobQueue:
+    def __init__(self, runner, path="jobs.db", concurrency=4, max_attempts=3, backoff=5):
+        self._runner = runner
+        self.path = path
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._db: sqlite3.Connection = None
+        self._db_lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._workers: list[asyncio.Task] = []
+
+    async def _execute(self, fn):
+        # sqlite 调用都放到线程里执行，避免磁盘 IO 阻塞事件循环
+        def run():
+            with self._db_lock:
+                with self._db:
+                    return fn(self._db)
+
+        return await asyncio.to_thread(run)
+
+    async def start(self):
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        await self._execute(lambda db: db.executescript(SCHEMA))
+        resumed = await self._execute(lambda db: db.execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?", (PENDING, time.time(), RUNNING)).rowcount)
+        if resumed:
+            logging.info(f"resume {resumed} unfinished jobs")
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        logging.info(f"job queue started, db {self.path}, {self.concurrency} workers")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._db:
+            # 停止时还在执行的任务保持 running，下次启动时恢复
+            self._db.close()
+            self._db = None
+
+    async def submit(self, items):
+        now = time.time()
+        rows = [(uuid.uuid4().hex, item["type"], item["link"], PENDING, now, now, now) for item in items]
+        await self._execute(lambda db: db.executemany(
+            "INSERT INTO jobs (id, type, link, status, next_run_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows))
+        self._wakeup.set()
+        return [row[0] for row in rows]
+
+    async def get(self, job_id):
+        row = await self._execute(lambda db: db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+        return self._to_dict(row) if row else None
+
+    async def counts(self):
+        rows = await self._execute(lambda db: db.execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: count for status, count in rows}
+
+    def _claim(self, db):
+        now = time.time()
+        row = db.execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ("
+            "SELECT id FROM jobs WHERE status = ? AND next_run_at <= ? ORDER BY next_run_at LIMIT 1"
+            ") RETURNING *", (RUNNING, now, PENDING, now)).fetchone()
+        return self._to_dict(row) if row else None
+
+    async def _work(self):
+        while True:
+            try:
+                job = await self._execute(self._claim)
+            except Exception as e:
+                logging.error(f"claim job failed: {e}")
+                job = None
+            if not job:
+                # 没有到期的任务：等新提交或者 1 秒后再查（退避中的任务到期）
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=1)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job):
+        attempts = job["attempts"] + 1
+        try:
+            result = await self._runner(job["type"], job["link"])
+            error = None if result.get("code") == 200 else result.get("message")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result, error = None, str(e)
+        now = time.time()
+        if error is None:
+            status, next_run_at = DONE, now
+        elif attempts >= self.max_attempts:
+            status, next_run_at = FAILED, now
+        else:
+            status, next_run_at = PENDING, now + self.backoff * 2 ** (attempts - 1)
+            logging.info(f"job [{job['id']}] attempt {attempts} failed, retry in {next_run_at - now:.0f}s: {error}")
+        await self._execute(lambda db: db.execute(
+            "UPDATE jobs SET status = ?, attempts = ?, next_run_at = ?, result = ?, error = ?, updated_at = ? "
+            "WHERE id = ?",
+            (status, attempts, next_run_at, json.dumps(result, ensure_ascii=False, default=str) if result else None,
+             error, now, job["id"])))
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+# 浏览器启动参数组合：stealth-headful 为原来的有界面 + slow_mo 方式，
+# headless-new 去掉界面和人为延迟，fast 在此基础上再关掉后台任务、GPU 和图片解码
+STEALTH_ARGS = ['--disable-blink-features=AutomationControlled']
+
+LAUNCH_PROFILES = {
+    "stealth-headful": {
+        "headless": False,
+        "slow_mo": 10,
+        "args": STEALTH_ARGS,
+    },
+    "headless-new": {
+        "headless": True,
+        "slow_mo": 0,
+        "args": STEALTH_ARGS + ['--headless=new'],
+    },
+    "fast": {
+        "headless": True,
+        "slow_mo": 0,
+        "args": STEALTH_ARGS + [
+            '--headless=new',
+            '--disable-gpu',
+            '--disable-extensions',
+            '--disable-background-networking',
+            '--disable-background-timer-throttling',
+            '--disable-backgrounding-occluded-windows',
+            '--disable-renderer-backgrounding',
+            '--disable-component-update',
+            '--mute-audio',
+            '--blink-settings=imagesEnabled=false',
+        ],
+    },
+}
+
+DEFAULT_LAUNCH_PROFILE = "stealth-headful"
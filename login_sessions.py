@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+
+RUNNING = "running"
+WAITING = "waiting_challenge"
+SUCCESS = "success"
+FAILED = "failed"
+
+
+@dataclass
+class LoginSession:
+    id: str
+    platform: str
+    username: str
+    status: str = RUNNING
+    message: str = ""
+    # 需要人工输入时的提示：kind（captcha / code）、prompt、image
+    challenge: dict = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float = None
+    task: asyncio.Task = None
+    _answer: asyncio.Future = None
+    _changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def to_dict(self):
+        return {
+            "sessionId": self.id,
+            "platform": self.platform,
+            "username": self.username,
+            "status": self.status,
+            "message": self.message,
+            "challenge": self.challenge,
+        }
+
+
+# 登录流程放到后台任务里跑，验证码、两步验证码通过 HTTP 接口提交给对应的会话，
+# 不再阻塞读 stdin，登录期间抓取照常进行
+class LoginSessions:
+    def __init__(self, challenge_timeout=300, keep_finished=600):
+        self.challenge_timeout = challenge_timeout
+        self.keep_finished = keep_finished
+        self._sessions: dict[str, LoginSession] = {}
+
+    def start(self, platform, username, flow):
+        self._expire()
+        session = LoginSession(uuid.uuid4().hex, platform, username)
+        self._sessions[session.id] = session
+        session.task = asyncio.create_task(self._run(session, flow))
+        return session
+
+    async def _run(self, session: LoginSession, flow):
+        try:
+            result = await flow(session)
+            if result.code == 200:
+                self._set(session, SUCCESS, result.data)
+            else:
+                self._set(session, FAILED, result.message)
+        except asyncio.CancelledError:
+            self._set(session, FAILED, "login cancelled")
+            raise
+        except Exception as e:
+            logging.error(f"[{session.platform}] [{session.username}] login failed: {e}")
+            self._set(session, FAILED, str(e))
+
+    def _set(self, session: LoginSession, status, message="", challenge=None):
+        session.status = status
+        session.message = message or ""
+        session.challenge = challenge
+        if status in (SUCCESS, FAILED):
+            session.finished_at = time.time()
+        session._changed.set()
+
+    async def challenge(self, session: LoginSession, kind, prompt, image=None, timeout=None):
+        # 登录流程里调用：挂起等待接口提交的验证码，超时抛 TimeoutError
+        session._answer = asyncio.get_running_loop().create_future()
+        self._set(session, WAITING, prompt, {"kind": kind, "prompt": prompt, "image": image})
+        logging.info(f"[{session.platform}] [{session.username}] login waiting for {kind}, session {session.id}")
+        timeout = timeout or self.challenge_timeout
+        try:
+            return await asyncio.wait_for(session._answer, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"no {kind} submitted within {timeout} seconds")
+        finally:
+            session._answer = None
+            if session.status == WAITING:
+                self._set(session, RUNNING)
+
+    def submit(self, session_id, code):
+        session = self._sessions.get(session_id)
+        if not session or session.status != WAITING or not session._answer or session._answer.done():
+            return None
+        session._answer.set_result(code)
+        self._set(session, RUNNING)
+        return session
+
+    async def wait(self, session: LoginSession, timeout):
+        # 等到登录结束或需要输入验证码，最多等 timeout 秒，返回当时的状态
+        deadline = time.monotonic() + timeout
+        while session.status == RUNNING:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            session._changed.clear()
+            try:
+                await asyncio.wait_for(session._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return session
+
+    def get(self, session_id):
+        return self._sessions.get(session_id)
+
+    def _expire(self):
+        now = time.time()
+        for session_id, session in list(self._sessions.items()):
+            if session.finished_at and now - session.finished_at > self.keep_finished:
+                del self._sessions[session_id]
+
+    async def stop(self):
+        tasks = [session.task for session in self._sessions.values() if session.task and not session.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        return {
+            status: sum(1 for session in self._sessions.values() if session.status == status)
+            for status in (RUNNING, WAITING, SUCCESS, FAILED)
+        }
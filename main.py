@@ -1,25 +1,70 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import asyncio
 import contextlib
+import functools
 
 import json
 import logging
 import multiprocessing
 import re
 import sys
-import threading
-from datetime import datetime, timedelta
-from time import sleep
-from urllib.parse import urlparse
+import time
+from contextvars import ContextVar
+from datetime import datetime
 
 from fastapi import FastAPI, Request
-from playwright.async_api import async_playwright, BrowserContext, Page
-from starlette.responses import PlainTextResponse
-
-from result import Result
-
-browser: BrowserContext = None
+from playwright.async_api import Browser, BrowserContext, Page, TimeoutError as PlaywrightTimeoutError
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+from accounts import AccountPool
+from api_extract import API_EXTRACTORS, ApiCapture
+from browser_workers import BrowserWorkerPool
+from extract_scripts import COUNTER_SCRIPTS, FB_EXTRACT_JS, INSTAGRAM_EXTRACT_JS, TIKTOK_EXTRACT_JS, X_EXTRACT_JS
+from fast_path import FAST_PATH_EXTRACTORS, FastPath
+from feed import FEED_CARDS, FeedScroll, profile_url
+from job_queue import JobQueue
+from launch_profiles import DEFAULT_LAUNCH_PROFILE, LAUNCH_PROFILES
+from login_sessions import FAILED, LoginSessions
+from metrics import Metrics, current_spans, mark_failed, mark_stage
+from navigation import navigate, wait_ready
+from normalize import adjust_tiktok_date, extract_facebook_id, extract_facebook_post_id, extract_facebook_post_link, \
+    extract_facebook_url, extract_post_id, instagram_extract_post_id, normalize_counts, parse_count_label, parse_date, \
+    parse_number, parse_relative_time
+from overlays import OverlayRegistry
+from refresh import CounterHistory, counters_delta, counters_of, parse_counters
+from resource_blocker import ResourceBlocker
+from result import Result, StatusCode
+from result_cache import ResultCache, STALE
+from singleflight import SingleFlight
+from store import PostStore
+from throttle import Throttle
+from tracing import SlowTraceRecorder
+
+PLATFORMS = ("twitter", "tiktok", "facebook", "instagram")
+MAX_BATCH_SIZE = 1000
+MAX_FEED_SIZE = 1000
+EXPORT_PREFIX_RE = re.compile(r"[\w.-]*")
+
+batch_concurrency = None
+batch_limits: dict[str, asyncio.Semaphore] = {}
+blocker = ResourceBlocker()
+overlays = OverlayRegistry()
+result_cache = ResultCache()
+flights = SingleFlight()
+scrape_metrics = Metrics()
+tracer = SlowTraceRecorder()
+throttle = Throttle()
+fast_path = FastPath()
+counter_history = CounterHistory()
+store = PostStore()
+login_sessions = LoginSessions()
+background_tasks: set[asyncio.Task] = set()
+extract_mode = "api"
+launch_profile = DEFAULT_LAUNCH_PROFILE
+profile_browsers: dict[str, BrowserWorkerPool] = {}
+request_profile: ContextVar[str] = ContextVar("request_profile", default=None)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stdout)
 
@@ -27,12 +72,22 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
     logging.info("Lifespan Start...")
+    accounts.load()
+    await store.start()
+    await jobs.start()
     try:
         yield
     finally:
         logging.info("Shutting down...")
+        await jobs.stop()
+        await store.stop()
+        await fast_path.close()
+        await login_sessions.stop()
+        await accounts.stop()
         try:
-            await close_page()
+            await browsers.stop()
+            for pool in profile_browsers.values():
+                await pool.stop()
         except Exception:
             pass
 
@@ -40,911 +95,941 @@ async def lifespan(app: FastAPI):
 app = FastAPI(lifespan=lifespan)
 
 
-async def get_browser():
-    if not browser:
-        await create_page()
-    return browser
-
-
-def instagram_extract_post_id(url):
-    # 定义正则表达式，匹配 /p/ 或 /reel/ 后的 ID
-    match = re.search(r"/(?:p|reel)/([^/]+)/", url)
-    if match:
-        return match.group(1)
-    return None
-
-
-def adjust_tiktok_date(push_time):
-    # 获取当前年份
-    current_year = datetime.now().year
-
-    # 如果日期格式是 'YYYY-MM-DD'（例如 '2024-05-01'）
-    if re.match(r"\d{4}-\d{2}-\d{2}", push_time):
-        # 直接将其转为 'YYYY-MM-DD 00:00:00'
-        return datetime.strptime(push_time, "%Y-%m-%d").strftime("%Y-%m-%d 00:00:00")
-
-    # 如果日期格式是 'M-D' 或 'MM-DD'（例如 '1-2' 或 '11-25'）
-    elif re.match(r"\d{1,2}-\d{1,2}", push_time):
-        # 使用当前年份并拼接 'YYYY-MM-DD' 格式
-        return datetime.strptime(f"{current_year}-{push_time}", "%Y-%m-%d").strftime("%Y-%m-%d 00:00:00")
-
-    elif re.match(r"\d{1,2}d ago", push_time):
-        # 使用正则提取数字（天数）
-        days_ago = int(re.match(r"(\d{1,2})d ago", push_time).group(1))
-        # 获取当前时间并减去相应的天数
-        return (datetime.now() - timedelta(days=days_ago)).strftime("%Y-%m-%d 00:00:00")
-
-    elif re.match(r"\d{1,2}h ago", push_time):
-        # 提取小时数
-        hours_ago = int(re.match(r"(\d{1,2})h ago", push_time).group(1))
-        # 返回当前时间减去相应小时数
-        return (datetime.now() - timedelta(hours=hours_ago)).strftime("%Y-%m-%d %H:%M:%S")
-
-    elif re.match(r"\d{1,2}w ago", push_time):
-        # 使用正则提取周数
-        weeks_ago = int(re.match(r"(\d{1,2})w ago", push_time).group(1))
-        return (datetime.now() - timedelta(weeks=weeks_ago)).strftime("%Y-%m-%d 00:00:00")
-
-    return push_time
+async def fetch_fast(platform, link):
+    # 不开浏览器直接请求帖子页面，HTML 里带了帖子数据就直接返回；失败返回 None 走浏览器解析。
+    # 指定了启动配置的请求本来就是要用那个浏览器配置，不走快速通道
+    if request_profile.get() is not None or not fast_path.enabled(platform):
+        return None
+    try:
+        async with throttle.slot(platform):
+            data = await fast_path.fetch(platform, link)
+    except Exception as e:
+        logging.info(f"[{platform}] fast path failed, fall back to browser: {e}")
+        return None
+    mark_stage("fetch")
+    return data
 
 
+@contextlib.asynccontextmanager
+async def acquire_page(platform, throttled=True):
+    # 先按平台限流拿到许可；平台有可用账号时在账号上下文之间轮换（账号再单独限流），
+    # 没有配置账号或者全部冷却中时用持久化用户目录里登录的账号。
+    # throttled=False 时不占许可，由调用方自己按轮次限流（主页下拉这类长时间占用页面的场景）
+    async with throttle.slot(platform) if throttled else contextlib.nullcontext():
+        if request_profile.get() is None and accounts.available(platform):
+            async with accounts.page(platform, throttled) as page:
+                yield page
+        else:
+            async with get_browsers().page(platform) as page:
+                yield page
+
+
+async def open_post(page, platform, link):
+    # api 模式下先挂响应监听再导航，接口数据先到就直接返回，否则等 DOM 就绪后走选择器解析；
+    # 就绪标记和错误标记同时等待，帖子不存在或登录墙时立即失败
+    if extract_mode != "api" or platform not in API_EXTRACTORS:
+        await navigate(page, platform, link)
+        mark_stage("goto")
+        await wait_ready(page, platform)
+        mark_stage("wait")
+        return None
+    capture = ApiCapture(page, platform, link)
+    try:
+        await navigate(page, platform, link)
+        mark_stage("goto")
+        data = await capture.race(wait_ready(page, platform))
+        mark_stage("wait")
+        if data:
+            logging.info(f"[{platform}] [{link}] extracted from api payload")
+        return data
+    finally:
+        capture.close()
+
+
+async def x_parse_page(page, link):
+    data = await open_post(page, "twitter", link)
+    if data:
+        return Result.ok(data).to_dict()
+    record = await page.evaluate(X_EXTRACT_JS)
+    mark_stage("extract")
+    profile_id = record["profileHref"] or ""
+    profile_id = profile_id.replace('/', '@')
+    username = record["username"]
+    profile_url = f"https://x.com/{profile_id.replace('@', '')}"
+    post_id = page.url.split('/')[-1]
+
+    hashtags_set = set()
+    for tag in record["hashtagHrefs"]:
+        if tag:
+            hashtags_set.add(f"#{tag.split('/hashtag/')[1].split('?')[0]}")
+    tags = list(hashtags_set)
+
+    push_content = record["content"]
+    push_time = record["datetime"]
+    if push_time:
+        push_time = datetime.fromisoformat(push_time)
+        push_time = push_time.strftime("%Y-%m-%d %H:%M:%S")
+    avatar_url = f"{profile_url}/photo"
+    # 回复、转帖、喜欢、书签、观看数都在同一个 aria-label 里
+    counts = parse_count_label(record["countLabel"])
+
+    mark_stage("normalise")
+    return Result.ok({
+        "username": username,
+        "profileId": profile_id,
+        "profileUrl": profile_url,
+        "postLink": link,
+        "postId": post_id,
+        "tags": tags,
+        "profileImage": avatar_url,
+        "pushTime": push_time,
+        "content": push_content,
+        **counts,
+    }).to_dict()
+
+
+@scrape_metrics.track("twitter")
 async def x_parse(link):
-    if not browser:
-        await create_page()
-    page = None
     try:
-        page = await browser.new_page()
-        await page.set_viewport_size({"width": 1920, "height": 1080})
-        await page.goto(link)
-        await page.wait_for_selector('//div[@data-testid="User-Name"]', timeout=10000)
-        user_info_div = page.locator('//div[@data-testid="User-Name"]')
-        user_info_div = user_info_div.locator('//a[@href]')
-        profile_id = ""
-        if user_info_div and await user_info_div.count() > 0:
-            print("user_info_div")
-            profile_id = await user_info_div.nth(0).get_attribute("href")
-            if profile_id:
-                profile_id = profile_id.replace('/', '@')
-        username = await user_info_div.locator('span span').text_content()
-        profile_url = f"https://x.com/{profile_id.replace('@', '')}"
-        post_id = page.url.split('/')[-1]
-
-        hashtags = page.locator('a[href*="/hashtag/"]')
-        hashtags_set = set()
-        if await hashtags.count() > 0:
-            for tag in await hashtags.all():
-                tag = await tag.get_attribute("href")
-                if tag:
-                    hashtags_set.add(f"#{tag.split('/hashtag/')[1].split('?')[0]}")
-        tags = list(hashtags_set)
-
-        tweet_text_div = page.locator('//div[@data-testid="tweetText"]')
-        tweet_text_div = tweet_text_div.locator('span').nth(0)
-        push_content = ""
-        if await tweet_text_div.count() > 0:
-            tweet_text_div = tweet_text_div.nth(0)
-            push_content = await tweet_text_div.text_content()
-
-        push_time = page.locator('//time[@datetime]')
-        push_time = await push_time.nth(0).get_attribute("datetime")
-        if push_time:
-            push_time = datetime.fromisoformat(push_time)
-            push_time = push_time.strftime("%Y-%m-%d %H:%M:%S")
-        avatar_url = f"{profile_url}/photo"
-        share = 0
-        likes = 0
-        loves = 0
-        comments = 0
-        views = 0
-        count_element = page.locator(
-            "//div[@role='group' and (contains(@aria-label, 'replies') or contains(@aria-label, 'reposts') or contains(@aria-label, 'likes') or contains(@aria-label, 'bookmarks') or contains(@aria-label, 'views') or contains(@aria-label, '回复') or contains(@aria-label, '次转贴') or contains(@aria-label, '喜欢') or contains(@aria-label, '书签') or contains(@aria-label, '次观看'))]")
-        if await count_element.count() > 0:
-            count_element = count_element.nth(0)
-            count_element = await count_element.get_attribute('aria-label')
-            if count_element != '':
-                count_element = count_element.split(',')
-                for item in count_element:
-                    match = re.search(r'(\d+)', item)
-                    if match:
-                        value = match.group(1)
-                        if '回复' in item or 'replies' in item:
-                            comments = value  # 获取回复的数值
-                        elif '转帖' in item or 'reposts' in item:
-                            share = value  # 获取转帖的数值
-                        elif '喜欢' in item or 'likes' in item:
-                            likes = value  # 获取喜欢的数值
-                        elif '书签' in item or 'bookmarks' in item:
-                            loves = value  # 获取书签的数值
-                        elif '观看' in item or 'views' in item:
-                            views = value  # 获取观看的数值
-
-        return Result.ok({
-            "username": username,
-            "profileId": profile_id,
-            "profileUrl": profile_url,
-            "postLink": link,
-            "postId": post_id,
-            "tags": tags,
-            "profileImage": avatar_url,
-            "pushTime": push_time,
-            "content": push_content,
-            "retweets": share,
-            "likes": likes,
-            "lovers": loves,
-            "comments": comments,
-            "views": views,
-        }).to_dict()
+        async with acquire_page("twitter") as page, tracer.capture(page, "twitter", link):
+            mark_stage("acquire")
+            return await x_parse_page(page, link)
     except Exception as e:
+        mark_failed(e)
         print(f"post parse exception:{e}")
-        await close_page()
         return Result.fail_with_msg(f"x [{link}] parse failed: {e.args[0]}")
-    finally:
-        if page:
-            await page.close()
 
 
-async def tiktok_parse(link):
-    if not browser:
-        await create_page()
-    page = None
-    try:
-        page = await browser.new_page()
-        await page.set_viewport_size({"width": 1920, "height": 1080})
-        await page.goto(link)
-
-        username = await page.wait_for_selector('xpath=//span[@data-e2e="browse-username"]', timeout=10000)
-        if username:
-            username = await username.text_content()
-        profile_url = f"https://www.tiktok.com/@{username}"
-        push_time = await page.query_selector('xpath=//span[@data-e2e="browser-nickname"]/span[3]')
-        if push_time:
-            push_time = await push_time.text_content()
+async def tiktok_parse_page(page, link):
+    data = await open_post(page, "tiktok", link)
+    if data:
+        return Result.ok(data).to_dict()
+    record = await page.evaluate(TIKTOK_EXTRACT_JS)
+    mark_stage("extract")
+    username = record["username"]
+    profile_url = f"https://www.tiktok.com/@{username}"
+    push_time = record["pushTime"]
+    if push_time:
         push_time = adjust_tiktok_date(push_time)
 
-        match = re.search(r"/video/(\d+)", page.url)
-        post_id = ""
-        if match:
-            post_id = match.group(1)
-
-        tag_links = await page.query_selector_all('xpath=//a[starts-with(@href, "/tag/")]')
-        tags = []
-        for tag in tag_links:
-            href = await tag.get_attribute('href')
-            if '/tag/' in href:
-                tag = '#' + href.split('/tag/')[1]
-                tags.append(tag)
-        avatar_url = await page.query_selector('xpath=//span[@shape="circle"]//img[@loading="lazy"]')
-        if avatar_url:
-            avatar_url = await avatar_url.get_attribute('src')
-        else:
-            avatar_url = ""
-        push_content = await page.query_selector('xpath=//h1[@data-e2e="browse-video-desc"]/span[1]')
-        if push_content:
-            push_content = await push_content.text_content()
-        else:
-            push_content = ""
-
-        likes = await page.query_selector('xpath=//strong[@data-e2e="like-count"]')
-        if likes:
-            likes = await likes.text_content()
-        likes = parse_number(likes)
-
-        comments = await page.query_selector('xpath=//strong[@data-e2e="comment-count"]')
-        if comments:
-            comments = await comments.text_content()
-        comments = parse_number(comments)
-
-        loves = await page.query_selector('xpath=//strong[@data-e2e="share-count"]')
-        if loves:
-            loves = await loves.text_content()
-        loves = parse_number(loves)
-
-        share = await page.query_selector('xpath=//strong[@data-e2e="undefined-count"]')
-        if share:
-            share = await share.text_content()
-        share = parse_number(share)
-
-        return Result.ok({
-            "username": username,
-            "profileId": username,
-            "profileUrl": profile_url,
-            "postLink": link,
-            "postId": post_id,
-            "tags": tags,
-            "profileImage": avatar_url,
-            "pushTime": push_time,
-            "content": push_content,
-            "retweets": share,
-            "likes": likes,
-            "lovers": loves,
-            "comments": comments,
-        }).to_dict()
+    post_id = extract_post_id("tiktok", page.url) or ""
+
+    tags = []
+    for href in record["tagHrefs"]:
+        if href and '/tag/' in href:
+            tags.append('#' + href.split('/tag/')[1])
+
+    mark_stage("normalise")
+    return Result.ok({
+        "username": username,
+        "profileId": username,
+        "profileUrl": profile_url,
+        "postLink": link,
+        "postId": post_id,
+        "tags": tags,
+        "profileImage": record["avatarUrl"] or "",
+        "pushTime": push_time,
+        "content": record["content"] or "",
+        "retweets": parse_number(record["shares"] or 0),
+        "likes": parse_number(record["likes"] or 0),
+        "lovers": parse_number(record["loves"] or 0),
+        "comments": parse_number(record["comments"] or 0),
+    }).to_dict()
+
+
+@scrape_metrics.track("tiktok")
+async def tiktok_parse(link):
+    data = await fetch_fast("tiktok", link)
+    if data:
+        return Result.ok(data).to_dict()
+    try:
+        async with acquire_page("tiktok") as page, tracer.capture(page, "tiktok", link):
+            mark_stage("acquire")
+            return await tiktok_parse_page(page, link)
     except Exception as e:
+        mark_failed(e)
         print(f"post parse exception:{e}")
-        await close_page()
         return Result.fail_with_msg(f"tiktok [{link}] parse failed: {e.args[0]}")
-    finally:
-        if page:
-            await page.close()
 
 
-def extract_facebook_url(profile_url):
-    if '/user/' in profile_url:
-        if profile_url.startswith("/groups/"):
-            return f"https://www.facebook.com{profile_url.split('/?')[0]}"
-        return profile_url.split('/?')[0]
+async def fb_parse_page(page, link):
+    await open_post(page, "facebook", link)
+
+    current_url = page.url
+    reel_page = '/reel/' in current_url
+    # 定位帖子、判断布局、取全部字段在页面内一次完成
+    record = await page.evaluate(FB_EXTRACT_JS, reel_page)
+    mark_stage("extract")
+    if not record:
+        return Result.fail_with_msg(f"fb {link} parse failed")
+
+    profile_url = record.get("profileHref")
+    profile_id = ""
+    if profile_url:
+        profile_url = extract_facebook_url(profile_url)
+        profile_id = extract_facebook_id(profile_url)
+    if record["layout"] == "post":
+        post_link = extract_facebook_post_link(record.get("postLink") or current_url)
+        post_id = extract_facebook_post_id(post_link)
+    else:
+        post_id = record.get("postId")
+        post_link = f"https://www.facebook.com/reel/{post_id}" if post_id else ""
+    timestamp = record.get("timestamp")
+    if timestamp:
+        timestamp = parse_relative_time(timestamp)
+
+    mark_stage("normalise")
+    return Result.ok({
+        'profileImage': record.get("avatarUrl"),
+        'username': record.get("username"),
+        'profileId': profile_id,
+        'profileUrl': profile_url,
+        'pushTime': timestamp,
+        'content': record.get("content"),
+        'postLink': post_link,
+        'postId': post_id,
+        'tags': record.get("hashtags"),
+        'likes': parse_number(record.get("likes")),
+        'comments': parse_number(record.get("comments")),
+        'retweets': parse_number(record.get("shares")),
+    })
+
+
+@scrape_metrics.track("facebook")
+async def fb_parse(link):
+    try:
+        async with acquire_page("facebook") as page, tracer.capture(page, "facebook", link):
+            mark_stage("acquire")
+            return await fb_parse_page(page, link)
+    except Exception as e:
+        mark_failed(e)
+        print(f"post parse exception:{e}")
+        return Result.fail_with_msg(f"fb [{link}] parse failed: {e.args[0]}")
 
-    if profile_url.startswith("/profile.php?id="):
-        if profile_url.startswith("/profile.php?id="):
-            return f"https://www.facebook.com{profile_url.split('&')[0]}"
 
-    if profile_url.startswith("https://l.facebook.com/l.php?u"):
-        return profile_url
+async def instagram_parse_page(page, link):
+    data = await open_post(page, "instagram", link)
+    if data:
+        return Result.ok(data)
+
+    record = await page.evaluate(INSTAGRAM_EXTRACT_JS)
+    mark_stage("extract")
+    push_time = datetime.strptime(record["datetime"], "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y-%m-%d %H:%M:%S")
+    username = record["avatarAlt"]
+    username = username.split("'s profile picture")[0] if username else ""
+    profile_url = f"https://www.instagram.com/{username}/" if username else ""
+    post_link = link
+    post_id = instagram_extract_post_id(post_link)
+    tags = set()
+    for href in record["tagHrefs"]:
+        tag_name = href.split("/explore/tags/")[1].strip("/") if href else None
+        tags.add(f"#{tag_name}")
+    tags = list(tags)
+    likes = parse_number(record["likes"])
+    mark_stage("normalise")
+    return Result.ok({
+        "username": username,
+        "profileId": username,
+        "profileUrl": profile_url,
+        "postLink": post_link,
+        "postId": post_id,
+        "tags": tags,
+        "profileImage": record["avatarUrl"],
+        "pushTime": push_time,
+        "content": "",
+        "retweets": 0,
+        "likes": likes,
+        "comments": 0,
+    })
+
+
+@scrape_metrics.track("instagram")
+async def instagram_parse(link):
+    logging.info("instagram link parse: %s", link)
+    data = await fetch_fast("instagram", link)
+    if data:
+        return Result.ok(data)
+    try:
+        async with acquire_page("instagram") as page, tracer.capture(page, "instagram", link):
+            mark_stage("acquire")
+            return await instagram_parse_page(page, link)
+    except Exception as e:
+        mark_failed(e)
+        return Result.fail_with_msg(f"instagram parse failed:{e.args[0]}")
 
-    if profile_url.startswith("https://www.facebook.com/profile.php?id="):
-        match = re.match(r'(https://www.facebook.com/profile.php\?id=\d+)', profile_url)
-        if match:
-            return match.group(1)
 
-    match = re.match(r"^https://www\.facebook\.com/([A-Za-z0-9_.-]+)\?__cft__\[\d+\]=.*", profile_url)
-    if match:
-        # 提取符合条件的基本 URL 部分
-        parsed_url = urlparse(profile_url)
-        return f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
-    return profile_url
+async def x_login(session, username: str, password: str):
+    TWITTER_LOGIN_URL = "https://x.com/i/flow/login"
+    logging.info("x login username [%s]", username)
+    try:
+        async with accounts.login_context() as context:
+            page = await context.new_page()
+            await page.set_viewport_size({"width": 1920, "height": 1080})
+            logging.info(f"GO TO {TWITTER_LOGIN_URL}")
+            await page.goto(TWITTER_LOGIN_URL)
+            user_input = page.locator('input[autocomplete="username"]')
+            await user_input.wait_for(state="visible", timeout=15000)
+            await user_input.fill(username)
+            await asyncio.sleep(1)
+            await page.locator('//button[.//span[text()="Next" or text()="下一步"]]').click()
+            password_input = page.locator('input[name="password"]')
+            await password_input.wait_for(state="visible", timeout=10000)
+            await password_input.fill(password)
+            await asyncio.sleep(1)
+            await page.locator('button[data-testid="LoginForm_Login_Button"]').click()
+            await asyncio.sleep(1)
+            # 异地登录时会要求输入邮箱验证码或手机号
+            code_input = page.locator('input[data-testid="ocfEnterTextTextInput"]')
+            try:
+                await code_input.wait_for(state="visible", timeout=5000)
+                code = await login_sessions.challenge(session, "code", "input x verification code")
+                await code_input.fill(code)
+                await page.locator('button[data-testid="ocfEnterTextNextButton"]').click()
+            except PlaywrightTimeoutError:
+                logging.warning("no x code check")
+            await page.locator('a[data-testid="AppTabBar_Home_Link"]').wait_for(state="visible", timeout=15000)
+            await accounts.save("twitter", username, context)
+    except Exception as e:
+        return Result.fail_with_msg(f"{username} login x failed:{e.args[0]}")
+    return Result.ok(f"{username} login x success")
 
 
-def extract_facebook_post_link(post_link):
-    if '/posts/' in post_link:
-        if '?__cft__' in post_link:
-            return post_link.split('?__cft__')[0]
-        return post_link.split('/?')[0]
-    return post_link
+async def fb_login(session, username: str, password: str):
+    logging.info("fb login username [%s]", username)
+    try:
+        async with accounts.login_context() as context:
+            page = await context.new_page()
+            await page.set_viewport_size({"width": 1920, "height": 1080})
+            # 设置页面的缩放比例，例如将页面内容缩放至90%
+            await page.evaluate("() => document.body.style.zoom='90%'")
+            facebook_home = "https://www.facebook.com/login/"
+            logging.info(f"GO TO {facebook_home}")
+            await page.goto(facebook_home)
+            login_button_locator = page.locator(
+                '//button[@id="loginbutton"] | //button[@data-testid="royal_login_button"]')
+            try:
+                logging.info("wait dialog cookie policy")
+                cookie_popup_div = page.locator('//div[contains(@aria-label, "拒绝使用非必要 Cookie")] | '
+                                                '//span[text()="Decline optional cookies"]')
+                if await cookie_popup_div.count() > 0:
+                    logging.info("click first cookie policy choose")
+                    await cookie_popup_div.first.wait_for(state="visible", timeout=3000)  # 等待最多3秒
+                    await cookie_popup_div.first.click()
+            except Exception as e:
+                logging.warning("No Cookie policy", e)
+            if await login_button_locator.is_visible():
+                await page.wait_for_function("window.location.href.startsWith('https://www.facebook.com/login/')",
+                                             timeout=6000 * 10 * 4)
+                logging.info("Login Page Load normal")
+
+                await page.fill('//input[@autocomplete="username"] | //input[@data-testid="royal_email"]', username)
+                await asyncio.sleep(1)
+                await page.fill('//input[@autocomplete="current-password"] | //input[@data-testid="royal_pass"]',
+                                password)
+                await asyncio.sleep(1)
+                await login_button_locator.click()
+                await page.wait_for_load_state('load', timeout=10000)  # 10秒等待加载完成
+                await asyncio.sleep(1)
+                captcha = page.locator('//img[contains(@src, "/captcha/tfbimage")]')
+                if await captcha.count() > 0:
+                    captcha_url = await captcha.get_attribute("src")
+                    logging.info(f"fb captcha:{captcha_url}")
+                    captcha_code = await login_sessions.challenge(session, "captcha", "请输入验证码",
+                                                                  image=captcha_url)
+                    captcha_input = page.locator('input[autocomplete="off"]')
+                    await captcha_input.fill(captcha_code)
+                    continue_button = page.locator('//span[text()="Continue"]')
+                    await continue_button.click()
+                    await page.wait_for_load_state('load', timeout=10000)  # 10秒等待加载完成
+
+                await page.goto("https://www.facebook.com/")
+
+            await page.wait_for_selector('input[type="search"]', timeout=10000)
+            search_input = page.locator('input[type="search"]')
+            if await search_input.count() > 0:
+                logging.info(f"{username} login fb success")
+            await accounts.save("facebook", username, context)
+    except Exception as e:
+        return Result.fail_with_msg(f"{username} login facebook failed:{e.args[0]}")
+    return Result.ok(f"{username} login facebook success")
 
 
-def extract_facebook_post_id(post_link):
-    if '/posts/' in post_link:
-        return post_link.split('/posts/')[1]
-    return post_link
+async def instagram_login(session, username: str, password: str):
+    instagram_home = "https://www.instagram.com/login"
+    try:
+        async with accounts.login_context() as context:
+            page: Page = await context.new_page()
+            await page.set_viewport_size({"width": 1920, "height": 1080})
+            await page.evaluate("() => document.body.style.zoom='90%'")
+            print(f"GO TO {instagram_home}")
+            await page.goto(instagram_home)
+            login_button_xpath = '//button[.//div[text()="Log in"]]'
+            await page.wait_for_selector(login_button_xpath, timeout=5000)
+            login_button_locator = page.locator(login_button_xpath)
+            if await login_button_locator.is_visible():
+                user_name_input_xpath = '//input[@name="username"]'
+                await page.fill(user_name_input_xpath, username)
+                await asyncio.sleep(1)
+
+                password_input_xpath = '//input[@name="password"]'
+                await page.fill(password_input_xpath, password)
+                await asyncio.sleep(1)
+
+                await login_button_locator.click()
+                await asyncio.sleep(1)
+
+                save_info_button = '//button[.//div[text()="Save info"]]'
+                save_button_locator = page.locator(save_info_button)
+                if await save_button_locator.is_visible():
+                    await save_button_locator.click()
+                await asyncio.sleep(1)
+            input_code = page.locator('input[type="text"][value=""][name="email"]')
+            try:
+                await page.wait_for_selector('input[type="text"][value=""][name="email"]', timeout=5000)
+                has_code_check = await input_code.count() > 0
+            except PlaywrightTimeoutError:
+                logging.warning("no instagram code check")
+                has_code_check = False
+            if has_code_check:
+                captcha_code = await login_sessions.challenge(session, "code", "input instagram code")
+                await input_code.fill(captcha_code)
+                continue_button = page.locator('//span[text()="Continue"]')
+                await continue_button.click()
 
+            home_span = page.locator("//span[text()='Home' or text()='主页']")
+            await home_span.wait_for(state="visible", timeout=5000)  # 等待元素可见
+            await accounts.save("instagram", username, context)
+    except Exception as e:
+        # 验证码没有按时提交（TimeoutError）和 x、facebook 一样返回失败结果
+        return Result.fail_with_msg(f"instagram [{username}] login failed:{e.args[0]}")
+    return Result.ok(f"instagram [{username}] login success")
 
-def extract_facebook_id(profile_url):
-    if profile_url.startswith("https://www.facebook.com/profile.php?id="):
-        match = re.search(r'id=(\d+)', profile_url)
-        if match:
-            return match.group(1)  # 返回匹配的 id 值
-    if '/user/' in profile_url:
-        return profile_url.split('/user/')[1]
 
-    match = re.match(r"^https://www\.facebook\.com/([A-Za-z0-9_.-]+)$", profile_url)
+LOGIN_FLOWS = {
+    "instagram": instagram_login,
+    "facebook": fb_login,
+    "x": x_login,
+}
 
-    if match:
-        # 提取用户名部分
-        return match.group(1)
 
-    return profile_url
+def login_result(session):
+    if session.status == FAILED:
+        return Result.fail(session.to_dict(), session.message)
+    return Result.ok(session.to_dict())
 
 
-async def fb_parse(link):
-    if not browser:
-        await create_page()
-    page = None
-    try:
-        page = await browser.new_page()
-        await page.set_viewport_size({"width": 1920, "height": 1080})
-        await page.goto(link)
+@app.get("/login")
+async def login(platform: str, username: str, password: str, wait: float = 30):
+    # 登录在后台会话里进行：等到结束或需要验证码就返回，验证码通过 /login/{session_id}/challenge 提交
+    if platform not in LOGIN_FLOWS:
+        return Result.fail_with_msg(f"not support platform:{platform}")
+    flow = LOGIN_FLOWS[platform]
+    session = login_sessions.start(platform, username, lambda session: flow(session, username, password))
+    return login_result(await login_sessions.wait(session, wait))
+
+
+@app.get("/login/{session_id}")
+async def login_status(session_id: str, wait: float = 0):
+    session = login_sessions.get(session_id)
+    if not session:
+        return Result.fail_with_msg(f"login session not found:{session_id}")
+    return login_result(await login_sessions.wait(session, wait))
+
+
+@app.post("/login/{session_id}/challenge")
+async def login_challenge(session_id: str, request: Request, wait: float = 30):
+    data = json.loads(await request.body())
+    code = data.get("code") if isinstance(data, dict) else None
+    if not code:
+        return Result.fail_with_msg("code is empty")
+    session = login_sessions.submit(session_id, str(code))
+    if not session:
+        return Result.fail_with_msg(f"login session {session_id} is not waiting for a code")
+    return login_result(await login_sessions.wait(session, wait))
 
-        try:
-            await page.wait_for_selector('//div[@aria-label="Close"]', timeout=2000)
-            element = await page.query_selector('//div[@aria-label="Close"]')
-            if element:
-                await element.click()
-        except Exception as e:
-            logging.info(f"no login dialog: {e.args[0]}")
-
-        current_url = page.url
-        reel_page = '/reel/' in current_url
-        if reel_page:
-            post = await page.query_selector('div[data-pagelet="Reels"]')
-            if post:
-                post = await post.evaluate_handle("""
-                 (element) => {
-                     return element.parentElement;
-                 }
-             """)
-            if not post:
-                return Result.fail_with_msg(f"fb {link} parse failed")
-        else:
-            post = await page.query_selector('xpath=//div[@aria-posinset="1"]')
-            if not post:
-                post = await page.query_selector('xpath=//div[@aria-posinset="2"]')
-        is_reels = await post.evaluate("""
-        (element) => {
-            return element.querySelector('[data-pagelet="Reels"]') !== null;
-        }
-        """)
-        if is_reels:
-            avatar_url = await post.evaluate("""
-            (element) => {
-             const avatarImage = element.querySelector('svg[aria-label="头像"][data-visualcompletion="ignore-dynamic"] image');
-                 if (avatarImage) {
-                    return avatarImage.getAttribute('xlink:href');
-                 }
-                return null;
-            }
-            """)
-            if reel_page:
-                username = await post.evaluate("""
-                        (element) => {
-                            const elements = element.querySelectorAll('a[aria-label="查看所有者个人主页"]');
-                            if (elements.length > 1) {
-                                return elements[1].textContent.trim();  // 获取第二个元素的文本内容
-                            }
-                            return '';
-                        }
-                    """)
-            else:
-                username = await post.evaluate("""
-                    (element)=>{
-                         const divElement = Array.from(element.querySelectorAll('span')).find(span =>   span.textContent.includes('短视频') || span.textContent.includes('Reels'));
-                             if (divElement) {
-                               const objectElement = divElement.querySelector('object[type="nested/pressable"]');
-                               if (objectElement) {
-                                 const aElement = objectElement.querySelector('a');
-                                 if (aElement) {
-                                   return aElement.textContent.trim();
-                                 }
-                               }
-                             }
-                         return ''; 
-                    }
-                    """)
-
-            post_id = await post.evaluate("""
-             (element) => {
-                 const videoElement = element.querySelector('div[data-video-id]');
-                 if (videoElement) {
-                   return videoElement.getAttribute('data-video-id');
-                 }
-                 return null; 
-             }
-            """)
-            post_link = ""
-            if post_id:
-                post_link = f"https://www.facebook.com/reel/{post_id}"
-            profile_url = await post.evaluate("""
-              (element) => {
-                const linkElement = element.querySelector('a[aria-label="查看所有者个人主页"]');
-                if (linkElement) {
-                  return linkElement.getAttribute('href');
-                }
-                return null;
-              }
-            """)
-            if profile_url:
-                if reel_page:
-                    profile_url = extract_facebook_url(profile_url)
-                else:
-                    profile_url = extract_facebook_url(profile_url)
-            profile_id = extract_facebook_id(profile_url)
-
-            timestamp = await page.query_selector(
-                'xpath=//span[contains(text(), "分钟") or contains(text(), "小时") or contains(text(), "天") or contains(text(), "月") or contains(text(), "年")]')
-            if timestamp:
-                timestamp = await timestamp.text_content()
-                if timestamp:
-                    timestamp = timestamp.strip()
-                timestamp = await parse_relative_time(timestamp)
-            post_content = await post.evaluate("""
-                (element) => {
-                    const reelsDiv = element.querySelector('div[data-pagelet="Reels"]');
-                    if (!reelsDiv) {
-                        return '';
-                    }
-            
-                    const nextSiblingDiv = reelsDiv.nextElementSibling;
-                    if (!nextSiblingDiv) {
-                        return ''; 
-                    }
-                    return nextSiblingDiv.textContent.trim();
-                }
-                """)
-            hashtags = await post.evaluate("""
-              (element) => {
-                const results = [];
-                const aTags = element.querySelectorAll('a[href*="hashtag"]');
-                aTags.forEach(aTag => {
-                    if (aTag.textContent.startsWith('#')) {
-                        results.push(aTag.textContent.trim());
-                    }
-                });
-                return [...new Set(results)]; 
-            }
-            """)
-        else:
-            profile_url = await post.evaluate(
-                """     (element) => {       
-                        const profileLinkElement = element.querySelector('[data-ad-rendering-role="profile_name"] a');    
-                        return profileLinkElement ? profileLinkElement.href : null;  
-                } """)
-            profile_id = ""
-            if profile_url:
-                profile_url = extract_facebook_url(profile_url)
-                profile_id = extract_facebook_id(profile_url)
-            username = await post.evaluate("""
-                (element) => {
-                    const profileNameElement = element.querySelector('[data-ad-rendering-role="profile_name"] span a span');
-                    return profileNameElement ? profileNameElement.innerText : null;
-                }
-            """)
-            avatar_url = await post.evaluate("""
-                (element) => {
-                    const svgImage = element.querySelector('svg[data-visualcompletion="ignore-dynamic"] image');
-                    return svgImage ? svgImage.getAttribute('xlink:href') : null;
-                }
-            """)
-            post_link = await post.evaluate("""
-                (element) => {
-                const aTag = element.querySelector('a[role="link"][href*="/posts/"]');
-                return aTag ? aTag.href : null;
-                }
-             """)
-            if not post_link:
-                post_link = current_url
-            post_link = extract_facebook_post_link(post_link)
-            post_id = extract_facebook_post_id(post_link)
-            timestamp = await post.query_selector_all(
-                'xpath=//a[contains(@aria-label, "小时") or contains(@aria-label, "分钟") or contains(@aria-label, "天") or contains(@aria-label, "月") or contains(@aria-label, "年")]')
-            if timestamp:
-                timestamp = await timestamp[0].get_attribute('aria-label')
-            if timestamp:
-                timestamp = await parse_relative_time(timestamp)
-            post_content = await post.evaluate("""
-            (element) => {
-                const contentDiv = element.querySelector('div[data-ad-rendering-role="story_message"]');
-                return contentDiv ? contentDiv.innerText : null;
-            }
-            """)
-            hashtags = await post.evaluate("""
-            (element) => {
-                const contentDiv = element.querySelector('div[data-ad-rendering-role="story_message"]');
-                if (!contentDiv) return [];
-    
-                const tags = contentDiv.querySelectorAll('a');
-                let tagArray = [];
-                tags.forEach(tag => {
-                    if (tag && tag.href && tag.href.includes('hashtag')) {
-                        tagArray.push(tag.innerText);
-                    }
-                });
-                return tagArray;
-            }
-            """)
-        if reel_page:
-            # 获取 class 为指定值的第 3、4、5 个 div 元素
-            like_count = 0
-            comments = 0
-            share = 0
-            div_elements = await page.query_selector_all(
-                'xpath=//div[@class="x9f619 x1n2onr6 x1ja2u2z x78zum5 xdt5ytf x2lah0s x193iq5w x1xmf6yo x1e56ztr xzboxd6 x14l7nz5"][position() >= 3 and position() <= 5]')
-            for div_element in div_elements:
-                aria_label_div = await div_element.query_selector('div[aria-label="赞"]')
-                if aria_label_div:
-                    like_count = await div_element.text_content()
-                    if not like_count.strip():
-                        like_count = 0
-                aria_label_div = await div_element.query_selector('div[aria-label="评论"]')
-                if aria_label_div:
-                    comments = await div_element.text_content()
-                    if not comments.strip():
-                        comments = 0
-                aria_label_div = await div_element.query_selector('div[aria-label="分享"]')
-                if aria_label_div:
-                    share = await div_element.text_content()
-                    if not like_count.strip():
-                        share = 0
 
-        else:
-            like_count = await post.evaluate("""
-                (element) => {
-                    const posts = Array.from(element.querySelectorAll('div[role="button"]'));
-                    for (let post of posts) {
-                        if (post.textContent.includes('所有心情：')) {
-                            const siblingSpan = post.querySelector('span span');
-                            if (siblingSpan && siblingSpan.textContent.trim() !== '') {
-                            return siblingSpan.textContent.trim();
-                            }
-                        }
-                    }
-                   const targetSpan = element.querySelector('span[aria-hidden="true"] span.x1e558r4');
-                    if (targetSpan) {
-                        return targetSpan.textContent.trim();
-                    }
-                    return 0;
-                }
-                """)
-            comments = await post.evaluate("""
-                (element) => {
-                        const spans = Array.from(element.querySelectorAll('span'));
-                        for (let span of spans) {
-                        if (span.textContent.includes('条评论')) {
-                            const match = span.textContent.match(/(.*?)条评论/);
-                            if (match) {
-                                return match[1];
-                            }
-                        }
-                        if (span.textContent.includes('comments') ) {
-                            const match = span.textContent.match(/(.*?)comments/);
-                            if (match) {
-                                return match[1];
-                            }
-                        }
-                    }
-                    return 0;
-                }
-                """)
-            share = await post.evaluate("""
-            (element) => {
-                    const spans = Array.from(element.querySelectorAll('span'));
-                    for (let span of spans) {
-                    if (span.textContent.includes('次分享')) {
-                        const match = span.textContent.match(/(.*?)次分享/);
-                        if (match) {
-                            return match[1];
-                        }
-                    }
-                    if (span.textContent.includes('share')) {
-                        const match = span.textContent.match(/(.*?)share/);
-                        if (match) {
-                            return match[1];
-                        }
-                    }
-                }
-                return 0;
-            }
-            """)
-
-        like_count = parse_number(like_count)
-        comments = parse_number(comments)
-        share = parse_number(share)
-        return Result.ok({
-            'profileImage': avatar_url,
-            'username': username,
-            'profileId': profile_id,
-            'profileUrl': profile_url,
-            'pushTime': timestamp,
-            'content': post_content,
-            'postLink': post_link,
-            'postId': post_id,
-            'tags': hashtags,
-            'likes': like_count,
-            'comments': comments,
-            'retweets': share,
-        })
+@app.get("/health", response_class=PlainTextResponse)
+async def health(request: Request):
+    return 'ok'
 
-    except Exception as e:
-        print(f"post parse exception:{e}")
-        await close_page()
-        return Result.fail_with_msg(f"fb [{link}] parse failed: {e.args[0]}")
-    finally:
-        if page:
-            await page.close()
 
+@app.get("/stats")
+async def stats():
+    return Result.ok({
+        "browsers": {profile: pool.stats() for profile, pool in browser_pools().items()},
+        "blocked": blocker.stats(),
+        "overlays": overlays.stats(),
+        "cache": result_cache.stats(),
+        "singleFlight": flights.stats(),
+        "jobs": await jobs.counts(),
+        "traces": tracer.stats(),
+        "logins": login_sessions.stats(),
+        "accounts": accounts.stats(),
+        "limits": throttle.stats(),
+        "fastPath": fast_path.stats(),
+        "counterHistory": counter_history.stats(),
+        "store": store.stats(),
+    })
+
+
+@app.get("/limits")
+async def limits():
+    return Result.ok(throttle.stats())
+
+
+@app.get("/accounts")
+async def list_accounts():
+    return Result.ok(accounts.stats())
+
+
+@app.post("/accounts/enable")
+async def enable_account(request: Request):
+    # 人工处理完（重新登录、过了限流期）后把账号放回轮换
+    data = json.loads(await request.body())
+    account = accounts.enable(data.get("platform"), data.get("name"))
+    if not account:
+        return Result.fail_with_msg(f"account not found:{data.get('platform')}/{data.get('name')}")
+    return Result.ok(account.to_dict())
+
+
+def browser_pools():
+    return {launch_profile: browsers, **profile_browsers}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    restarts, open_pages, waiting = [], [], []
+    for profile, pool in browser_pools().items():
+        for worker in pool.workers:
+            labels = {"profile": profile, "worker": worker.name}
+            restarts.append((labels, worker.counters["restarts"]))
+            waiting.append((labels, worker.waiting))
+            for platform, pages in worker.pools.items():
+                page_stats = pages.stats()
+                open_pages.append(({**labels, "platform": platform}, page_stats["idle"] + page_stats["inUse"]))
+    job_counts = await jobs.counts()
+    limits = throttle.stats()["limits"]
+    return scrape_metrics.render([
+        ("scraper_browser_restarts_total", "counter", "Browser restarts after browser level errors.", restarts),
+        ("scraper_open_pages", "gauge", "Pages currently open in the page pools.", open_pages),
+        ("scraper_page_waiters", "gauge", "Requests waiting for a free page.", waiting),
+        ("scraper_job_queue_depth", "gauge", "Jobs in the job queue by status.",
+         [({"status": status}, job_counts.get(status, 0)) for status in ("pending", "running")]),
+        ("scraper_singleflight_inflight", "gauge", "Parses currently in flight.",
+         [({}, flights.stats()["inFlight"])]),
+        ("scraper_throttle_concurrency", "gauge", "Current adaptive concurrency limit per platform or account.",
+         [({"key": key}, item["limit"]) for key, item in limits.items()]),
+        ("scraper_throttle_rate", "gauge", "Current scrapes per second allowed per platform or account.",
+         [({"key": key}, item["rate"]) for key, item in limits.items()]),
+        ("scraper_throttle_waiting", "gauge", "Scrapes waiting for a throttle slot.",
+         [({"key": key}, item["waiting"]) for key, item in limits.items()]),
+    ])
+
+
+PARSERS = {
+    "instagram": instagram_parse,
+    "facebook": fb_parse,
+    "tiktok": tiktok_parse,
+    "twitter": x_parse,
+}
+
+# 在给定页面上导航并解析，录制/回放和基准测试直接用它们，不经过浏览器池
+PAGE_PARSERS = {
+    "instagram": instagram_parse_page,
+    "facebook": fb_parse_page,
+    "tiktok": tiktok_parse_page,
+    "twitter": x_parse_page,
+}
+
+
+def post_cache_key(type_, link):
+    # 同一个帖子的不同链接形式（带参数、带用户名等）落到同一个缓存键
+    if type_ == "facebook":
+        post_id = extract_facebook_post_id(extract_facebook_post_link(link))
+    else:
+        post_id = extract_post_id(type_, link)
+    if not post_id:
+        post_id = link.split('?')[0].rstrip('/')
+    return f"{type_}:{post_id}"
 
-def parse_number(number_text):
-    if isinstance(number_text, (int, float)):
-        return number_text
 
-    number_text = re.sub(r"(likes?|次赞)", "", number_text.strip(), flags=re.IGNORECASE)
-    if not number_text or not number_text.strip():
-        return 0
+def post_id_of(key, data):
+    # 入库用解析出来的 postId，解析结果里没有时才用链接里取的缓存键
+    return (data or {}).get("postId") or key.split(':', 1)[1]
 
-    number_text = number_text.replace(",", "").replace(" ", "").strip()
 
-    match = re.match(r"(\d+(\.\d+)?)\s?万", number_text)
-    if match:
-        return int(float(match.group(1)) * 10000)
+async def parse_and_cache(type_, link, key):
+    result = result_dict(await PARSERS[type_](link))
+    if result.get("code") == StatusCode.SUCCESS[0]:
+        result_cache.put(key, type_, result)
+        counter_history.put(key, counters_of(result["data"]))
+        store.record_post(type_, post_id_of(key, result["data"]), result["data"])
+    return result
 
-    match_k = re.match(r"(\d+(\.\d+)?)\s?K", number_text, re.IGNORECASE)
-    if match_k:
-        return int(float(match_k.group(1)) * 1000)
 
-    match_m = re.match(r"(\d+(\.\d+)?)\s?M", number_text, re.IGNORECASE)
-    if match_m:
-        return int(float(match_m.group(1)) * 1000000)
+async def parse_once(type_, link, key):
+    # 相同帖子的并发请求合并成一次解析
+    return await flights.do(key, lambda: parse_and_cache(type_, link, key), type_)
 
-    # 如果没有 '万'，直接转为整数
-    try:
-        return int(number_text)
-    except ValueError:
-        return 0
-
-
-async def parse_relative_time(relative_str):
-    now = datetime.now()
-
-    time_units = {
-        '分钟': 'minutes',
-        '小时': 'hours',
-        '天': 'days',
-    }
-
-    # 使用正则表达式提取数字和单位
-    match = re.match(r'(\d+)(分钟|小时|天)', relative_str)
-    if match:
-        value, unit = match.groups()
-        value = int(value)
-        if unit in time_units:
-            delta = timedelta(**{time_units[unit]: value})
-            return (now - delta).strftime('%Y-%m-%d %H:%M:%S')
-
-    match = re.match(r'(\d{4})年(\d{1,2})月(\d{1,2})日(\d{1,2}):(\d{2})', relative_str)
-    if match:
-        year, month, day, hour, minute = map(int, match.groups())
-        try:
-            return datetime(year, month, day, hour, minute).strftime('%Y-%m-%d %H:%M:%S')
-        except ValueError:
-            pass
 
-    match = re.match(r'(\d{1,2})月(\d{1,2})日', relative_str)
-    if match:
-        month, day = map(int, match.groups())
-        year = now.year
-        # 如果当前月份小于给定月份，则认为是上一年
-        if now.month < month or (now.month == month and now.day < day):
-            year -= 1
+def refresh_in_background(type_, link, key):
+    if flights.running(key):
+        return
+
+    async def refresh():
         try:
-            return datetime(year, month, day, 0, 0).strftime('%Y-%m-%d %H:%M:%S')
-        except ValueError:
-            pass
+            await parse_once(type_, link, key)
+        except Exception as e:
+            logging.warning(f"refresh cache [{key}] failed: {e}")
 
-    return now.strftime('%Y-%m-%d %H:%M:%S')
+    task = asyncio.create_task(refresh())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
 
 
-async def instagram_parse(link):
-    logging.info("instagram link parse: %s", link)
-    if not browser:
-        await create_page()
-    page = None
+async def scrape_link(type_, link, use_cache=True, profile=None):
+    if type_ not in PARSERS:
+        return Result.fail_with_msg(f"not support platform:{type_}")
+    if profile and profile not in LAUNCH_PROFILES:
+        return Result.fail_with_msg(f"not support launch profile:{profile}")
+    if profile and profile != launch_profile:
+        # 指定启动配置的请求不走缓存，也不和默认配置的请求合并
+        token = request_profile.set(profile)
+        try:
+            return await flights.do(f"{post_cache_key(type_, link)}@{profile}", lambda: PARSERS[type_](link), type_)
+        finally:
+            request_profile.reset(token)
+    key = post_cache_key(type_, link)
+    if use_cache and result_cache.enabled(type_):
+        cached, state = result_cache.get(key)
+        if state == STALE:
+            # 过期但在 stale 窗口内：先返回旧数据，后台刷新
+            refresh_in_background(type_, link, key)
+        if cached:
+            return cached
+    return await parse_once(type_, link, key)
+
+
+async def scrape_timed(type_, link, use_cache=True, profile=None):
+    # 记录本次解析各分段耗时随结果返回；命中缓存或合并到别的请求时没有分段
+    spans = []
+    token = current_spans.set(spans)
+    started = time.perf_counter()
     try:
-        page = await browser.new_page()
-        await page.set_viewport_size({"width": 1920, "height": 1080})
-        await page.goto(link)
+        result = result_dict(await scrape_link(type_, link, use_cache, profile))
+    finally:
+        current_spans.reset(token)
+    return {**result, "timings": {"totalMs": round((time.perf_counter() - started) * 1000, 1), "spans": spans}}
 
-        try:
-            await page.wait_for_selector('svg[aria-label="Close"]', timeout=2000)
-            close_button = page.locator('svg[aria-label="Close"]')
-            await close_button.click()
-        except:
-            pass
 
-        push_datetime = await page.locator("(//time)[last()]").get_attribute("datetime")
-        push_time = datetime.strptime(push_datetime, "%Y-%m-%dT%H:%M:%S.%fZ").strftime("%Y-%m-%d %H:%M:%S")
-        # 点赞数量
-        likes = page.locator(
-            "(//a[span[contains(text(), 'likes') or contains(text(), 'like') or contains(text(), '次赞')]])")
-        if await likes.count() > 0:
-            likes = await likes.text_content()
-        else:
-            likes = page.locator(
-                "(//a[span[contains(text(), 'likes') or contains(text(), 'like') or contains(text(), '次赞')]]/span/span)")
-            if await likes.count() > 0:
-                likes = await likes.text_content()
-            else:
-                likes = 0
-
-        avatar_url = await page.locator("(//img[contains(@alt, 'profile picture')])[1]").get_attribute("src")
-        username = await page.locator("(//img[contains(@alt, 'profile picture')])[1]").get_attribute("alt")
-        username = username.split("'s profile picture")[0] if username else ""
-        profile_url = f"https://www.instagram.com/{username}/" if username else ""
-        post_link = link
-        post_id = instagram_extract_post_id(post_link)
-        tag_links = await page.locator("//a[contains(@href, '/explore/tags/')]").all()
-        tags = set()
-        for tag in tag_links:
-            href = await tag.get_attribute("href")
-            tag_name = href.split("/explore/tags/")[1].strip("/") if href else None
-            tags.add(f"#{tag_name}")
-        tags = list(tags)
-        await page.close()
-        likes = parse_number(likes)
-        return Result.ok({
-            "username": username,
-            "profileId": username,
-            "profileUrl": profile_url,
-            "postLink": post_link,
-            "postId": post_id,
-            "tags": tags,
-            "profileImage": avatar_url,
-            "pushTime": push_time,
-            "content": "",
-            "retweets": 0,
-            "likes": likes,
-            "comments": 0,
-        })
-    except Exception as e:
-        await close_page()
-        return Result.fail_with_msg(f"instagram parse failed:{e.args[0]}")
-    finally:
-        if page:
-            await page.close()
+def result_dict(result):
+    if isinstance(result, Result):
+        return result.to_dict()
+    return result
 
 
-async def x_login(username: str, password: str):
-    TWITTER_LOGIN_URL = "https://x.com/i/flow/login"
+@app.get("/scrape")
+async def scrape(request: Request):
+    body = await request.body()
+    data = json.loads(body)
 
+    link = data.get("link")
+    type_ = data.get("type")
+    logging.info(f"parse [{type_}] link [{link}]")
+    if data.get("timings"):
+        return await scrape_timed(type_, link, data.get("cache", True), data.get("profile"))
+    return await scrape_link(type_, link, data.get("cache", True), data.get("profile"))
 
-async def fb_login(username: str, password: str):
-    logging.info("fb login username [%s]", username)
-    browser_ = await get_browser()
-    try:
-        page = await browser_.new_page()
-    except Exception as e:
-        await close_page()
-        return Result.fail_with_msg(f"new page failed:{e.args[0]}")
-    try:
-        await page.set_viewport_size({"width": 1920, "height": 1080})
-        # 设置页面的缩放比例，例如将页面内容缩放至90%
-        await page.evaluate("() => document.body.style.zoom='90%'")
-        facebook_home = "https://www.facebook.com/login/"
-        logging.info(f"GO TO {facebook_home}")
-        await page.goto(facebook_home)
-        login_button_locator = page.locator('//button[@id="loginbutton"] | //button[@data-testid="royal_login_button"]')
-        try:
-            logging.info("wait dialog cookie policy")
-            cookie_popup_div = page.locator(
-                '//div[contains(@aria-label, "拒绝使用非必要 Cookie")] | //span[text()="Decline optional cookies"]')
-            if await cookie_popup_div.count() > 0:
-                logging.info("click first cookie policy choose")
-                await cookie_popup_div.first.wait_for(state="visible", timeout=3000)  # 等待最多3秒
-                await cookie_popup_div.first.click()
-        except Exception as e:
-            logging.warning("No Cookie policy", e)
-        if await login_button_locator.is_visible():
-            await page.wait_for_function("window.location.href.startsWith('https://www.facebook.com/login/')",
-                                         timeout=6000 * 10 * 4)
-            logging.info("Login Page Load normal")
-
-            await page.fill('//input[@autocomplete="username"] | //input[@data-testid="royal_email"]', username)
-            sleep(1)
-            await page.fill('//input[@autocomplete="current-password"] | //input[@data-testid="royal_pass"]', password)
-            sleep(1)
-            await login_button_locator.click()
-            await page.wait_for_load_state('load', timeout=10000)  # 10秒等待加载完成
-            sleep(1)
-            captcha = page.locator('//img[contains(@src, "/captcha/tfbimage")]')
-            if await captcha.count() > 0:
-                captcha_url = await captcha.get_attribute("src")
-                logging.info(f"fb captcha:{captcha_url}")
-                captcha_code = input("请输入验证码: ")
-                captcha_input = page.locator('input[autocomplete="off"]')
-                await captcha_input.fill(captcha_code)
-                continue_button = page.locator('//span[text()="Continue"]')
-                await continue_button.click()
-                await page.wait_for_load_state('load', timeout=10000)  # 10秒等待加载完成
 
-            await page.goto("https://www.facebook.com/")
+def get_batch_limit(type_):
+    if type_ not in batch_limits:
+        batch_limits[type_] = asyncio.Semaphore(batch_concurrency or browsers.capacity)
+    return batch_limits[type_]
 
-        await page.wait_for_selector('input[type="search"]', timeout=10000)
-        search_input = page.locator('input[type="search"]')
-        if await search_input.count() > 0:
-            logging.info(f"{username} login fb success")
 
-    except Exception as e:
-        return Result.fail_with_msg(f"{username} login facebook failed:{e.args[0]}")
-    finally:
-        await page.close()
-    return Result.ok(f"{username} login facebook success")
+def check_item(type_, link):
+    # 批量里每一条单独校验，不合法的只让这一条失败
+    if not link:
+        return Result.fail_with_msg("link is empty")
+    if not isinstance(link, str):
+        return Result.fail_with_msg(f"link is not a string:{link}")
+    if not isinstance(type_, str) or type_ not in PARSERS:
+        return Result.fail_with_msg(f"not support platform:{type_}")
+    return None
 
 
-async def instagram_login(username: str, password: str):
-    browser_ = await get_browser()
-    instagram_home = "https://www.instagram.com/login"
-    page: Page = await browser_.new_page()
+async def scrape_batch_item(index, item):
+    link = item.get("link") if isinstance(item, dict) else None
+    type_ = item.get("type") if isinstance(item, dict) else None
+    result = check_item(type_, link)
+    if result is None:
+        try:
+            # 每个平台单独限流，一个平台的慢请求不会占满其他平台的并发
+            async with get_batch_limit(type_):
+                scrape_fn = scrape_timed if item.get("timings") else scrape_link
+                result = await scrape_fn(type_, link, item.get("cache", True), item.get("profile"))
+        except Exception as e:
+            # 一条出错只记在这一条上，不能打断整个 NDJSON 响应
+            logging.warning(f"batch item [{type_}] [{link}] failed: {e}")
+            result = Result.fail_with_msg(f"{type_} [{link}] parse failed: {e}")
+    return {"index": index, "type": type_, "link": link, **result_dict(result)}
+
+
+@app.post("/scrape/batch")
+async def scrape_batch(request: Request):
+    data = json.loads(await request.body())
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return Result.fail_with_msg("items is empty")
+    if len(items) > MAX_BATCH_SIZE:
+        return Result.fail_with_msg(f"too many items:{len(items)}, max {MAX_BATCH_SIZE}")
+    logging.info(f"batch parse {len(items)} links")
+
+    async def stream():
+        tasks = [asyncio.create_task(scrape_batch_item(i, item)) for i, item in enumerate(items)]
+        try:
+            # 哪个先解析完就先返回哪个，不等整批结束
+            for task in asyncio.as_completed(tasks):
+                yield json.dumps(await task, ensure_ascii=False, default=str) + "\n"
+        finally:
+            # 客户端断开时取消剩下的任务
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/posts")
+async def list_posts(platform: str = None, limit: int = 100, offset: int = 0):
+    if not store.enabled:
+        return Result.fail_with_msg("post store is disabled")
+    return Result.ok(await store.posts(platform, min(limit, 1000), offset))
+
+
+@app.get("/posts/{platform}/{post_id}")
+async def post_latest(platform: str, post_id: str):
+    # 帖子最新一份完整记录和最新一次计数
+    if not store.enabled:
+        return Result.fail_with_msg("post store is disabled")
+    post = await store.latest(platform, post_id)
+    if not post:
+        return Result.fail_with_msg(f"post not found:{platform}/{post_id}")
+    return Result.ok(post)
+
+
+@app.get("/posts/{platform}/{post_id}/history")
+async def post_history(platform: str, post_id: str, since: float = None, until: float = None, limit: int = 1000):
+    # 计数的时间序列，since / until 是秒级时间戳
+    if not store.enabled:
+        return Result.fail_with_msg("post store is disabled")
+    return Result.ok(await store.history(platform, post_id, since, until, min(limit, 10000)))
+
+
+@app.post("/posts/export")
+async def export_posts(request: Request):
+    if not store.enabled:
+        return Result.fail_with_msg("post store is disabled")
+    # 导出目录只能由启动参数指定，请求里最多带一个文件名前缀
+    data = json.loads(await request.body() or b"{}")
+    prefix = data.get("prefix") or ""
+    if not isinstance(prefix, str) or not EXPORT_PREFIX_RE.fullmatch(prefix) or ".." in prefix:
+        return Result.fail_with_msg(f"invalid prefix:{prefix}")
     try:
-        await page.set_viewport_size({"width": 1920, "height": 1080})
-        await page.evaluate("() => document.body.style.zoom='90%'")
-        print(f"GO TO {instagram_home}")
-        await page.goto(instagram_home)
-        login_button_xpath = '//button[.//div[text()="Log in"]]'
-        await page.wait_for_selector(login_button_xpath, timeout=5000)
-        login_button_locator = page.locator(login_button_xpath)
-        if await login_button_locator.is_visible():
-            user_name_input_xpath = '//input[@name="username"]'
-            await page.fill(user_name_input_xpath, username)
-            sleep(1)
-
-            password_input_xpath = '//input[@name="password"]'
-            await page.fill(password_input_xpath, password)
-            sleep(1)
-
-            await login_button_locator.click()
-            sleep(1)
-
-            save_info_button = '//button[.//div[text()="Save info"]]'
-            save_button_locator = page.locator(save_info_button)
-            if await save_button_locator.is_visible():
-                await save_button_locator.click()
-            sleep(1)
+        return Result.ok(await store.export_parquet(prefix))
+    except Exception as e:
+        return Result.fail_with_msg(f"export failed: {e}")
+
+
+async def counters_page(page, platform, link):
+    # 只读计数：api 模式下接口数据先到就从接口数据里取，否则一次 evaluate 只取计数字段，
+    # 不取头像、用户名、正文和话题
+    data = await open_post(page, platform, link)
+    if data:
+        return counters_of(data), data.get("postId"), "api"
+    record = await page.evaluate(COUNTER_SCRIPTS[platform], '/reel/' in page.url)
+    mark_stage("extract")
+    if not record:
+        raise ValueError("post not found on page")
+    if platform == "twitter":
+        return parse_count_label(record["countLabel"]), None, "dom"
+    return normalize_counts([record])[0], None, "dom"
+
+
+async def refresh_counters(type_, link):
+    # 有快速通道的平台先走 HTTP，不开标签页
+    data = await fetch_fast(type_, link)
+    if data:
+        return counters_of(data), data.get("postId"), "http"
+    async with acquire_page(type_) as page:
+        return await counters_page(page, type_, link)
+
+
+async def refresh_link(type_, link, previous=None):
+    invalid = check_item(type_, link)
+    if invalid:
+        return invalid
+    if previous is not None:
+        previous = parse_counters(previous)
+        if previous is None:
+            return Result.fail_with_msg("previous must be an object of numeric counters")
+    key = post_cache_key(type_, link)
+    try:
+        counters, post_id, source = await flights.do(f"{key}#counters", lambda: refresh_counters(type_, link), type_)
+    except Exception as e:
+        logging.warning(f"refresh [{type_}] [{link}] failed: {e}")
+        return Result.fail_with_msg(f"{type_} [{link}] refresh failed: {e}")
+    # 调用方没带上次的值时，用本进程里最近一次解析或刷新到的计数，进程里没有再查库
+    post_id = post_id or key.split(':', 1)[1]
+    previous_at = None
+    last = counter_history.get(key)
+    if previous is None and not last:
+        last = await store.last_counters(type_, post_id)
+    if previous is None and last:
+        previous, previous_at = last
+    # 先按上次的值算好增量再写入本次计数
+    delta = counters_delta(counters, previous)
+    counter_history.put(key, counters)
+    store.record_counters(type_, post_id, counters)
+    return Result.ok({
+        "postId": post_id,
+        "postLink": link,
+        "counters": counters,
+        "previous": previous,
+        "previousAt": datetime.fromtimestamp(previous_at).strftime("%Y-%m-%d %H:%M:%S") if previous_at else None,
+        "delta": delta,
+        "source": source,
+    })
+
+
+@app.post("/refresh")
+async def refresh(request: Request):
+    # 已知帖子只更新点赞、评论、转发、观看数，返回和上次相比的增量；items 批量时按完成顺序以 NDJSON 返回
+    data = json.loads(await request.body())
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return await refresh_link(data.get("type"), data.get("link"), data.get("previous"))
+    if not items:
+        return Result.fail_with_msg("items is empty")
+    if len(items) > MAX_BATCH_SIZE:
+        return Result.fail_with_msg(f"too many items:{len(items)}, max {MAX_BATCH_SIZE}")
+    logging.info(f"refresh {len(items)} links")
+
+    async def refresh_item(index, item):
+        item = item if isinstance(item, dict) else {}
         try:
-            await page.wait_for_selector('input[type="text"][value=""][name="email"]', timeout=5000)
-            input_code = page.locator('input[type="text"][value=""][name="email"]')
-            if await input_code.count() > 0:
-                captcha_code = await get_input_with_timeout("input instagram code: ", 60)
-                await input_code.fill(captcha_code)
-                continue_button = page.locator('//span[text()="Continue"]')
-                await continue_button.click()
-        except:
-            logging.warning("no instagram code check")
+            result = await refresh_link(item.get("type"), item.get("link"), item.get("previous"))
+        except Exception as e:
+            logging.warning(f"refresh item [{item.get('type')}] [{item.get('link')}] failed: {e}")
+            result = Result.fail_with_msg(f"{item.get('type')} [{item.get('link')}] refresh failed: {e}")
+        return {"index": index, "type": item.get("type"), "link": item.get("link"), **result.to_dict()}
 
-        home_span = page.locator("//span[text()='Home' or text()='主页']")
-        await home_span.wait_for(state="visible", timeout=5000)  # 等待元素可见
-        await page.close()
-    except Exception as e:
-        await close_page()
-        return Result.fail_with_msg(f"instagram [{username}] login failed:{e.args[0]}")
-    finally:
-        if page:
-            await page.close()
-    return Result.ok(f"instagram [{username}] login success")
+    async def stream():
+        tasks = [asyncio.create_task(refresh_item(i, item)) for i, item in enumerate(items)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield json.dumps(await task, ensure_ascii=False, default=str) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
-async def get_input_with_timeout(prompt, timeout):
-    result = []
+@app.post("/feed")
+async def scrape_feed(request: Request):
+    # 按主页抓帖子：打开一次主页往下翻，结果逐条以 NDJSON 返回，最后一行是停止原因
+    data = json.loads(await request.body())
+    type_ = data.get("type")
+    profile = data.get("profile")
+    if not isinstance(type_, str) or type_ not in FEED_CARDS:
+        return Result.fail_with_msg(f"not support platform:{type_}")
+    if not profile:
+        return Result.fail_with_msg("profile is empty")
+    if not isinstance(profile, str):
+        return Result.fail_with_msg(f"profile is not a string:{profile}")
+    limit = data.get("limit", 50)
+    if isinstance(limit, str) and limit.isdigit():
+        limit = int(limit)
+    if not isinstance(limit, int) or isinstance(limit, bool) or limit <= 0:
+        return Result.fail_with_msg(f"invalid limit:{data.get('limit')}")
+    limit = min(limit, MAX_FEED_SIZE)
+    since = data.get("since")
+    if since:
+        since = parse_date(since) if isinstance(since, str) else None
+        if not since:
+            return Result.fail_with_msg(f"invalid since:{data.get('since')}")
+    url = profile_url(type_, profile)
+    logging.info(f"feed [{type_}] profile [{url}] limit {limit} since {since}")
+
+    async def stream():
+        count, stop, message = 0, None, None
+        try:
+            # 整个下拉过程不占平台许可，否则几分钟的耗时会被当成一次慢请求把平台并发减半；
+            # 改为打开主页和每一轮取卡片、下拉各占一次许可
+            async with acquire_page(type_, throttled=False) as page:
+                feed = FeedScroll(page, type_, url, limit, since, detach=data.get("detach", True),
+                                  limiter=functools.partial(throttle.slot, type_))
+                try:
+                    await feed.open()
+                    async for record in feed.records():
+                        store.record_post(type_, record["postId"], record, "feed")
+                        yield json.dumps({"index": count, **record}, ensure_ascii=False, default=str) + "\n"
+                        count += 1
+                finally:
+                    feed.close()
+                stop = feed.stop
+        except Exception as e:
+            logging.error(f"feed [{type_}] [{url}] failed: {e}")
+            stop, message = "error", str(e)
+        yield json.dumps({"done": True, "count": count, "stop": stop, "message": message}, ensure_ascii=False) + "\n"
 
-    def input_thread():
-        user_input = input(prompt)
-        result.append(user_input)
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
-    thread = threading.Thread(target=input_thread)
-    thread.daemon = True
-    thread.start()
 
-    thread.join(timeout)
-    if result:
-        return result[0]
-    else:
-        raise TimeoutError(f"User did not input within {timeout} seconds.")
+async def run_job(type_, link):
+    return result_dict(await scrape_link(type_, link))
 
 
-@app.get("/login")
-async def login(platform: str, username: str, password: str):
-    if platform == "instagram":
-        return await instagram_login(username, password)
-    if platform == "facebook":
-        return await fb_login(username, password)
-    if platform == "x":
-        return await  x_login(username, password)
+jobs = JobQueue(run_job)
 
 
-@app.get("/health", response_class=PlainTextResponse)
-async def health(request: Request):
-    return 'ok'
+@app.post("/jobs")
+async def submit_jobs(request: Request):
+    data = json.loads(await request.body())
+    items = data.get("items", [data]) if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return Result.fail_with_msg("items is empty")
+    for item in items:
+        if not isinstance(item, dict) or not item.get("link"):
+            return Result.fail_with_msg(f"link is empty: {item}")
+        if item.get("type") not in PARSERS:
+            return Result.fail_with_msg(f"not support platform:{item.get('type')}")
+    ids = await jobs.submit(items)
+    logging.info(f"submit {len(ids)} jobs")
+    return Result.ok({"ids": ids})
 
 
-@app.get("/scrape")
-async def scrape(request: Request):
-    body = await request.body()
-    data = json.loads(body)
+@app.get("/jobs")
+async def job_counts():
+    return Result.ok(await jobs.counts())
 
-    link = data.get("link")
-    type_ = data.get("type")
-    logging.info(f"parse [{type_}] link [{link}]")
-    if type_ == "instagram":
-        return await instagram_parse(link)
-    if type_ == "facebook":
-        return await fb_parse(link)
-    if type_ == "tiktok":
-        return await tiktok_parse(link)
-    if type_ == "twitter":
-        return await x_parse(link)
 
-    return Result.fail_with_msg(f"not support platform:{type_}")
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = await jobs.get(job_id)
+    if not job:
+        return Result.fail_with_msg(f"job not found:{job_id}")
+    return Result.ok(job)
 
 
 def parse_args():
     global chrome_cache
     global chrome_exe
+    global batch_concurrency
+    global blocker
+    global extract_mode
+    global launch_profile
+    global throttle
 
     print("parse args")
     parser = argparse.ArgumentParser(
@@ -964,6 +1049,201 @@ def parse_args():
             type=str,
             help="exe Path.",
         )
+
+        parser.add_argument(
+            "--profile",
+            type=str,
+            choices=list(LAUNCH_PROFILES),
+            default=DEFAULT_LAUNCH_PROFILE,
+            help="Browser launch profile, can be overridden per request with \"profile\".",
+        )
+
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=2,
+            help="Pre-warmed pages per platform.",
+        )
+
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Browser processes, each with its own profile cloned from --cache. 0 means one per cpu core.",
+        )
+
+        parser.add_argument(
+            "--profiles-dir",
+            type=str,
+            help="Where worker profiles are cloned to, defaults to <cache>-workers.",
+        )
+
+        parser.add_argument(
+            "--batch-concurrency",
+            type=int,
+            help="Concurrent scrapes per platform for batch requests, defaults to pool size * workers.",
+        )
+
+        parser.add_argument(
+            "--block-config",
+            type=str,
+            help="Json file overriding per-platform resource blocking rules.",
+        )
+
+        parser.add_argument(
+            "--no-block",
+            action="store_true",
+            help="Load every resource, disable resource blocking.",
+        )
+
+        parser.add_argument(
+            "--extract-mode",
+            type=str,
+            choices=["api", "dom"],
+            default="api",
+            help="Read posts from api/hydration payloads first (api) or only from the rendered DOM (dom).",
+        )
+
+        parser.add_argument(
+            "--cache-ttl",
+            type=int,
+            default=300,
+            help="Seconds a scraped post is served from cache, 0 disables the cache.",
+        )
+
+        parser.add_argument(
+            "--cache-platform-ttl",
+            type=str,
+            help="Per-platform cache ttl, e.g. twitter=60,facebook=600.",
+        )
+
+        parser.add_argument(
+            "--cache-max-mb",
+            type=int,
+            default=64,
+            help="Memory bound of the result cache.",
+        )
+
+        parser.add_argument(
+            "--cache-stale",
+            type=int,
+            default=0,
+            help="Seconds an expired post may still be served while it is refreshed in background.",
+        )
+
+        parser.add_argument(
+            "--trace-slow-ms",
+            type=int,
+            default=0,
+            help="Save a Playwright trace for scrapes slower than this, 0 to disable.",
+        )
+
+        parser.add_argument(
+            "--trace-dir",
+            type=str,
+            default="traces",
+            help="Directory for slow scrape traces.",
+        )
+
+        parser.add_argument(
+            "--trace-keep",
+            type=int,
+            default=20,
+            help="Number of newest trace files kept in --trace-dir.",
+        )
+
+        parser.add_argument(
+            "--accounts-dir",
+            type=str,
+            default="accounts",
+            help="Directory of saved account storage states, one sub directory per platform.",
+        )
+
+        parser.add_argument(
+            "--account-cooldown",
+            type=int,
+            default=300,
+            help="Seconds a rate limited account stays out of rotation, doubled on repeated hits.",
+        )
+
+        parser.add_argument(
+            "--fast-path",
+            type=str,
+            default="",
+            help="Comma separated platforms fetched over plain HTTP before opening a browser tab (tiktok,instagram).",
+        )
+
+        parser.add_argument(
+            "--fast-path-origin",
+            type=str,
+            help="Send fast path requests to this origin instead of the platform, e.g. a local fixture server.",
+        )
+
+        parser.add_argument(
+            "--fast-path-timeout",
+            type=int,
+            default=10,
+            help="Seconds before a fast path request gives up and falls back to the browser.",
+        )
+
+        parser.add_argument(
+            "--throttle-config",
+            type=str,
+            help="Json file overriding per-platform and per-account rate and concurrency limits.",
+        )
+
+        parser.add_argument(
+            "--no-throttle",
+            action="store_true",
+            help="Disable adaptive rate limiting.",
+        )
+
+        parser.add_argument(
+            "--store-db",
+            type=str,
+            default="posts.db",
+            help="Sqlite file keeping scraped posts and their counter history.",
+        )
+
+        parser.add_argument(
+            "--no-store",
+            action="store_true",
+            help="Do not keep scraped posts.",
+        )
+        parser.add_argument(
+            "--export-dir",
+            type=str,
+            default="export",
+            help="Directory POST /posts/export writes parquet files to.",
+        )
+
+        parser.add_argument(
+            "--jobs-db",
+            type=str,
+            default="jobs.db",
+            help="Sqlite file backing the job queue.",
+        )
+
+        parser.add_argument(
+            "--job-workers",
+            type=int,
+            default=4,
+            help="Jobs processed concurrently.",
+        )
+
+        parser.add_argument(
+            "--job-retries",
+            type=int,
+            default=3,
+            help="Attempts per job before it is marked failed.",
+        )
+
+        parser.add_argument(
+            "--job-backoff",
+            type=int,
+            default=5,
+            help="Seconds before the first retry, doubled on every attempt.",
+        )
     except Exception as e:
         print(f"Error retrieving environment variables: {e}")
         print(json.dumps(Result.fail_with_msg(f"Error retrieving environment variables:").to_dict()))
@@ -972,6 +1252,47 @@ def parse_args():
     args = parser.parse_args()
     chrome_cache = args.cache
     chrome_exe = args.exe
+    launch_profile = args.profile
+    browsers.setup(args.workers, args.pool_size, chrome_cache, args.profiles_dir)
+    batch_concurrency = args.batch_concurrency
+    if args.block_config:
+        blocker = ResourceBlocker.from_file(args.block_config)
+    blocker.enabled = not args.no_block
+    extract_mode = args.extract_mode
+    result_cache.default_ttl = args.cache_ttl
+    if args.cache_platform_ttl:
+        for item in args.cache_platform_ttl.split(','):
+            platform, ttl = item.split('=')
+            result_cache.platform_ttl[platform.strip()] = int(ttl)
+    result_cache.max_bytes = args.cache_max_mb * 1024 * 1024
+    result_cache.stale_ttl = args.cache_stale
+    jobs.path = args.jobs_db
+    jobs.concurrency = args.job_workers
+    jobs.max_attempts = args.job_retries
+    jobs.backoff = args.job_backoff
+    store.path = None if args.no_store else args.store_db
+    store.export_dir = args.export_dir
+    tracer.threshold_ms = args.trace_slow_ms
+    tracer.directory = args.trace_dir
+    tracer.keep = args.trace_keep
+    accounts.directory = args.accounts_dir
+    accounts.cooldown = args.account_cooldown
+    accounts.pool_size = args.pool_size
+    if args.throttle_config:
+        throttle = Throttle.from_file(args.throttle_config)
+        accounts.throttle = throttle
+    throttle.enabled = not args.no_throttle
+    fast_path.platforms = {platform.strip() for platform in args.fast_path.split(',') if platform.strip()}
+    unsupported = fast_path.platforms - set(FAST_PATH_EXTRACTORS)
+    if unsupported:
+        print(json.dumps(Result.fail_with_msg(f"fast path not supported for:{','.join(sorted(unsupported))}").to_dict()))
+        sys.exit(1)
+    if fast_path.platforms and not fast_path.available:
+        logging.error("--fast-path needs httpx, install it with: pip install httpx")
+        print(json.dumps(Result.fail_with_msg("--fast-path needs httpx").to_dict()))
+        sys.exit(1)
+    fast_path.origin = args.fast_path_origin
+    fast_path.timeout = args.fast_path_timeout
 
     if not chrome_exe:
         print(json.dumps(Result.fail_with_msg(f"cache is empty").to_dict()))
@@ -986,39 +1307,63 @@ def main():
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
 
-async def close_page():
-    global browser
-    if playwright:
-        try:
-            await playwright.stop()
-        except Exception as e:
-            logging.error(f"Error stopping Playwright: {e}")
-    browser = None
-
-
-async def create_page():
-    logging.info("create playwright browser")
-    global playwright, browser
-    playwright = await async_playwright().start()
+async def launch_browser(playwright, user_data_dir, profile=None) -> BrowserContext:
+    options = LAUNCH_PROFILES[profile or launch_profile]
     browser = await playwright.chromium.launch_persistent_context(  # 指定本机用户缓存地址
         channel="chrome",
-        user_data_dir=chrome_cache,
+        user_data_dir=user_data_dir,
         # 指定本机google客户端exe的路径
         executable_path=chrome_exe,
         # 要想通过这个下载文件这个必然要开  默认是False
         accept_downloads=True,
-        # 设置不是无头模式
-        headless=False,
+        # 是否无头、slow_mo 和启动参数由启动配置决定
+        headless=options["headless"],
         bypass_csp=True,
-        slow_mo=10,
+        slow_mo=options["slow_mo"],
         locale='en-SG',
-        # 跳过检测
-        args=['--disable-blink-features=AutomationControlled'])
+        args=options["args"])
     await browser.grant_permissions(["notifications"], origin="https://www.facebook.com/")
     await browser.grant_permissions(["notifications"], origin="https://www.instagram.com/")
     await browser.grant_permissions(["notifications"], origin="https://x.com/")
     await browser.grant_permissions(["notifications"], origin="https://www.tiktok.com/")
-    logging.info("Browser launched successfully.")
+    await tracer.install(browser)
+    return browser
+
+
+async def setup_page(page, platform):
+    await blocker.install(page, platform)
+    # 弹窗在后台出现时自动关闭，取数不再固定等待
+    await overlays.install(page, platform)
+
+
+browsers = BrowserWorkerPool(launch_browser, PLATFORMS, page_setup=setup_page)
+
+
+async def launch_account_browser(playwright) -> Browser:
+    # 账号上下文用的普通浏览器，登录态来自各账号的 storage state，不需要用户目录
+    options = LAUNCH_PROFILES[launch_profile]
+    return await playwright.chromium.launch(
+        channel="chrome",
+        executable_path=chrome_exe,
+        headless=options["headless"],
+        slow_mo=options["slow_mo"],
+        args=options["args"])
+
+
+accounts = AccountPool(launch_account_browser, page_setup=setup_page, context_setup=tracer.install,
+                       throttle=throttle)
+
+
+def get_browsers():
+    # 请求指定了其他启动配置时，用该配置单独启动的一组浏览器
+    profile = request_profile.get()
+    if not profile or profile == launch_profile:
+        return browsers
+    if profile not in profile_browsers:
+        pool = BrowserWorkerPool(functools.partial(launch_browser, profile=profile), PLATFORMS, setup_page)
+        pool.setup(1, browsers.pool_size, chrome_cache, browsers.profiles_dir, name=profile, share_base=False)
+        profile_browsers[profile] = pool
+    return profile_browsers[profile]
 
 
 if __name__ == '__main__':
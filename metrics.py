@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from navigation import NavigationError
+
+# 秒；覆盖从几十毫秒的取数到十几秒的整页加载
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f"{name}_bucket{format_labels({**labels, 'le': bound})} {cumulative}"
+        yield f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {self.count}"
+        yield f"{name}_sum{format_labels(labels)} {self.sum:.6f}"
+        yield f"{name}_count{format_labels(labels)} {self.count}"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{escape_label(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def failure_reason(e):
+    if isinstance(e, NavigationError):
+        return e.kind
+    if isinstance(e, PlaywrightTimeoutError):
+        return "timeout"
+    if isinstance(e, PlaywrightError):
+        return "browser"
+    return "exception"
+
+
+# 一次解析的分段计时：每次 mark 记录距上一次 mark 的耗时
+class StageTimer:
+    def __init__(self, metrics, platform):
+        self.metrics = metrics
+        self.platform = platform
+        self.reason = None
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.metrics.observe(self.platform, stage, now - self._last)
+        spans = current_spans.get()
+        if spans is not None:
+            spans.append({"platform": self.platform, "stage": stage, "ms": round((now - self._last) * 1000, 1)})
+        self._last = now
+
+    def fail(self, e):
+        self.reason = failure_reason(e)
+
+
+current_timer: ContextVar[StageTimer] = ContextVar("current_timer", default=None)
+# 请求要求返回 timings 时设置，解析过程中的每个分段都追加进来
+current_spans: ContextVar[list] = ContextVar("current_spans", default=None)
+
+
+def mark_stage(stage):
+    timer = current_timer.get()
+    if timer:
+        timer.mark(stage)
+
+
+def mark_failed(e):
+    timer = current_timer.get()
+    if timer:
+        timer.fail(e)
+
+
+# 进程内汇总，/metrics 按 Prometheus 文本格式输出，不依赖客户端库
+class Metrics:
+    def __init__(self):
+        self.stages: dict[tuple, Histogram] = {}
+        self.totals: dict[str, Histogram] = {}
+        self.outcomes = Counter()
+
+    def observe(self, platform, stage, seconds):
+        key = (platform, stage)
+        if key not in self.stages:
+            self.stages[key] = Histogram()
+        self.stages[key].observe(seconds)
+
+    def track(self, platform):
+        # 包住平台解析函数：设置本次解析的计时器，结束时按结果记成功或失败原因
+        def decorator(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                timer = StageTimer(self, platform)
+                token = current_timer.set(timer)
+                started = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception as e:
+                    timer.fail(e)
+                    self.finish(platform, started, timer.reason)
+                    raise
+                finally:
+                    current_timer.reset(token)
+                code = result.get("code") if isinstance(result, dict) else getattr(result, "code", None)
+                self.finish(platform, started, None if code == 200 else timer.reason or "empty")
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def finish(self, platform, started, reason):
+        if platform not in self.totals:
+            self.totals[platform] = Histogram()
+        self.totals[platform].observe(time.perf_counter() - started)
+        if reason:
+            self.outcomes[(platform, "failure", reason)] += 1
+        else:
+            self.outcomes[(platform, "success", "")] += 1
+
+    def render(self, gauges=()):
+        # gauges: (name, type, help, [(labels, value), ...])，由调用方在导出时现取
+        lines = [
+            "# HELP scraper_stage_seconds Time spent in each scrape stage.",
+            "# TYPE scraper_stage_seconds histogram",
+        ]
+        for (platform, stage), histogram in sorted(self.stages.items()):
+            lines.extend(histogram.lines("scraper_stage_seconds", {"platform": platform, "stage": stage}))
+        lines.append("# HELP scraper_parse_seconds Total time of one parse.")
+        lines.append("# TYPE scraper_parse_seconds histogram")
+        for platform, histogram in sorted(self.totals.items()):
+            lines.extend(histogram.lines("scraper_parse_seconds", {"platform": platform}))
+        lines.append("# HELP scraper_parse_total Parses by outcome and failure reason.")
+        lines.append("# TYPE scraper_parse_total counter")
+        for (platform, outcome, reason), count in sorted(self.outcomes.items()):
+            lines.append(f"scraper_parse_total{format_labels({'platform': platform, 'outcome': outcome, 'reason': reason})} {count}")
+        for name, type_, help_, samples in gauges:
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {type_}")
+            for labels, value in samples:
+                lines.append(f"{name}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
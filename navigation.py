@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from playwright.async_api import Error as PlaywrightError, Page
+
+
+class NavigationError(Exception):
+    def __init__(self, kind, message):
+        super().__init__(message)
+        self.kind = kind
+
+
+@dataclass
+class NavStrategy:
+    # goto 在 commit / domcontentloaded 就返回，不等图片等子资源加载完
+    wait_until: str
+    # 出现即说明帖子已渲染，可以开始取数
+    ready: list
+    # kind -> 选择器，出现即说明帖子不存在、需要登录等，直接失败
+    errors: dict = field(default_factory=dict)
+
+
+NAV_STRATEGIES = {
+    "twitter": NavStrategy(
+        wait_until="commit",
+        ready=['//div[@data-testid="User-Name"]'],
+        errors={
+            "not_found": ['//div[@data-testid="error-detail"]', '//div[@data-testid="emptyState"]'],
+            "login_wall": ['//div[@data-testid="sheetDialog"]//a[@href="/login"]'],
+        },
+    ),
+    "tiktok": NavStrategy(
+        wait_until="commit",
+        ready=['//span[@data-e2e="browse-username"]'],
+        errors={
+            "not_found": ['//p[contains(text(), "Video currently unavailable")]',
+                          '//p[contains(text(), "视频目前不可用")]'],
+            "captcha": ['#captcha-verify-container', 'div.captcha_verify_container'],
+        },
+    ),
+    "facebook": NavStrategy(
+        wait_until="domcontentloaded",
+        ready=['//div[@aria-posinset="1"]', '//div[@aria-posinset="2"]', 'div[data-pagelet="Reels"]'],
+        errors={
+            "not_found": ['//span[contains(text(), "This content isn\'t available")]',
+                          '//span[contains(text(), "目前无法查看此内容")]'],
+            "login_wall": ['//form[@id="login_form"]', '//div[@id="login_popup_cta_form"]'],
+            "rate_limit": ['//span[contains(text(), "You\'re Temporarily Blocked")]',
+                           '//span[contains(text(), "你暂时被禁止使用此功能")]'],
+        },
+    ),
+    "instagram": NavStrategy(
+        wait_until="commit",
+        ready=['time[datetime]'],
+        errors={
+            "not_found": ['//span[contains(text(), "Sorry, this page isn\'t available")]',
+                          '//span[contains(text(), "抱歉，此页面无法访问")]'],
+            "login_wall": ['//form[@id="loginForm"]'],
+            "rate_limit": ['//*[contains(text(), "Please wait a few minutes before you try again")]'],
+        },
+    ),
+}
+
+# 在页面内用 MutationObserver 同时等待所有标记，谁先出现返回谁，整个等待只有一次往返
+RACE_MARKERS_JS = """
+([markers, timeout]) => new Promise((resolve) => {
+    const find = (selector) => {
+        if (selector.startsWith('/') || selector.startsWith('(')) {
+            return document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        return document.querySelector(selector);
+    };
+    const check = () => markers.find(marker => find(marker.selector));
+    let observer = null;
+    let scheduled = false;
+    const finish = (marker) => {
+        if (observer) {
+            observer.disconnect();
+        }
+        clearTimeout(timer);
+        resolve(marker ? {kind: marker.kind, selector: marker.selector} : null);
+    };
+    const timer = setTimeout(() => finish(check()), timeout);
+    const hit = check();
+    if (hit) {
+        finish(hit);
+        return;
+    }
+    observer = new MutationObserver(() => {
+        // DOM 变化很频繁，合并到 50ms 检查一次
+        if (scheduled) {
+            return;
+        }
+        scheduled = true;
+        setTimeout(() => {
+            scheduled = false;
+            const hit = check();
+            if (hit) {
+                finish(hit);
+            }
+        }, 50);
+    });
+    observer.observe(document, {childList: true, subtree: true, characterData: true});
+})
+"""
+
+
+def strategy_markers(strategy: NavStrategy):
+    markers = [{"kind": "ready", "selector": selector.removeprefix("xpath=")} for selector in strategy.ready]
+    for kind, selectors in strategy.errors.items():
+        markers.extend({"kind": kind, "selector": selector.removeprefix("xpath=")} for selector in selectors)
+    return markers
+
+
+async def wait_ready(page: Page, platform, timeout=10000, strategy=None):
+    strategy = strategy or NAV_STRATEGIES[platform]
+    markers = strategy_markers(strategy)
+    deadline = time.monotonic() + timeout / 1000
+    while True:
+        remaining = int((deadline - time.monotonic()) * 1000)
+        if remaining <= 0:
+            raise NavigationError("timeout", f"wait ready timeout {timeout}ms")
+        try:
+            hit = await page.evaluate(RACE_MARKERS_JS, [markers, remaining])
+            break
+        except PlaywrightError as e:
+            # commit 之后页面可能还会跳转，旧文档里的等待被打断时在新文档里重新等
+            if "context was destroyed" not in str(e) and "navigation" not in str(e).lower():
+                raise
+            await asyncio.sleep(0.05)
+    if not hit:
+        raise NavigationError("timeout", f"wait ready timeout {timeout}ms")
+    if hit["kind"] != "ready":
+        raise NavigationError(hit["kind"], f"{hit['kind']}: {hit['selector']}")
+    return hit
+
+
+async def navigate(page: Page, platform, link):
+    response = await page.goto(link, wait_until=NAV_STRATEGIES[platform].wait_until)
+    if response and response.status == 429:
+        raise NavigationError("rate_limit", f"http 429: {link}")
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+
+import re
+from datetime import datetime, timedelta
+
+# 数量：一个正则整体匹配「可选单位词 + 数字（可带千分位）+ 可选倍数 + 可选单位词」
+COUNT_WORDS = (r"(?:likes?|views?|plays?|comments?|replies|reply|shares?|reposts?|bookmarks?|"
+               r"次赞|个赞|次播放|次观看|条评论|次分享|次转发|次收藏)")
+COUNT_RE = re.compile(rf"\s*{COUNT_WORDS}?\s*(\d[\d, \u00a0\u202f]*?(?:\.\d+)?)\s?(万|亿|[kmb])?\s*{COUNT_WORDS}?\s*", re.I)
+COUNT_SEPARATORS = str.maketrans("", "", ", \u00a0\u202f")
+COUNT_MULTIPLIERS = {
+    None: 1,
+    "万": 10_000,
+    "亿": 100_000_000,
+    "k": 1_000,
+    "m": 1_000_000,
+    "b": 1_000_000_000,
+}
+
+# X 的互动数 aria-label，如 "12 replies, 3 reposts, 1,024 likes, 5 bookmarks, 2.1万 次观看"：
+# 一次 findall 取出 (数字, 倍数, 单位词)，单位词查表得到字段
+X_COUNT_LABEL_RE = re.compile(r"(\d[\d,.]*)\s?(万|亿|[kmb](?![a-z]))?[\s次条个]*([^\d\s,，、]+)", re.I)
+X_COUNT_FIELDS = {
+    "回复": "comments", "replies": "comments", "reply": "comments",
+    "转帖": "retweets", "转贴": "retweets", "repost": "retweets", "reposts": "retweets", "转推": "retweets",
+    "喜欢": "likes", "like": "likes", "likes": "likes",
+    "书签": "lovers", "bookmark": "lovers", "bookmarks": "lovers",
+    "观看": "views", "view": "views", "views": "views",
+}
+COUNT_FIELDS = ("likes", "comments", "retweets", "lovers", "views")
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+CLOCK = r"(?:\s*(?:at\s+)?(?P<{0}_hour>\d{{1,2}}):(?P<{0}_minute>\d{{2}})\s*(?P<{0}_ampm>am|pm)?)?"
+RELATIVE_UNITS = {
+    "s": "seconds", "sec": "seconds", "secs": "seconds", "second": "seconds", "seconds": "seconds", "秒": "seconds",
+    "m": "minutes", "min": "minutes", "mins": "minutes", "minute": "minutes", "minutes": "minutes", "分钟": "minutes",
+    "h": "hours", "hr": "hours", "hrs": "hours", "hour": "hours", "hours": "hours", "小时": "hours",
+    "d": "days", "day": "days", "days": "days", "天": "days",
+    "w": "weeks", "wk": "weeks", "wks": "weeks", "week": "weeks", "weeks": "weeks", "周": "weeks", "星期": "weeks",
+    "mo": "months", "month": "months", "months": "months", "个月": "months",
+    "y": "years", "yr": "years", "yrs": "years", "year": "years", "years": "years", "年": "years",
+}
+# 月、年按 30、365 天近似
+RELATIVE_SECONDS = {
+    "seconds": 1, "minutes": 60, "hours": 3600, "days": 86400, "weeks": 604800,
+    "months": 30 * 86400, "years": 365 * 86400,
+}
+RELATIVE_UNIT = "|".join(sorted((re.escape(unit) for unit in RELATIVE_UNITS), key=len, reverse=True))
+
+# 日期格式按顺序拼成一个带命名分组的正则，一次匹配后按命中的分组名分派处理
+DATE_FORMATS = (
+    ("iso", r"(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})"
+            r"(?:[ t](?P<iso_hour>\d{1,2}):(?P<iso_minute>\d{2})(?::(?P<iso_second>\d{2}))?)?"),
+    ("zh_full", r"(?P<zh_full_year>\d{4})年(?P<zh_full_month>\d{1,2})月(?P<zh_full_day>\d{1,2})日"
+                + CLOCK.format("zh_full")),
+    ("zh_day", r"(?P<zh_day_month>\d{1,2})月(?P<zh_day_day>\d{1,2})日" + CLOCK.format("zh_day")),
+    ("month_day", r"(?P<month_day_month>\d{1,2})-(?P<month_day_day>\d{1,2})"),
+    ("yesterday", r"(?P<yesterday_word>yesterday|昨天)" + CLOCK.format("yesterday")),
+    ("today", r"(?P<today_word>today|今天)" + CLOCK.format("today")),
+    ("now", r"just now|now|刚刚"),
+    ("relative", rf"(?P<relative_value>\d+)\s*(?P<relative_unit>{RELATIVE_UNIT})(?![a-z])\s*(?:ago|前|之前)?"),
+    ("en_month_first", rf"(?P<en_month_first_month>{MONTH})\s+(?P<en_month_first_day>\d{{1,2}})(?:st|nd|rd|th)?"
+                       rf"(?:,?\s+(?P<en_month_first_year>\d{{4}}))?" + CLOCK.format("en_month_first")),
+    ("en_day_first", rf"(?P<en_day_first_day>\d{{1,2}})\s+(?P<en_day_first_month>{MONTH})"
+                     rf"(?:,?\s+(?P<en_day_first_year>\d{{4}}))?" + CLOCK.format("en_day_first")),
+)
+CLOCK_GROUPS = {
+    name: (f"{name}_hour", f"{name}_minute", f"{name}_ampm")
+    for name in ("zh_full", "zh_day", "yesterday", "today", "en_month_first", "en_day_first")
+}
+ONE_DAY = timedelta(days=1)
+DATE_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in DATE_FORMATS), re.I)
+
+FB_PROFILE_ID_URL_RE = re.compile(r"(https://www.facebook.com/profile.php\?id=\d+)")
+FB_CFT_URL_RE = re.compile(r"^https://www\.facebook\.com/([A-Za-z0-9_.-]+)\?__cft__\[\d+\]=.*")
+FB_PROFILE_ID_RE = re.compile(r"id=(\d+)")
+FB_USERNAME_URL_RE = re.compile(r"^https://www\.facebook\.com/([A-Za-z0-9_.-]+)$")
+
+# 各平台从帖子链接取 ID
+POST_ID_PATTERNS = {
+    "instagram": re.compile(r"/(?:p|reel)/([^/]+)/"),
+    "tiktok": re.compile(r"/video/(\d+)"),
+    "twitter": re.compile(r"/status/(\d+)"),
+}
+
+
+def _count(number, unit):
+    multiplier = COUNT_MULTIPLIERS[unit.lower() if unit else None]
+    if multiplier == 1:
+        return int(float(number)) if "." in number else int(number)
+    # round 避免 2.3万 这类浮点乘法截断成 22999
+    return int(round(float(number) * multiplier))
+
+
+def parse_number(value):
+    if isinstance(value, (int, float)):
+        return value
+    if not value:
+        return 0
+    if value.isdigit():
+        return int(value)
+    match = COUNT_RE.fullmatch(value)
+    if not match:
+        return 0
+    number, unit = match.groups()
+    return _count(number.translate(COUNT_SEPARATORS), unit)
+
+
+def parse_numbers(values):
+    return [parse_number(value) for value in values]
+
+
+def parse_count_label(label):
+    counts = dict.fromkeys(COUNT_FIELDS, 0)
+    if not label:
+        return counts
+    for number, unit, word in X_COUNT_LABEL_RE.findall(label):
+        field = X_COUNT_FIELDS.get(word.lower())
+        if field:
+            counts[field] = _count(number.translate(COUNT_SEPARATORS), unit)
+    return counts
+
+
+def normalize_counts(records, fields=COUNT_FIELDS):
+    # 批量：把一组结果里的计数字段原地转成整数
+    for record in records:
+        for field in fields:
+            if field in record:
+                record[field] = parse_number(record[field])
+    return records
+
+
+def _clock(match, name, base):
+    hour, minute, ampm = match.group(*CLOCK_GROUPS[name])
+    if hour is None:
+        return None
+    hour = int(hour)
+    if ampm:
+        hour = hour % 12 + (12 if ampm.lower() == "pm" else 0)
+    return datetime(base.year, base.month, base.day, hour, int(minute))
+
+
+def _without_year(month, day, now):
+    # 没写年份的日期不会在未来，比今天晚就是去年的
+    year = now.year
+    if (month, day) > (now.month, now.day):
+        year -= 1
+    return datetime(year, month, day)
+
+
+def _parse_iso(match, now, truncate_days):
+    year, month, day, hour, minute, second = match.group(
+        "iso_year", "iso_month", "iso_day", "iso_hour", "iso_minute", "iso_second")
+    if hour is None:
+        return datetime(int(year), int(month), int(day)), True
+    return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0)), False
+
+
+def _parse_zh_full(match, now, truncate_days):
+    year, month, day = match.group("zh_full_year", "zh_full_month", "zh_full_day")
+    day = datetime(int(year), int(month), int(day))
+    at = _clock(match, "zh_full", day)
+    return (at, False) if at else (day, True)
+
+
+def _parse_zh_day(match, now, truncate_days):
+    month, day = match.group("zh_day_month", "zh_day_day")
+    day = _without_year(int(month), int(day), now)
+    at = _clock(match, "zh_day", day)
+    return (at, False) if at else (day, True)
+
+
+def _parse_month_day(match, now, truncate_days):
+    month, day = match.group("month_day_month", "month_day_day")
+    return _without_year(int(month), int(day), now), True
+
+
+def _parse_yesterday(match, now, truncate_days):
+    day = now - ONE_DAY
+    at = _clock(match, "yesterday", day)
+    return (at, False) if at else (day, truncate_days)
+
+
+def _parse_today(match, now, truncate_days):
+    at = _clock(match, "today", now)
+    return (at, False) if at else (now, truncate_days)
+
+
+def _parse_now(match, now, truncate_days):
+    return now, False
+
+
+def _parse_relative(match, now, truncate_days):
+    value, unit = match.group("relative_value", "relative_unit")
+    seconds = RELATIVE_SECONDS[RELATIVE_UNITS[unit.lower()]]
+    # 天、周以上的相对时间只精确到日期
+    return now - timedelta(seconds=int(value) * seconds), truncate_days and seconds >= 86400
+
+
+def _parse_english(name):
+    groups = (f"{name}_month", f"{name}_day", f"{name}_year")
+
+    def parse(match, now, truncate_days):
+        month, day, year = match.group(*groups)
+        month = MONTHS[month[:3].lower()]
+        date = datetime(int(year), month, int(day)) if year else _without_year(month, int(day), now)
+        at = _clock(match, name, date)
+        return (at, False) if at else (date, True)
+
+    return parse
+
+
+DATE_HANDLERS = {
+    "iso": _parse_iso,
+    "zh_full": _parse_zh_full,
+    "zh_day": _parse_zh_day,
+    "month_day": _parse_month_day,
+    "yesterday": _parse_yesterday,
+    "today": _parse_today,
+    "now": _parse_now,
+    "relative": _parse_relative,
+    "en_month_first": _parse_english("en_month_first"),
+    "en_day_first": _parse_english("en_day_first"),
+}
+
+
+def parse_date(text, now=None, default=None, truncate_days=False):
+    # 返回 'YYYY-MM-DD HH:MM:SS'，只有日期的格式时间部分为 00:00:00；认不出时返回 default
+    match = DATE_RE.match(text.strip()) if text else None
+    if not match:
+        return default
+    now = now or datetime.now()
+    try:
+        value, date_only = DATE_HANDLERS[match.lastgroup](match, now, truncate_days)
+    except ValueError:
+        return default
+    if date_only:
+        return f"{value.date().isoformat()} 00:00:00"
+    return value.isoformat(" ", "seconds")
+
+
+def parse_dates(values, now=None, default=None, truncate_days=False):
+    now = now or datetime.now()
+    return [parse_date(value, now, default, truncate_days) for value in values]
+
+
+def adjust_tiktok_date(push_time, now=None):
+    # TikTok 的 "3d ago" 之类只精确到天，认不出的原样返回
+    return parse_date(push_time, now, default=push_time, truncate_days=True)
+
+
+def parse_relative_time(relative_str, now=None):
+    # Facebook 的时间，认不出时按当前时间
+    value = parse_date(relative_str, now)
+    if value is None:
+        return (now or datetime.now()).isoformat(" ", "seconds")
+    return value
+
+
+def extract_post_id(platform, link):
+    pattern = POST_ID_PATTERNS.get(platform)
+    match = pattern.search(link) if pattern else None
+    return match.group(1) if match else None
+
+
+def instagram_extract_post_id(url):
+    return extract_post_id("instagram", url)
+
+
+def extract_facebook_url(profile_url):
+    if '/user/' in profile_url:
+        if profile_url.startswith("/groups/"):
+            return f"https://www.facebook.com{profile_url.split('/?')[0]}"
+        return profile_url.split('/?')[0]
+    if profile_url.startswith("/profile.php?id="):
+        return f"https://www.facebook.com{profile_url.split('&')[0]}"
+    if profile_url.startswith("https://l.facebook.com/l.php?u"):
+        return profile_url
+    if profile_url.startswith("https://www.facebook.com/profile.php?id="):
+        match = FB_PROFILE_ID_URL_RE.match(profile_url)
+        if match:
+            return match.group(1)
+    match = FB_CFT_URL_RE.match(profile_url)
+    if match:
+        # 去掉 __cft__ 等跟踪参数
+        return f"https://www.facebook.com/{match.group(1)}"
+    return profile_url
+
+
+def extract_facebook_post_link(post_link):
+    if '/posts/' in post_link:
+        if '?__cft__' in post_link:
+            return post_link.split('?__cft__')[0]
+        return post_link.split('/?')[0]
+    return post_link
+
+
+def extract_facebook_post_id(post_link):
+    if '/posts/' in post_link:
+        return post_link.split('/posts/')[1]
+    return post_link
+
+
+def extract_facebook_id(profile_url):
+    if profile_url.startswith("https://www.facebook.com/profile.php?id="):
+        match = FB_PROFILE_ID_RE.search(profile_url)
+        if match:
+            return match.group(1)
+    if '/user/' in profile_url:
+        return profile_url.split('/user/')[1]
+    match = FB_USERNAME_URL_RE.match(profile_url)
+    if match:
+        return match.group(1)
+    return profile_url
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+from collections import Counter
+from dataclasses import dataclass
+
+from playwright.async_api import Page
+
+
+@dataclass
+class OverlayHandler:
+    name: str
+    selector: str
+    # click: 点击关闭按钮；remove: 直接把遮罩节点从 DOM 移除
+    action: str = "click"
+
+
+# 登录弹窗、Cookie 横幅、关闭按钮，只在出现时处理，不阻塞主流程
+DEFAULT_OVERLAYS = {
+    "facebook": [
+        OverlayHandler("close_dialog", '//div[@aria-label="Close"]'),
+        OverlayHandler("close_dialog_zh", '//div[@aria-label="关闭"]'),
+        OverlayHandler("cookie_banner", '//div[@role="dialog"]//span[text()="Decline optional cookies"]'),
+        OverlayHandler("cookie_banner_zh", '//div[contains(@aria-label, "拒绝使用非必要 Cookie")]'),
+    ],
+    "instagram": [
+        OverlayHandler("close_dialog", 'svg[aria-label="Close"]'),
+        OverlayHandler("cookie_banner", '//button[text()="Decline optional cookies"]'),
+        OverlayHandler("login_prompt", '//div[@role="dialog"]//div[@role="button" and text()="Not now"]'),
+    ],
+    "twitter": [
+        OverlayHandler("cookie_banner", '//div[@data-testid="BottomBar"]//span[text()="Refuse non-essential cookies"]'),
+        OverlayHandler("login_sheet", '//div[@data-testid="sheetDialog"]//button[@data-testid="app-bar-close"]'),
+    ],
+    "tiktok": [
+        OverlayHandler("login_modal", '//div[@id="login-modal"]//div[@data-e2e="modal-close-inner-button"]'),
+        OverlayHandler("cookie_banner", '//button[text()="Decline optional cookies"]'),
+    ],
+}
+
+BINDING_NAME = "__overlayFired"
+
+# 注入到每个新文档，MutationObserver 发现遮罩就处理，并通过 binding 回报给 Python 计数
+OVERLAY_INIT_JS = """
+((handlers) => {
+    const find = (selector) => {
+        if (selector.startsWith('/') || selector.startsWith('(')) {
+            return document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        return document.querySelector(selector);
+    };
+    let scheduled = false;
+    const sweep = () => {
+        scheduled = false;
+        for (const handler of handlers) {
+            const element = find(handler.selector);
+            if (!element || element.dataset.overlayHandled) {
+                continue;
+            }
+            element.dataset.overlayHandled = '1';
+            if (handler.action === 'remove') {
+                element.remove();
+            } else {
+                const target = element.closest('[role="button"], button') || element;
+                target.dispatchEvent(new MouseEvent('click', {bubbles: true, cancelable: true, view: window}));
+            }
+            if (window.%(binding)s) {
+                window.%(binding)s(handler.name);
+            }
+        }
+    };
+    const start = () => {
+        new MutationObserver(() => {
+            if (!scheduled) {
+                scheduled = true;
+                setTimeout(sweep, 100);
+            }
+        }).observe(document.documentElement, {childList: true, subtree: true});
+        sweep();
+    };
+    if (document.documentElement) {
+        start();
+    } else {
+        document.addEventListener('readystatechange', start, {once: true});
+    }
+})(%(handlers)s);
+"""
+
+
+class OverlayRegistry:
+    def __init__(self, overlays=None):
+        self.overlays = {platform: list(handlers) for platform, handlers in (overlays or DEFAULT_OVERLAYS).items()}
+        self.fired = Counter()
+
+    def register(self, platform, handler: OverlayHandler):
+        self.overlays.setdefault(platform, []).append(handler)
+
+    async def install(self, page: Page, platform):
+        handlers = self.overlays.get(platform)
+        if not handlers:
+            return
+
+        def fired(source, name):
+            self.fired[(platform, name)] += 1
+            logging.info(f"[{platform}] overlay [{name}] dismissed")
+
+        await page.expose_binding(BINDING_NAME, fired)
+        await page.add_init_script(OVERLAY_INIT_JS % {
+            "binding": BINDING_NAME,
+            "handlers": json.dumps([handler.__dict__ for handler in handlers], ensure_ascii=False),
+        })
+
+    def stats(self):
+        stats = {}
+        for (platform, name), count in self.fired.items():
+            stats.setdefault(platform, {})[name] = count
+        return stats
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import logging
+
+from playwright.async_api import BrowserContext, Page
+
+VIEWPORT = {"width": 1920, "height": 1080}
+
+
+# 每个平台一组预热好的标签页，借出使用后重置再放回，坏掉的页直接丢弃
+class PagePool:
+    def __init__(self, context: BrowserContext, platform: str, size: int, setup=None):
+        self.context = context
+        self.platform = platform
+        self.size = size
+        self._setup = setup
+        self._idle: list[Page] = []
+        self._broken: set[Page] = set()
+        self._slots = asyncio.Semaphore(size)
+        self._in_use = 0
+        self._created = 0
+        self._discarded = 0
+
+    async def _new_page(self) -> Page:
+        page = await self.context.new_page()
+        await page.set_viewport_size(VIEWPORT)
+        page.on("crash", lambda p: self._broken.add(p))
+        if self._setup:
+            # 路由拦截等按平台的初始化只在建页时做一次，复用时不再重复
+            await self._setup(page, self.platform)
+        self._created += 1
+        return page
+
+    async def warm(self):
+        while len(self._idle) < self.size:
+            self._idle.append(await self._new_page())
+        logging.info(f"[{self.platform}] page pool warmed, size {self.size}")
+
+    async def acquire(self) -> Page:
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                page = self._idle.pop()
+                if self._usable(page):
+                    self._in_use += 1
+                    return page
+                await self._discard(page)
+            page = await self._new_page()
+            self._in_use += 1
+            return page
+        except Exception:
+            self._slots.release()
+            raise
+
+    async def release(self, page: Page, broken=False):
+        self._in_use -= 1
+        try:
+            if broken or not self._usable(page):
+                await self._discard(page)
+                return
+            try:
+                await self._reset(page)
+            except Exception as e:
+                logging.warning(f"[{self.platform}] page reset failed, discard it: {e}")
+                await self._discard(page)
+                return
+            self._idle.append(page)
+        finally:
+            self._slots.release()
+
+    @contextlib.asynccontextmanager
+    async def page(self):
+        page = await self.acquire()
+        try:
+            yield page
+        finally:
+            await self.release(page)
+
+    def _usable(self, page: Page):
+        return not page.is_closed() and page not in self._broken
+
+    async def _reset(self, page: Page):
+        # 回到空白页，清掉上一次请求留下的 DOM、定时器和未完成的网络请求
+        await page.goto("about:blank", timeout=5000)
+
+    async def _discard(self, page: Page):
+        self._broken.discard(page)
+        self._discarded += 1
+        if not page.is_closed():
+            try:
+                await page.close()
+            except Exception as e:
+                logging.warning(f"[{self.platform}] close broken page failed: {e}")
+
+    async def close(self):
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "inUse": self._in_use,
+            "created": self._created,
+            "discarded": self._discarded,
+        }
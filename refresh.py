@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import time
+from collections import OrderedDict
+
+from normalize import COUNT_FIELDS, parse_number
+
+
+def counters_of(record):
+    return {field: record[field] for field in COUNT_FIELDS if field in record}
+
+
+def parse_counters(values):
+    # 调用方带来的计数：数字原样用，字符串按页面上的写法（1.2K、1,234）转成数字，其他类型返回 None
+    if not isinstance(values, dict):
+        return None
+    counters = {}
+    for field, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            return None
+        counters[field] = parse_number(value)
+    return counters
+
+
+def counters_delta(current, previous):
+    if previous is None:
+        return None
+    return {field: value - previous.get(field, 0) for field, value in current.items()}
+
+
+# 每个帖子最近一次的计数，刷新时算增量用；完整解析和刷新都会更新，超出上限时淘汰最久没用的
+class CounterHistory:
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, counters, at=None):
+        self._entries[key] = (counters, at or time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return {"entries": len(self._entries), "maxEntries": self.max_entries}
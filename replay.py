@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from playwright.async_api import Browser, Route
+
+from page_pool import VIEWPORT
+from result import Result
+
+FIXTURE_HAR = "page.har"
+FIXTURE_SNAPSHOT = "snapshot.html"
+FIXTURE_META = "meta.json"
+CONTEXT_OPTIONS = {"viewport": VIEWPORT, "locale": "en-SG"}
+
+
+# 一次录制：HAR（含响应体）+ 解析结束时的 DOM 快照 + 平台和链接等元数据
+@dataclass
+class Fixture:
+    name: str
+    directory: str
+    platform: str
+    link: str
+    final_url: str = ""
+    # 录制时浏览器解析出的结果，用来核对其他解析路径
+    expected: dict = None
+
+    @property
+    def har(self):
+        return os.path.join(self.directory, FIXTURE_HAR)
+
+    @property
+    def snapshot(self):
+        return os.path.join(self.directory, FIXTURE_SNAPSHOT)
+
+
+def load_fixtures(root, platforms=None):
+    fixtures = []
+    for name in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        directory = os.path.join(root, name)
+        meta_path = os.path.join(directory, FIXTURE_META)
+        if not os.path.isfile(meta_path):
+            continue
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if platforms and meta["platform"] not in platforms:
+            continue
+        fixtures.append(Fixture(name, directory, meta["platform"], meta["link"], meta.get("finalUrl", ""),
+                                meta.get("result")))
+    return fixtures
+
+
+async def record_fixture(browser: Browser, storage_state, platform, link, directory, parse_page, page_setup=None):
+    # 持久化上下文不能中途开启 HAR 录制，用登录态快照另开一个普通上下文来录
+    os.makedirs(directory, exist_ok=True)
+    context = await browser.new_context(storage_state=storage_state, record_har_path=os.path.join(directory, FIXTURE_HAR),
+                                        record_har_content="embed", **CONTEXT_OPTIONS)
+    try:
+        page = await context.new_page()
+        if page_setup:
+            await page_setup(page, platform)
+        result = await parse_page(page, link)
+        snapshot = await page.content()
+        final_url = page.url
+    finally:
+        # HAR 在上下文关闭时才写盘
+        await context.close()
+    with open(os.path.join(directory, FIXTURE_SNAPSHOT), "w", encoding="utf-8") as f:
+        f.write(snapshot)
+    with open(os.path.join(directory, FIXTURE_META), "w", encoding="utf-8") as f:
+        json.dump({"platform": platform, "link": link, "finalUrl": final_url, "recordedAt": int(time.time()),
+                   "result": result.to_dict() if isinstance(result, Result) else result}, f, ensure_ascii=False, indent=2)
+    logging.info(f"[{platform}] [{link}] recorded to {directory}")
+    return result
+
+
+async def replay_context(browser: Browser, fixture: Fixture, mode="har"):
+    # har：按录制的请求逐条回放；snapshot：主文档换成 DOM 快照，其余请求全部拒绝。两种都不访问网络
+    context = await browser.new_context(**CONTEXT_OPTIONS)
+    if mode == "har":
+        await context.route_from_har(fixture.har, not_found="abort")
+        return context
+    with open(fixture.snapshot, encoding="utf-8") as f:
+        html = f.read()
+
+    async def handle(route: Route):
+        request = route.request
+        if request.resource_type == "document" and request.frame.parent_frame is None:
+            await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=html)
+        else:
+            await route.abort("blockedbyclient")
+
+    await context.route("**/*", handle)
+    return context
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+from collections import Counter
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Route
+
+# 解析只需要 DOM 文本和少量属性，图片、视频、字体和统计脚本都可以不下载。
+# allow 里是头像地址的特征，即使资源类型命中也放行，保证 profileImage 能正常取到
+DEFAULT_BLOCK_RULES = {
+    "twitter": {
+        "resource_types": ["image", "media", "font"],
+        "domains": ["ads-twitter.com", "ads-api.twitter.com", "analytics.twitter.com", "google-analytics.com",
+                    "googletagmanager.com", "doubleclick.net"],
+        "allow": ["pbs.twimg.com/profile_images/"],
+    },
+    "tiktok": {
+        "resource_types": ["image", "media", "font"],
+        "domains": ["mon.tiktokv.com", "mcs.tiktokw.us", "analytics.tiktok.com", "google-analytics.com",
+                    "googletagmanager.com", "doubleclick.net"],
+        "allow": ["-avt-"],
+    },
+    "facebook": {
+        "resource_types": ["image", "media", "font"],
+        "domains": ["connect.facebook.net", "google-analytics.com", "googletagmanager.com", "doubleclick.net"],
+        "allow": ["/t39.30808-1/", "/t1.6435-1/"],
+    },
+    "instagram": {
+        "resource_types": ["image", "media", "font"],
+        "domains": ["connect.facebook.net", "google-analytics.com", "googletagmanager.com", "doubleclick.net"],
+        "allow": ["/t51.2885-19/"],
+    },
+}
+
+# 被拦截的请求拿不到真实大小，按资源类型估算节省的流量
+DEFAULT_ESTIMATED_BYTES = {
+    "image": 40 * 1024,
+    "media": 512 * 1024,
+    "font": 30 * 1024,
+    "script": 60 * 1024,
+    "stylesheet": 20 * 1024,
+}
+
+
+class ResourceBlocker:
+    def __init__(self, rules=None, estimated_bytes=None, enabled=True):
+        self.enabled = enabled
+        self.rules = {platform: dict(rule) for platform, rule in (rules or DEFAULT_BLOCK_RULES).items()}
+        self.estimated_bytes = dict(estimated_bytes or DEFAULT_ESTIMATED_BYTES)
+        self.blocked_requests = Counter()
+        self.blocked_bytes = Counter()
+        self.blocked_domains = Counter()
+
+    @classmethod
+    def from_file(cls, path):
+        # 配置文件里按平台覆盖默认规则，未出现的平台沿用默认值
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        rules = {**DEFAULT_BLOCK_RULES, **config.get("rules", {})}
+        return cls(rules, {**DEFAULT_ESTIMATED_BYTES, **config.get("estimated_bytes", {})})
+
+    def should_block(self, platform, url, resource_type):
+        rule = self.rules.get(platform)
+        if not rule or resource_type == "document":
+            return False
+        if any(pattern in url for pattern in rule.get("allow", ())):
+            return False
+        if resource_type in rule.get("resource_types", ()):
+            return True
+        host = urlparse(url).hostname or ""
+        return any(host == domain or host.endswith("." + domain) for domain in rule.get("domains", ()))
+
+    async def install(self, page: Page, platform):
+        if not self.enabled or platform not in self.rules:
+            return
+
+        async def handle(route: Route):
+            request = route.request
+            if self.should_block(platform, request.url, request.resource_type):
+                self.blocked_requests[(platform, request.resource_type)] += 1
+                self.blocked_bytes[platform] += self.estimated_bytes.get(request.resource_type, 0)
+                self.blocked_domains[urlparse(request.url).hostname or ""] += 1
+                await route.abort("blockedbyclient")
+            else:
+                await route.fallback()
+
+        await page.route("**/*", handle)
+        logging.info(f"[{platform}] resource blocking installed")
+
+    def stats(self):
+        requests = {}
+        for (platform, resource_type), count in self.blocked_requests.items():
+            requests.setdefault(platform, {})[resource_type] = count
+        return {
+            "enabled": self.enabled,
+            "requests": requests,
+            "estimatedBytes": dict(self.blocked_bytes),
+            "topDomains": dict(self.blocked_domains.most_common(20)),
+        }
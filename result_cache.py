@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+@dataclass
+class CacheEntry:
+    value: dict
+    platform: str
+    size: int
+    stored_at: float
+
+
+# 按 平台+帖子ID 缓存解析结果：按平台 TTL 过期，按占用内存做 LRU 淘汰，
+# 开启 stale 窗口后过期数据先返回，再由调用方在后台刷新
+class ResultCache:
+    def __init__(self, default_ttl=300, platform_ttl=None, max_bytes=64 * 1024 * 1024, stale_ttl=0):
+        self.default_ttl = default_ttl
+        self.platform_ttl = dict(platform_ttl or {})
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.counters = Counter()
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._bytes = 0
+
+    def ttl(self, platform):
+        return self.platform_ttl.get(platform, self.default_ttl)
+
+    def enabled(self, platform):
+        return self.ttl(platform) > 0 and self.max_bytes > 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if not entry:
+            self.counters["misses"] += 1
+            return None, None
+        age = time.monotonic() - entry.stored_at
+        ttl = self.ttl(entry.platform)
+        if age <= ttl:
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry.value, FRESH
+        if age <= ttl + self.stale_ttl:
+            self._entries.move_to_end(key)
+            self.counters["stale_hits"] += 1
+            return entry.value, STALE
+        self._remove(key)
+        self.counters["expired"] += 1
+        self.counters["misses"] += 1
+        return None, None
+
+    def put(self, key, platform, value):
+        if not self.enabled(platform):
+            return
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")) + len(key)
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = CacheEntry(value, platform, size, time.monotonic())
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.counters["evictions"] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry.size
+
+    def stats(self):
+        lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "hitRate": round((self.counters["hits"] + self.counters["stale_hits"]) / lookups, 4) if lookups else 0,
+        }
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from collections import Counter
+
+
+# 同一个键同时只跑一次：后到的请求直接等待正在进行的那次解析并共享结果
+class SingleFlight:
+    def __init__(self):
+        self.leaders = Counter()
+        self.merged = Counter()
+        self._calls: dict[str, asyncio.Task] = {}
+
+    def running(self, key):
+        return key in self._calls
+
+    async def do(self, key, fn, label=None):
+        task = self._calls.get(key)
+        if task:
+            self.merged[label] += 1
+        else:
+            self.leaders[label] += 1
+            # 解析放在独立的 task 里，发起者断开也不会取消其他等待者的解析
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self):
+        labels = set(self.leaders) | set(self.merged)
+        return {
+            "inFlight": len(self._calls),
+            "calls": {label: self.leaders[label] for label in labels},
+            "merged": {label: self.merged[label] for label in labels},
+        }
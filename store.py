@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from normalize import COUNT_FIELDS
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    platform TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    post_link TEXT,
+    data TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (platform, post_id)
+);
+CREATE INDEX IF NOT EXISTS idx_posts_updated ON posts (platform, updated_at);
+CREATE TABLE IF NOT EXISTS snapshots (
+    platform TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    at REAL NOT NULL,
+    source TEXT NOT NULL,
+    likes INTEGER,
+    comments INTEGER,
+    retweets INTEGER,
+    lovers INTEGER,
+    views INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_post_at ON snapshots (platform, post_id, at);
+"""
+
+# 同一个帖子后到的记录只覆盖它带了的字段，主页卡片这类不完整的记录不会把完整解析的字段冲掉
+UPSERT_POST = (
+    "INSERT INTO posts (platform, post_id, post_link, data, first_seen, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (platform, post_id) DO UPDATE SET post_link = coalesce(excluded.post_link, post_link), "
+    "data = json_patch(data, excluded.data), updated_at = excluded.updated_at")
+INSERT_SNAPSHOT = (
+    f"INSERT INTO snapshots (platform, post_id, at, source, {', '.join(COUNT_FIELDS)}) "
+    f"VALUES (?, ?, ?, ?{', ?' * len(COUNT_FIELDS)})")
+
+
+# 解析结果落 SQLite：posts 按平台 + postId 存最新一份，snapshots 只追加计数，形成时间序列。
+# 写入先进内存队列，后台任务攒一批在线程里一个事务写完，请求路径上不等磁盘
+class PostStore:
+    def __init__(self, path="posts.db", batch_size=500, flush_interval=1.0, max_pending=50_000, export_dir="export"):
+        self.path = path
+        self.export_dir = export_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.counters = Counter()
+        self._db: sqlite3.Connection = None
+        self._db_lock = threading.Lock()
+        self._queue: asyncio.Queue = None
+        self._writer: asyncio.Task = None
+
+    @property
+    def enabled(self):
+        return self._writer is not None
+
+    async def _execute(self, fn):
+        def run():
+            with self._db_lock:
+                with self._db:
+                    return fn(self._db)
+
+        return await asyncio.to_thread(run)
+
+    async def start(self):
+        if not self.path:
+            return
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._execute(lambda db: db.executescript(SCHEMA))
+        self._queue = asyncio.Queue(self.max_pending)
+        self._writer = asyncio.create_task(self._write_loop())
+        logging.info(f"post store started, db {self.path}")
+
+    async def stop(self):
+        if not self._writer:
+            return
+        # 放一个结束标记，写入任务把它前面的记录都写完再退出
+        writer, self._writer = self._writer, None
+        await self._queue.put(None)
+        await writer
+        self._db.close()
+        self._db = None
+
+    def _put(self, item):
+        if not self._writer:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # 磁盘跟不上时丢掉新记录，不反压到抓取
+            self.counters["dropped"] += 1
+
+    def record_post(self, platform, post_id, data, source="scrape"):
+        now = time.time()
+        # json_patch 会把值为 null 的字段删掉，没取到的字段不写，保留库里已有的值
+        fields = {key: value for key, value in data.items() if value is not None}
+        self._put(("post", (platform, post_id, data.get("postLink"),
+                            json.dumps(fields, ensure_ascii=False, default=str), now, now)))
+        self.record_counters(platform, post_id, data, source, now)
+
+    def record_counters(self, platform, post_id, counters, source="refresh", at=None):
+        values = [counters.get(field) for field in COUNT_FIELDS]
+        if all(value is None for value in values):
+            return
+        self._put(("snapshot", (platform, post_id, at or time.time(), source, *values)))
+
+    async def _write_loop(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            # 攒到一批或者等满 flush_interval 再写
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                deadline = deadline or time.monotonic() + self.flush_interval
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch):
+        posts = [row for kind, row in batch if kind == "post"]
+        snapshots = [row for kind, row in batch if kind == "snapshot"]
+
+        def write(db):
+            db.executemany(UPSERT_POST, posts)
+            db.executemany(INSERT_SNAPSHOT, snapshots)
+
+        try:
+            await self._execute(write)
+        except Exception as e:
+            self.counters["failedBatches"] += 1
+            logging.error(f"post store write {len(batch)} records failed: {e}")
+            return
+        self.counters["batches"] += 1
+        self.counters["posts"] += len(posts)
+        self.counters["snapshots"] += len(snapshots)
+
+    @staticmethod
+    def _snapshot(row):
+        snapshot = {field: row[field] for field in COUNT_FIELDS if row[field] is not None}
+        return {"at": row["at"], "source": row["source"], **snapshot}
+
+    async def latest(self, platform, post_id):
+        def read(db):
+            post = db.execute("SELECT * FROM posts WHERE platform = ? AND post_id = ?", (platform, post_id)).fetchone()
+            snapshot = db.execute("SELECT * FROM snapshots WHERE platform = ? AND post_id = ? ORDER BY at DESC LIMIT 1",
+                                  (platform, post_id)).fetchone()
+            return post, snapshot
+
+        post, snapshot = await self._execute(read)
+        if not post and not snapshot:
+            return None
+        return {
+            "platform": platform,
+            "postId": post_id,
+            "postLink": post["post_link"] if post else None,
+            "data": json.loads(post["data"]) if post else None,
+            "firstSeen": post["first_seen"] if post else None,
+            "updatedAt": post["updated_at"] if post else None,
+            "counters": self._snapshot(snapshot) if snapshot else None,
+        }
+
+    async def last_counters(self, platform, post_id):
+        if not self._db:
+            return None
+        latest = await self.latest(platform, post_id)
+        counters = latest and latest["counters"]
+        if not counters:
+            return None
+        at = counters.pop("at")
+        counters.pop("source")
+        return counters, at
+
+    async def history(self, platform, post_id, since=None, until=None, limit=1000):
+        rows = await self._execute(lambda db: db.execute(
+            "SELECT * FROM snapshots WHERE platform = ? AND post_id = ? AND at >= ? AND at <= ? ORDER BY at LIMIT ?",
+            (platform, post_id, since or 0, until or time.time() + 1, limit)).fetchall())
+        return [self._snapshot(row) for row in rows]
+
+    async def posts(self, platform=None, limit=100, offset=0):
+        rows = await self._execute(lambda db: db.execute(
+            "SELECT platform, post_id, post_link, updated_at FROM posts WHERE ? IS NULL OR platform = ? "
+            "ORDER BY updated_at DESC LIMIT ? OFFSET ?", (platform, platform, limit, offset)).fetchall())
+        return [{"platform": row["platform"], "postId": row["post_id"], "postLink": row["post_link"],
+                 "updatedAt": row["updated_at"]} for row in rows]
+
+    async def export_parquet(self, prefix=""):
+        # 可选依赖：装了 pyarrow 才能导出，两张表各一个 parquet 文件
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is not installed")
+        os.makedirs(self.export_dir, exist_ok=True)
+        exported = {}
+        for table in ("posts", "snapshots"):
+            rows = await self._execute(lambda db: db.execute(f"SELECT * FROM {table}").fetchall())
+            columns = {key: [row[key] for row in rows] for key in rows[0].keys()} if rows else {}
+            path = os.path.join(self.export_dir, f"{prefix}{table}.parquet")
+            await asyncio.to_thread(pyarrow.parquet.write_table, pyarrow.table(columns), path)
+            exported[table] = {"path": path, "rows": len(rows)}
+        return exported
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "pending": self._queue.qsize() if self._queue else 0,
+            **self.counters,
+        }
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections import Counter
+
+from metrics import failure_reason
+
+# 这些失败说明平台在限制我们：并发和速率都减半
+BACKOFF_REASONS = ("rate_limit", "captcha", "login_wall", "timeout")
+
+# rate: 每秒最多发起的解析数；burst: 令牌桶容量；concurrency: [最小, 初始, 最大] 并发；
+# target: 期望的单次耗时（秒），持续超过说明平台变慢，按拥塞处理
+DEFAULT_LIMITS = {
+    "facebook": {"rate": 0.5, "burst": 3, "concurrency": [1, 2, 4], "target": 8},
+    "instagram": {"rate": 0.5, "burst": 3, "concurrency": [1, 2, 4], "target": 8},
+    "twitter": {"rate": 2, "burst": 5, "concurrency": [1, 4, 8], "target": 6},
+    "tiktok": {"rate": 2, "burst": 5, "concurrency": [1, 4, 8], "target": 6},
+}
+DEFAULT_PLATFORM_LIMIT = {"rate": 1, "burst": 3, "concurrency": [1, 2, 4], "target": 8}
+# 单个账号的限制，叠加在平台限制之内
+DEFAULT_ACCOUNT_LIMIT = {"rate": 0.2, "burst": 2, "concurrency": [1, 1, 2], "target": 8}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self):
+        self._refill()
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while (wait := self.delay()) > 0:
+            await asyncio.sleep(wait)
+        self.tokens -= 1
+
+
+# 令牌桶限制发起速率，AIMD 调整并发上限和速率：正常完成时加性增长，
+# 被限流、出验证码或持续变慢时减半，一个冷却窗口内只减一次，避免并发失败时连续减到底
+class AdaptiveLimit:
+    def __init__(self, name, rate, burst, concurrency, target, decrease_interval=5):
+        self.name = name
+        self.max_rate = rate
+        self.min_concurrency, initial, self.max_concurrency = concurrency
+        self.limit = float(initial)
+        self.target = target
+        self.decrease_interval = decrease_interval
+        self.bucket = TokenBucket(rate, burst)
+        self.inflight = 0
+        self.waiting = 0
+        self.latency = None
+        self.counters = Counter()
+        self._last_decrease = 0
+        self._cond = asyncio.Condition()
+
+    @property
+    def available(self):
+        return self.inflight < max(1, int(self.limit)) and self.bucket.delay() == 0
+
+    async def acquire(self):
+        self.waiting += 1
+        try:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self.inflight < max(1, int(self.limit)))
+                self.inflight += 1
+        finally:
+            self.waiting -= 1
+        try:
+            await self.bucket.acquire()
+        except BaseException:
+            await self.release(None, None)
+            raise
+
+    async def release(self, latency, reason):
+        self.inflight -= 1
+        if latency is not None:
+            self._update(latency, reason)
+        async with self._cond:
+            self._cond.notify_all()
+
+    def _update(self, latency, reason):
+        self.latency = latency if self.latency is None else self.latency * 0.8 + latency * 0.2
+        if reason in BACKOFF_REASONS:
+            self.counters[reason] += 1
+            self._decrease(reason)
+        elif reason is None:
+            self.counters["success"] += 1
+            if self.latency > self.target:
+                self._decrease("slow")
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate * 0.05)
+        else:
+            # 帖子不存在等和平台负载无关的失败不调整
+            self.counters[reason] += 1
+
+    def _decrease(self, reason):
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_interval:
+            return
+        self._last_decrease = now
+        self.counters["decreases"] += 1
+        self.limit = max(self.min_concurrency, self.limit / 2)
+        self.bucket.rate = max(self.max_rate / 16, self.bucket.rate / 2)
+        logging.warning(f"[{self.name}] {reason}, concurrency limit -> {self.limit:.2f}, "
+                        f"rate -> {self.bucket.rate:.3f}/s")
+
+    def stats(self):
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "waiting": self.waiting,
+            "rate": round(self.bucket.rate, 3),
+            "maxRate": self.max_rate,
+            "tokens": round(self.bucket.tokens, 2),
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "target": self.target,
+            "counters": dict(self.counters),
+        }
+
+
+# 按平台和按「平台:账号」分别限流，解析前先拿到许可，结束时按耗时和失败原因调整
+class Throttle:
+    def __init__(self, limits=None, account_limit=None, enabled=True):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.account_limit = account_limit or DEFAULT_ACCOUNT_LIMIT
+        self.enabled = enabled
+        self._limits: dict[str, AdaptiveLimit] = {}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config.get("platforms"), config.get("account"))
+
+    def get(self, key):
+        if key not in self._limits:
+            if ":" in key:
+                config = self.account_limit
+            else:
+                config = self.limits.get(key, DEFAULT_PLATFORM_LIMIT)
+            self._limits[key] = AdaptiveLimit(key, config["rate"], config["burst"], config["concurrency"],
+                                              config["target"])
+        return self._limits[key]
+
+    def ready(self, key):
+        return not self.enabled or self.get(key).available
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key):
+        if not self.enabled:
+            yield
+            return
+        limit = self.get(key)
+        await limit.acquire()
+        started = time.perf_counter()
+        reason = None
+        try:
+            yield
+        except Exception as e:
+            reason = failure_reason(e)
+            raise
+        finally:
+            await limit.release(time.perf_counter() - started, reason)
+
+    def stats(self):
+        return {"enabled": self.enabled, "limits": {key: limit.stats() for key, limit in self._limits.items()}}
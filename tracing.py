@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import logging
+import os
+import re
+import time
+
+from playwright.async_api import BrowserContext, Page
+
+
+# 慢请求自动留存 Playwright trace：每个上下文常驻 tracing，请求开始时开一个 chunk，
+# 超过阈值才写文件，否则丢弃；目录里只保留最近 keep 个文件
+class SlowTraceRecorder:
+    def __init__(self, directory="traces", threshold_ms=0, keep=20):
+        self.directory = directory
+        self.threshold_ms = threshold_ms
+        self.keep = keep
+        self.saved = 0
+        self.skipped = 0
+        self._busy: set[BrowserContext] = set()
+
+    @property
+    def enabled(self):
+        return self.threshold_ms > 0
+
+    async def install(self, context: BrowserContext):
+        if not self.enabled:
+            return
+        await context.tracing.start(screenshots=True, snapshots=True)
+        # start 会顺带开一个 chunk，先丢掉，之后按请求开关
+        await context.tracing.stop_chunk()
+
+    @contextlib.asynccontextmanager
+    async def capture(self, page: Page, platform, link):
+        if not self.enabled:
+            yield
+            return
+        context = page.context
+        if context in self._busy:
+            # 一个上下文同时只能有一个 chunk，并发的请求不单独留 trace（会出现在正在录的 chunk 里）
+            self.skipped += 1
+            yield
+            return
+        self._busy.add(context)
+        try:
+            await context.tracing.start_chunk(title=f"{platform} {link}")
+        except Exception as e:
+            self._busy.discard(context)
+            logging.warning(f"start trace chunk failed: {e}")
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            try:
+                if elapsed_ms >= self.threshold_ms:
+                    path = self._path(platform, link)
+                    await context.tracing.stop_chunk(path=path)
+                    self.saved += 1
+                    self._rotate()
+                    logging.info(f"[{platform}] [{link}] slow scrape {elapsed_ms:.0f}ms, trace saved to {path}")
+                else:
+                    await context.tracing.stop_chunk()
+            except Exception as e:
+                logging.warning(f"stop trace chunk failed: {e}")
+            finally:
+                self._busy.discard(context)
+
+    def _path(self, platform, link):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", link.split("://")[-1])[:60].strip("-")
+        return os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.saved}-{platform}-{slug}.zip")
+
+    def _rotate(self):
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".zip")]
+        files.sort(key=os.path.getmtime)
+        for path in files[:max(len(files) - self.keep, 0)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.warning(f"remove old trace {path} failed: {e}")
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "thresholdMs": self.threshold_ms,
+            "saved": self.saved,
+            "skipped": self.skipped,
+        }